@@ -1,33 +1,52 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from typing import Type, Tuple, Optional
+from typing import Type, Tuple, Optional, List
 
-from hwt.code import If
+from hwt.code import If, Concat, Switch, Or
 from hwt.hdl.types.bits import Bits
 from hwt.hdl.types.defs import BIT
 from hwt.hdl.types.hdlType import HdlType
 from hwt.hdl.types.struct import HStruct
-from hwt.interfaces.std import HandshakeSync
+from hwt.interfaces.hsStructIntf import HsStructIntf
+from hwt.interfaces.std import HandshakeSync, Clk, Rst_n
 from hwt.interfaces.structIntf import StructIntf
 from hwt.interfaces.utils import addClkRstn, propagateClkRstn
+from hwt.math import log2ceil
 from hwt.synthesizer.hObjList import HObjList
 from hwt.synthesizer.param import Param
 from hwt.synthesizer.rtlLevel.rtlSignal import RtlSignal
 from hwt.synthesizer.unit import Unit
+from hwtAxiPerfTester.bandwidth_collector import BandwidthCollector
 from hwtAxiPerfTester.transaction_generator import TransactionGenerator
 from hwtAxiPerfTester.rw_pattern_generator import RWPatternGenerator
 from hwtAxiPerfTester.statistic_collector import StatisticCollector
 from hwtAxiPerfTester.time_duration_storage import TimeDurationStorage
-from hwtLib.amba.axi4 import Axi4, Axi4_addr
+from hwtAxiPerfTester.occupancy_collector import OccupancyCollector
+from hwtAxiPerfTester.reorder_collector import ReorderCollector
+from hwtAxiPerfTester.trace_reader import TraceReader
+from hwtAxiPerfTester.write_addr_history import WriteAddrHistory
+from hwtLib.amba.axi4 import Axi4, Axi4_addr, Axi4_w
 from hwtLib.amba.axi4Lite import Axi4Lite
 from hwtLib.amba.axiLite_comp.endpoint import AxiLiteEndpoint
-from hwtLib.amba.constants import BURST_INCR, PROT_DEFAULT, BYTES_IN_TRANS, \
+from hwtLib.amba.axi_comp.builder import AxiBuilder
+from hwtLib.amba.constants import BURST_FIXED, BURST_INCR, BURST_WRAP, PROT_DEFAULT, BYTES_IN_TRANS, \
     LOCK_DEFAULT, CACHE_DEFAULT, QOS_DEFAULT
 from hwtLib.handshaked.streamNode import StreamNode
+from hwtLib.mem.bramPortEndpoint import BramPortEndpoint
 from hwtLib.types.ctypes import uint32_t, uint16_t, uint64_t
 from pyMathBitPrecise.bit_utils import mask
 
+# layout of addr_gen_config.axi_attr register
+axi_attr_t = HStruct(
+    (Bits(2), "burst"),
+    (Bits(3), "size"),  # log2 of number of bytes in beat
+    (Bits(4), "cache"),
+    (Bits(4), "qos"),
+    (Bits(32 - 13), "reserved"),
+    name="axi_attr_t"
+)
+
 
 class AxiPerfTester(Unit):
     """
@@ -36,6 +55,34 @@ class AxiPerfTester(Unit):
     :see: :class:`hwtAxiPerfTester.transaction_generator.TransactionGenerator`
     The output is in format of histogram, last n values and several common properties like min/max etc.
     :see: :class:`hwtAxiPerfTester.statistic_collector.StatisticCollector`.
+    The number of outstanding transactions is sampled in every clock cycle and stored as histogram and max value.
+    :see: :class:`hwtAxiPerfTester.occupancy_collector.OccupancyCollector`
+    The distance between the completion and issue order of transactions is stored as histogram and number of reordered transactions.
+    :see: :class:`hwtAxiPerfTester.reorder_collector.ReorderCollector`
+    If HAS_BANDWIDTH_STATS is set the number of data beats in windows of a programmable number of clock cycles
+    is stored as histogram and min/max value.
+    :see: :class:`hwtAxiPerfTester.bandwidth_collector.BandwidthCollector`
+    The last values may be frozen around the first latency larger than a threshold (stats.trigger_*).
+    If HAS_FIRST_BEAT_STATS is set the access latency (address to the first data beat) is collected separately
+    from the latency to the last beat (first_beat_stats).
+    If TOP_K_ITEMS > 0 the largest latencies are stored together with address, id and completion time of the transaction.
+    If HAS_TRACE_REPLAY is set the transactions may be also replayed from a trace in memory
+    which is read using a separate AXI master trace_axi (control.trace_en selects the trace instead of the generators).
+    :see: :class:`hwtAxiPerfTester.trace_reader.TraceReader`
+    If RAW_HISTORY_ITEMS > 0 the addresses of the last write transactions are stored and the read channel may use them
+    as a source of addresses (:attr:`TransactionGenerator.MODE.READ_AFTER_WRITE`, the lag is set in conflict.raw_lag).
+    The latency of read transactions which conflict with the stored write transactions (conflict.conflict_mask)
+    is collected separately (conflict.stats).
+    :see: :class:`hwtAxiPerfTester.write_addr_history.WriteAddrHistory`
+    If PORT_CNT > 1 the axi is a list of AXI masters, each with its own read and write channel
+    (r, w for the port 0, r1, w1 for the port 1, ...). All ports share the cfg address space, the global time
+    and the control register, the trace replay and the read-after-write traffic are available only on the port 0.
+    The config of each channel is then decoded by its own endpoint behind the main cfg decoder,
+    the layout of the address space is the same as for a single port.
+    If HAS_CFG_CLK is set the cfg bus is in a separate clock domain (cfg_clk, cfg_rst_n) and its transactions
+    are passed to the clock domain of the AXI masters (clk, rst_n) by a CDC buffer. The address decoder
+    and all registers stay in the clock domain of AXI masters so the time and latencies are measured
+    in the clock cycles of the AXI masters.
 
 
     .. figure:: ./_static/AxiPerfTester.png
@@ -49,8 +96,22 @@ class AxiPerfTester(Unit):
         self.RW_PATTERN_ITEMS:int = Param(1024)
         self.HISTOGRAM_ITEMS:int = Param(32)
         self.LAST_VALUES_ITEMS = Param(4096)
+        # number of the largest latencies stored with the address, id and completion time of the transaction
+        self.TOP_K_ITEMS:int = Param(0)
+        # if True the time to the first data beat of the transaction is also collected
+        # (AR -> first R beat, AW -> first W beat) in a separate statistic collector
+        self.HAS_FIRST_BEAT_STATS:bool = Param(False)
+        # if True the number of data beats in a programmable window of clock cycles is collected
+        self.HAS_BANDWIDTH_STATS:bool = Param(False)
+
+        # frequency of clk (the clock of the AXI masters and of all generators and statistic collectors)
+        self.FREQ:int = Param(int(100e6))
 
         # cfg bus config
+        # if True the cfg bus has its own clock and reset (cfg_clk, cfg_rst_n)
+        self.HAS_CFG_CLK:bool = Param(False)
+        # frequency of cfg_clk (used only if HAS_CFG_CLK)
+        self.CFG_FREQ:int = Param(int(100e6))
         self.CFG_ADDR_WIDTH:int = Param(32)
         self.CFG_DATA_WIDTH:int = Param(32)
         # self.CFG_BUS:Tuple[Type, Type] = Param((Mi32, Mi32Endpoint))
@@ -58,59 +119,213 @@ class AxiPerfTester(Unit):
 
         # axi config
         self.AXI_CLS:Type = Param(Axi4)
+        # number of AXI master ports, each port has its own read and write channel
+        self.PORT_CNT:int = Param(1)
         self.ID_WIDTH:int = Param(6)
         self.ADDR_WIDTH:int = Param(32)
         self.DATA_WIDTH:int = Param(512)
         self.MAX_BLOCK_DATA_WIDTH: Optional[int] = Param(None)
+        # max number of ids used in TimeDurationStorage.MODE.IN_ORDER_MULTI_ID
+        self.MULTI_ID_CNT:int = Param(4)
+        # number of address streams used in TransactionGenerator.MODE.STREAM_*
+        self.ADDR_STREAM_CNT:int = Param(4)
+        # trace replay config (:see: TraceReader)
+        self.HAS_TRACE_REPLAY:bool = Param(False)
+        self.TRACE_MAX_BURST:int = Param(16)
+        self.TRACE_PREFETCH_ITEMS:int = Param(64)
+        # number of the last write addresses used for read-after-write traffic and read/write conflict detection,
+        # 0 to disable
+        self.RAW_HISTORY_ITEMS:int = Param(0)
 
     def _declr(self) -> None:
         addClkRstn(self)
+        self.clk.FREQ = self.FREQ
         cfg = self.cfg = self.CFG_BUS[0]()
         cfg.ADDR_WIDTH = self.CFG_ADDR_WIDTH
         cfg.DATA_WIDTH = self.CFG_DATA_WIDTH
-
+        if self.HAS_CFG_CLK:
+            self.cfg_clk = Clk()
+            self.cfg_clk.FREQ = self.CFG_FREQ
+            self.cfg_rst_n = Rst_n()
+            self.cfg_rst_n._make_association(clk=self.cfg_clk)
+            cfg._make_association(clk=self.cfg_clk, rst=self.cfg_rst_n)
+
+        assert self.PORT_CNT >= 1, self.PORT_CNT
         with self._paramsShared():
-            self.axi = self.AXI_CLS()._m()
+            if self.PORT_CNT == 1:
+                self.axi = self.AXI_CLS()._m()
+            else:
+                self.axi = HObjList(self.AXI_CLS()._m() for _ in range(self.PORT_CNT))
+
+        if self.HAS_TRACE_REPLAY:
+            trace_axi = self.trace_axi = self.AXI_CLS()._m()
+            trace_axi.ADDR_WIDTH = self.ADDR_WIDTH
+            trace_axi.DATA_WIDTH = TraceReader.record_t.bit_length()
+            trace_axi.ID_WIDTH = 1
+
+    def _axi_ports(self) -> List[Axi4]:
+        if self.PORT_CNT == 1:
+            return [self.axi, ]
+        else:
+            return list(self.axi)
 
-    def _axi_addr_defaults(self, a: Axi4_addr):
-        a.burst(BURST_INCR)
+    def _axi_addr_defaults(self, a: Axi4_addr, axi_attr: RtlSignal):
+        """
+        :param axi_attr: register with burst type, size, cache and QoS (:see: axi_attr_t)
+        """
+        a.burst(axi_attr.burst)
         a.prot(PROT_DEFAULT)
-        a.size(BYTES_IN_TRANS(self.DATA_WIDTH // 8))
+        a.size(axi_attr.size)
 
         a.lock(LOCK_DEFAULT)
-        a.cache(CACHE_DEFAULT)
-        a.qos(QOS_DEFAULT)
+        a.cache(axi_attr.cache)
+        a.qos(axi_attr.qos)
+
+    def _axi_attr_reg(self, cfg_io: StructIntf) -> RtlSignal:
+        """
+        Register with AXI burst type, size, cache and QoS attributes for transactions of this channel,
+        the default is an incremental burst of full data width beats with default cache and QoS.
+        """
+        axi_attr = self._reg("axi_attr", HStruct(*axi_attr_t.fields[:-1]), def_val={
+            "burst": BURST_INCR,
+            "size": BYTES_IN_TRANS(self.DATA_WIDTH // 8),
+            "cache": CACHE_DEFAULT,
+            "qos": QOS_DEFAULT,
+        })
+        cfg_axi_attr = cfg_io.addr_gen_config.axi_attr
+        cfg_axi_attr_din = cfg_axi_attr.din._reinterpret_cast(axi_attr_t)
+        cfg_axi_attr_dout = cfg_axi_attr.dout.data._reinterpret_cast(axi_attr_t)
+        If(cfg_axi_attr.dout.vld,
+           axi_attr.burst(cfg_axi_attr_dout.burst),
+           axi_attr.size(cfg_axi_attr_dout.size),
+           axi_attr.cache(cfg_axi_attr_dout.cache),
+           axi_attr.qos(cfg_axi_attr_dout.qos),
+        )
+        cfg_axi_attr_din(axi_attr, exclude=[cfg_axi_attr_din.reserved])
+        cfg_axi_attr_din.reserved(0)
+        return axi_attr
+
+    def _w_strb(self, w: Axi4_w, axi_attr: RtlSignal, addr: RtlSignal, len_: RtlSignal,
+                load: RtlSignal, beat: RtlSignal):
+        """
+        Resolve write strobe for narrow transfers (size < data width),
+        the active byte lanes move with each beat unless the burst is FIXED.
+        For WRAP burst the lanes wrap at the wrap boundary (size * number of beats) if it is smaller than data width.
+
+        :param addr: address of the transaction, loaded if load=1
+        :param len_: AXI len of the transaction (number of beats - 1), loaded if load=1
+        :param beat: 1 if the actual data beat is accepted
+        """
+        DATA_BYTES = self.DATA_WIDTH // 8
+        LANE_W = log2ceil(DATA_BYTES)
+        if DATA_BYTES == 1:
+            w.strb(1)
+            return
+
+        beat_bytes = self._sig("w_beat_bytes", Bits(LANE_W + 1))
+        # (size * number of beats - 1)[LANE_W:], number of beats of WRAP burst is a power of 2
+        wrap_mask_next = self._sig("w_wrap_mask_next", Bits(LANE_W))
+        Switch(axi_attr.size).add_cases(
+            (s, [
+                beat_bytes(1 << s),
+                wrap_mask_next(len_[LANE_W:] if s == 0 else Concat(len_[LANE_W - s:], Bits(s).from_py(mask(s)))),
+            ]) for s in range(LANE_W)
+        ).Default(
+            beat_bytes(DATA_BYTES),
+            wrap_mask_next(mask(LANE_W)),
+        )
+        # index of the first byte lane of actual beat
+        lane = self._reg("w_lane", Bits(LANE_W), def_val=0)
+        # bits of lane which are incremented with each beat
+        wrap_mask = self._reg("w_wrap_mask", Bits(LANE_W), def_val=mask(LANE_W))
+        If(load,
+            # the narrow transfer is aligned to the size of the beat
+            lane(addr[LANE_W:] & ~(beat_bytes - 1)[LANE_W:]),
+            If(axi_attr.burst._eq(BURST_WRAP),
+                wrap_mask(wrap_mask_next),
+            ).Else(
+                wrap_mask(mask(LANE_W)),
+            )
+        ).Elif(beat & (axi_attr.burst != BURST_FIXED),
+            lane((lane & ~wrap_mask) | ((lane + beat_bytes[LANE_W:]) & wrap_mask)),
+        )
+        lane_end = Concat(BIT.from_py(0), lane) + beat_bytes
+        w.strb(Concat(*reversed([
+            (lane <= i) & (lane_end > i) for i in range(DATA_BYTES)
+        ])))
 
-    def add_channel(self, name:str, axi_addr: Axi4_addr, cfg_io: StructIntf,
+    def add_channel(self, name:str, axi: Axi4, axi_addr: Axi4_addr, cfg_io: StructIntf,
                     time: RtlSignal, stats_en: RtlSignal,
-                    generator_en: HandshakeSync, ordering_mode: RtlSignal):
+                    generator_en: HandshakeSync, ordering_mode: RtlSignal,
+                    trace_req: Optional[HsStructIntf]=None, trace_en: Optional[RtlSignal]=None):
+        """
+        :param axi: the AXI port with axi_addr channel (axi.ar for read channel, axi.aw for write channel)
+        :param trace_req: optional stream of transaction requests from trace, used instead of the transaction
+            generator if trace_en=1
+        """
         addr_gen = TransactionGenerator()
         trans_store = TimeDurationStorage()
-        stats = StatisticCollector()
-        stats.COUNTER_WIDTH = self.COUNTER_WIDTH
-        stats.TRANS_ID_WIDTH = self.ID_WIDTH
-        stats.HISTOGRAM_ITEMS = self.HISTOGRAM_ITEMS
-        stats.LAST_VALUES_ITEMS = self.LAST_VALUES_ITEMS
+        stats = self._stat_collector()
+        stats.TOP_K_ITEMS = self.TOP_K_ITEMS
+        occupancy_stats = OccupancyCollector()
+        occupancy_stats.OCCUPANCY_WIDTH = self.ID_WIDTH + 1
+        occupancy_stats.COUNTER_WIDTH = self.COUNTER_WIDTH
+        occupancy_stats.HISTOGRAM_ITEMS = self.HISTOGRAM_ITEMS
+        reorder_stats = ReorderCollector()
+        reorder_stats.DISTANCE_WIDTH = self.ID_WIDTH + 2
+        reorder_stats.COUNTER_WIDTH = self.COUNTER_WIDTH
+        reorder_stats.HISTOGRAM_ITEMS = self.HISTOGRAM_ITEMS
+        if self.HAS_BANDWIDTH_STATS:
+            bandwidth_stats = BandwidthCollector()
+            bandwidth_stats.COUNTER_WIDTH = self.COUNTER_WIDTH
+            bandwidth_stats.HISTOGRAM_ITEMS = self.HISTOGRAM_ITEMS
 
         self.TIME_WIDTH:int = Param(32)
 
         for ag in [addr_gen, trans_store]:
             ag.ADDR_WIDTH = self.ADDR_WIDTH
             ag.LEN_WIDTH = self.AXI_CLS.LEN_WIDTH
+        addr_gen.ADDR_STREAM_CNT = self.ADDR_STREAM_CNT
 
         trans_store.ID_WIDTH = self.ID_WIDTH
+        trans_store.MULTI_ID_CNT = self.MULTI_ID_CNT
         trans_store.TIME_WIDTH = self.COUNTER_WIDTH
+        # the read transactions may target addresses of previous write transactions
+        # and the conflicts are resolved from the address of the completed transaction
+        is_raw_reader = self.RAW_HISTORY_ITEMS > 0 and axi_addr is self._axi_ports()[0].ar
+        addr_gen.HAS_RAW_ADDR = is_raw_reader
+        trans_store.HAS_TRANS_INFO = self.TOP_K_ITEMS > 0 or is_raw_reader
+        if self.HAS_FIRST_BEAT_STATS:
+            first_beat_stats = self._stat_collector()
+            # the first beat of write transaction is resolved from the W channel directly
+            trans_store.HAS_FIRST_BEAT = axi_addr is axi.ar
 
         setattr(self, f"{name:s}_addr_gen", addr_gen)
         setattr(self, f"{name:s}_trans_store", trans_store)
         setattr(self, f"{name:s}_stats", stats)
+        setattr(self, f"{name:s}_occupancy_stats", occupancy_stats)
+        setattr(self, f"{name:s}_reorder_stats", reorder_stats)
+        if self.HAS_BANDWIDTH_STATS:
+            setattr(self, f"{name:s}_bandwidth_stats", bandwidth_stats)
+        if self.HAS_FIRST_BEAT_STATS:
+            setattr(self, f"{name:s}_first_beat_stats", first_beat_stats)
 
         addr_gen.en(generator_en)
-        trans_store.push(addr_gen.req_out)
+        if trace_req is None:
+            trans_store.push(addr_gen.req_out)
+        else:
+            If(trace_en,
+               trans_store.push(trace_req),
+               addr_gen.req_out.rd(0),
+            ).Else(
+               trans_store.push(addr_gen.req_out),
+               trace_req.rd(0),
+            )
         trans_store.mode(ordering_mode)
         trans_store.time(time)
 
-        self._axi_addr_defaults(axi_addr)
+        axi_attr = self._axi_attr_reg(cfg_io)
+        self._axi_addr_defaults(axi_addr, axi_attr)
         t_exe = trans_store.get_trans_exe
 
         axi_addr.id(t_exe.data.id)
@@ -129,16 +344,18 @@ class AxiPerfTester(Unit):
 
         # trans_store -> axi data -> stats
         complete = trans_store.mark_trans_complete
-        if axi_addr is self.axi.aw:
+        if axi_addr is axi.aw:
             data_cntr = self._reg(
                 "w_data_cntr",
                 HStruct(
                     (BIT, "vld"),
                     (Bits(self.AXI_CLS.LEN_WIDTH), "val"),
+                    (BIT, "first"),  # the first beat was not sent yet
+                    (Bits(self.COUNTER_WIDTH), "time"),  # time of the address handshake
                 ),
                 def_val={"vld": 0}
             )
-            w = self.axi.w
+            w = axi.w
             data_cntr_ld = ~data_cntr.vld | (data_cntr.val._eq(0) & w.ready)
             StreamNode(
                 [t_exe, ],
@@ -146,48 +363,190 @@ class AxiPerfTester(Unit):
             ).sync(data_cntr_ld)
 
             If(data_cntr_ld,
-               data_cntr.vld(t_exe.vld),
+               # load only if the address was accepted
+               data_cntr.vld(t_exe.vld & axi_addr.ready),
                data_cntr.val(t_exe.data.len),
+               data_cntr.first(1),
+               data_cntr.time(time),
             ).Elif(w.ready,
                data_cntr.val(data_cntr.val - 1),
+               data_cntr.first(0),
             )
-            w.strb(mask(w.strb._dtype.bit_length()))
+            self._w_strb(w, axi_attr, t_exe.data.addr, t_exe.data.len, data_cntr_ld, data_cntr.vld & w.ready)
             w.data(data_cntr.val, fit=True)
             w.last(data_cntr.val._eq(0))
             w.valid(data_cntr.vld)
+            if self.HAS_BANDWIDTH_STATS:
+                bandwidth_stats.beat(w.valid & w.ready)
 
-            b = self.axi.b
+            b = axi.b
             complete.data(b.id)
             StreamNode([b], [complete]).sync()
 
+            if self.HAS_FIRST_BEAT_STATS:
+                first_beat_stats.trans_stats.vld(data_cntr.vld & data_cntr.first & w.ready)
+                first_beat_stats.trans_stats.data(time - data_cntr.time)
+
         else:
             StreamNode(
                 [t_exe, ],
                 [axi_addr]
             ).sync()
 
-            assert axi_addr is self.axi.ar, axi_addr
-            r = self.axi.r
-            complete.vld(r.valid & r.last)
-            r.ready(complete.rd)
+            assert axi_addr is axi.ar, axi_addr
+            r = axi.r
             complete.data(r.id)
-
-        addr_gen.addr_space_io(cfg_io.addr_gen_config, exclude=[cfg_io.addr_gen_config.credit, ], fit=True)
-
+            if self.HAS_BANDWIDTH_STATS:
+                bandwidth_stats.beat(r.valid & r.ready)
+            if self.HAS_FIRST_BEAT_STATS:
+                # the data of transactions with a different id may be interleaved,
+                # 1 if a burst for this id is in progress
+                r_burst = [self._reg(f"r_burst_{i:d}", def_val=0) for i in range(2 ** self.ID_WIDTH)]
+                If(r.valid & r.ready,
+                    Switch(r.id).add_cases(
+                        (i, b(~r.last)) for i, b in enumerate(r_burst)
+                    )
+                )
+                # the beat is accepted only if the start time of the transaction is available
+                # (first_beat.rd does not depend on first_beat.vld)
+                first_beat = trans_store.mark_trans_first_beat
+                first_beat.vld(r.valid & ~Concat(*reversed(r_burst))[r.id] & complete.rd)
+                first_beat.data(r.id)
+                complete.vld(r.valid & r.last & first_beat.rd)
+                r.ready(complete.rd & (first_beat.rd | ~r.valid))
+                first_beat_stats.trans_stats.vld(trans_store.get_first_beat_stats.vld)
+                first_beat_stats.trans_stats.data(trans_store.get_first_beat_stats.data)
+            else:
+                complete.vld(r.valid & r.last)
+                r.ready(complete.rd)
+
+        ag_cfg = cfg_io.addr_gen_config
+        addr_gen.addr_space_io(ag_cfg, exclude=[
+            ag_cfg.credit, ag_cfg.rate, ag_cfg.rate_burst, ag_cfg.gap_mode, ag_cfg.gap_param,
+            ag_cfg.max_outstanding, ag_cfg.id_cnt, ag_cfg.axi_attr], fit=True)
+        trans_store.max_outstanding(ag_cfg.max_outstanding)
+        trans_store.id_cnt(ag_cfg.id_cnt)
+
+        self._connect_stat_collector(stats, cfg_io.stats, time, stats_en)
+        if self.TOP_K_ITEMS:
+            trans_stats = trans_store.get_trans_stats
+            stats.trans_stats.data(Concat(trans_store.trans_addr, trans_store.trans_id, trans_stats.data))
+            stats.trans_stats.vld(trans_stats.vld)
+            trans_stats.rd(stats.trans_stats.rd)
+            stats.top_k(cfg_io.stats.top_k)
+        else:
+            stats.trans_stats(trans_store.get_trans_stats)
+        if self.HAS_FIRST_BEAT_STATS:
+            self._connect_secondary_stat_collector(first_beat_stats, cfg_io.first_beat_stats, cfg_io.stats, time, stats_en)
+
+        occupancy_stats.en(stats_en)
+        occupancy_stats.occupancy(trans_store.outstanding)
+        occupancy_stats.histogram_keys(cfg_io.occupancy_stats.histogram_keys)
+        occupancy_stats.histogram_counters(cfg_io.occupancy_stats.histogram_counters)
+        occupancy_stats.max_val(cfg_io.occupancy_stats.max_val)
+
+        reorder_stats.en(stats_en)
+        reorder_stats.distance(trans_store.reorder_distance)
+        reorder_stats.histogram_keys(cfg_io.reorder_stats.histogram_keys)
+        reorder_stats.histogram_counters(cfg_io.reorder_stats.histogram_counters)
+        reorder_stats.reorder_cnt(cfg_io.reorder_stats.reorder_cnt)
+
+        if self.HAS_BANDWIDTH_STATS:
+            bandwidth_stats.en(stats_en)
+            bandwidth_stats.histogram_keys(cfg_io.bandwidth_stats.histogram_keys)
+            bandwidth_stats.histogram_counters(cfg_io.bandwidth_stats.histogram_counters)
+            bandwidth_stats.window(cfg_io.bandwidth_stats.window)
+            bandwidth_stats.min_val(cfg_io.bandwidth_stats.min_val)
+            bandwidth_stats.max_val(cfg_io.bandwidth_stats.max_val)
+
+    def _stat_collector(self) -> StatisticCollector:
+        stats = StatisticCollector()
+        stats.COUNTER_WIDTH = self.COUNTER_WIDTH
+        stats.TRANS_ID_WIDTH = self.ID_WIDTH
+        stats.HISTOGRAM_ITEMS = self.HISTOGRAM_ITEMS
+        stats.LAST_VALUES_ITEMS = self.LAST_VALUES_ITEMS
+        stats.ADDR_WIDTH = self.ADDR_WIDTH
+        return stats
+
+    def _connect_stat_collector(self, stats: StatisticCollector, stats_io: StructIntf,
+                                time: RtlSignal, stats_en: RtlSignal):
+        """
+        Connect everything except trans_stats and top_k
+        """
         stats.en(stats_en)
         stats.time(time)
-        stats.trans_stats(trans_store.get_trans_stats)
-        stats.histogram_keys(cfg_io.stats.histogram_keys)
-        stats.histogram_counters(cfg_io.stats.histogram_counters)
+        stats.histogram_keys(stats_io.histogram_keys)
+        stats.histogram_counters(stats_io.histogram_counters)
 
-        stats.last_values(cfg_io.stats.last_values)
+        stats.last_values(stats_io.last_values)
         stats.cntr_io(HObjList([
-            cfg_io.stats.min_val,
-            cfg_io.stats.max_val,
-            cfg_io.stats.sum_val,
-            cfg_io.stats.input_cnt,
-            cfg_io.stats.last_time,
+            stats_io.min_val,
+            stats_io.max_val,
+            stats_io.sum_val,
+            stats_io.input_cnt,
+            stats_io.last_time,
         ]), fit=True)
+        stats.warmup_cnt(stats_io.warmup_cnt)
+        stats.warmup_excluded(stats_io.warmup_excluded)
+        stats.trigger_threshold(stats_io.trigger_threshold)
+        stats.trigger_post_cnt(stats_io.trigger_post_cnt)
+        stats.triggered(stats_io.triggered)
+        stats.trigger_time(stats_io.trigger_time)
+        stats.trigger_index(stats_io.trigger_index)
+
+    def _connect_secondary_stat_collector(self, stats: StatisticCollector, stats_io: StructIntf,
+                                          main_stats_io: StructIntf, time: RtlSignal, stats_en: RtlSignal):
+        """
+        Connect everything except trans_stats, the warmup is configured together with the main statistic collector,
+        last_time and trigger are not used
+        """
+        stats.en(stats_en)
+        stats.time(time)
+        stats.histogram_keys(stats_io.histogram_keys)
+        stats.histogram_counters(stats_io.histogram_counters)
+        stats.last_values(stats_io.last_values)
+        for c_io, c in zip(stats.cntr_io, [
+                stats_io.min_val,
+                stats_io.max_val,
+                stats_io.sum_val,
+                stats_io.input_cnt]):
+            c_io(c, fit=True)
+
+        stats.warmup_cnt.dout(main_stats_io.warmup_cnt.dout)
+        stats.warmup_excluded.dout(main_stats_io.warmup_excluded.dout)
+        for c_io in [stats.cntr_io[4], stats.trigger_threshold, stats.trigger_post_cnt, stats.triggered,
+                     stats.trigger_time, stats.trigger_index]:
+            c_io.dout.vld(0)
+            c_io.dout.data(None)
+
+    def _impl_conflict(self, cfg: StructIntf, cfg_r: StructIntf, time: RtlSignal, stats_en: RtlSignal):
+        """
+        Store addresses of write transactions for the read-after-write traffic and collect the latency
+        of read transactions which conflict with the stored write transactions.
+
+        :param cfg_r: config of the read channel of the port 0
+        """
+        w_addr_history = WriteAddrHistory()
+        w_addr_history.ADDR_WIDTH = self.ADDR_WIDTH
+        w_addr_history.ITEMS = self.RAW_HISTORY_ITEMS
+        w_addr_history.COUNTER_WIDTH = self.COUNTER_WIDTH
+        self.w_addr_history = w_addr_history
+        conflict_stats = self._stat_collector()
+        self.r_conflict_stats = conflict_stats
+
+        aw = self._axi_ports()[0].aw
+        w_addr_history.push.vld(aw.valid & aw.ready)
+        w_addr_history.push.data(aw.addr)
+        w_addr_history.raw_lag(cfg.conflict.raw_lag)
+        w_addr_history.conflict_mask(cfg.conflict.conflict_mask)
+        self.r_addr_gen.raw_addr(w_addr_history.raw_addr)
+
+        trans_store = self.r_trans_store
+        w_addr_history.check_addr(trans_store.trans_addr)
+        trans_stats = trans_store.get_trans_stats
+        conflict_stats.trans_stats.vld(trans_stats.vld & trans_stats.rd & w_addr_history.conflict)
+        conflict_stats.trans_stats.data(trans_stats.data)
+        self._connect_secondary_stat_collector(conflict_stats, cfg.conflict.stats, cfg_r.stats, time, stats_en)
 
     def build_addr_decoder(self, ADDR_SPACE: HdlType):
         cfg_decoder = self.CFG_BUS[1](ADDR_SPACE)
@@ -195,10 +554,73 @@ class AxiPerfTester(Unit):
         cfg_decoder.DATA_WIDTH = self.CFG_DATA_WIDTH
 
         self.cfg_decoder = cfg_decoder
-        cfg_decoder.bus(self.cfg)
+        cfg_decoder.bus(self._cfg_in_clk_domain())
         cfg = cfg_decoder.decoded
         return cfg
 
+    def _decoder_addr_space_type(self, ADDR_SPACE: HStruct) -> HStruct:
+        """
+        :return: the address space type for the cfg bus decoder, if PORT_CNT > 1 each channel_config_t
+            is replaced by an array of words of the same size which is decoded by a separate endpoint
+            (:see: :meth:`~.decode_channels`), the layout of the address space stays the same
+        """
+        if self.PORT_CNT == 1:
+            return ADDR_SPACE
+
+        channel_names = set(self._channel_names())
+        fields = []
+        for f in ADDR_SPACE.fields:
+            t = f.dtype
+            if f.name in channel_names:
+                t = Bits(self.CFG_DATA_WIDTH)[t.bit_length() // self.CFG_DATA_WIDTH]
+            fields.append((t, f.name))
+        return HStruct(*fields)
+
+    def decode_channels(self, cfg: StructIntf, ADDR_SPACE: HStruct) -> List[StructIntf]:
+        """
+        :return: the decoded channel_config_t for each channel in the order of :meth:`~._channel_names`
+
+        :note: If PORT_CNT > 1 each channel has its own BramPortEndpoint connected to the word array
+            in the main decoder. Otherwise the read data mux of the main decoder would be too large
+            (one case for each register of each channel).
+        """
+        channel_names = self._channel_names()
+        if self.PORT_CNT == 1:
+            return [getattr(cfg, name) for name in channel_names]
+
+        channel_config_t = ADDR_SPACE.field_by_name[channel_names[0]].dtype
+        channels = []
+        for name in channel_names:
+            ch_decoder = BramPortEndpoint(channel_config_t)
+            ch_decoder.ADDR_WIDTH = log2ceil(channel_config_t.bit_length() // self.CFG_DATA_WIDTH)
+            ch_decoder.DATA_WIDTH = self.CFG_DATA_WIDTH
+            setattr(self, f"{name:s}_cfg_decoder", ch_decoder)
+            ch_decoder.bus(getattr(cfg, name))
+            channels.append(ch_decoder.decoded)
+        return channels
+
+    def _cfg_in_clk_domain(self):
+        """
+        :return: the cfg bus in the clock domain of clk (the whole transactions are passed through CDC buffer
+            if HAS_CFG_CLK so the registers are always accessed atomically from the clock domain of clk)
+        """
+        if self.HAS_CFG_CLK:
+            # the CDC register loads its output data only if the consumer is ready,
+            # the buffers on both sides of it are always ready as there is only a single cfg transaction at once
+            return AxiBuilder(self, self.cfg).buff().buff_cdc(self.clk, self.rst_n).buff().end
+        else:
+            return self.cfg
+
+    def _channel_names(self) -> List[str]:
+        """
+        :return: names of channels in the order of the address space (r, w for the port 0, r1, w1 for the port 1, ...)
+        """
+        names = []
+        for i in range(self.PORT_CNT):
+            suffix = "" if i == 0 else f"{i:d}"
+            names.extend((f"r{suffix:s}", f"w{suffix:s}"))
+        return names
+
     def construct_addr_space_type(self):
         addr_gen_config_t = HStruct(
             (uint32_t, "credit"),
@@ -212,9 +634,25 @@ class AxiPerfTester(Unit):
             (uint32_t, "trans_len_step"),
             (uint32_t, "trans_len_mask"),
             (uint32_t, "trans_len_mode"),
+            (uint32_t, "max_outstanding"),
+            (uint32_t, "id_cnt"),
+            (uint32_t, "rate"),
+            (uint32_t, "rate_burst"),
+            (uint32_t, "gap_mode"),
+            (uint32_t, "gap_param"),
+            (uint32_t, "stride_inner_step"),
+            (uint32_t, "stride_inner_cnt"),
+            (uint32_t, "stride_outer_step"),
+            (uint32_t, "stride_outer_cnt"),
+            (uint32_t, "rand_seed"),
+            (uint32_t, "rand_align_mask"),
+            (uint32_t, "axi_attr"),  # :see: axi_attr_t
+            (uint32_t[self.ADDR_STREAM_CNT], "stream_base"),
+            (uint32_t[self.ADDR_STREAM_CNT], "stream_step"),
+            (uint32_t[self.ADDR_STREAM_CNT], "stream_mask"),
             name="addr_gen_config_t",
         )
-        stat_data_t = HStruct(
+        stat_data_t = [
             (uint32_t[self.HISTOGRAM_ITEMS - 1], "histogram_keys"),
             (uint32_t[self.HISTOGRAM_ITEMS], "histogram_counters"),
             (uint32_t[self.LAST_VALUES_ITEMS], "last_values"),
@@ -223,22 +661,62 @@ class AxiPerfTester(Unit):
             (uint32_t, "sum_val"),
             (uint32_t, "input_cnt"),
             (uint32_t, "last_time"),
-            name="stat_data_t",
+            (uint32_t, "warmup_cnt"),
+            (uint32_t, "warmup_excluded"),
+            (uint32_t, "trigger_threshold"),
+            (uint32_t, "trigger_post_cnt"),
+            (uint32_t, "triggered"),
+            (uint32_t, "trigger_time"),
+            (uint32_t, "trigger_index"),
+        ]
+        # histogram_keys, histogram_counters, last_values, min_val, max_val, sum_val, input_cnt
+        first_beat_stat_data_t = HStruct(*stat_data_t[:7], name="first_beat_stat_data_t")
+        conflict_stat_data_t = HStruct(*stat_data_t[:7], name="conflict_stat_data_t")
+        if self.TOP_K_ITEMS:
+            # [latency, completion time, addr, id] for each item, sorted from the largest latency
+            stat_data_t.append((uint32_t[self.TOP_K_ITEMS * 4], "top_k"))
+        stat_data_t = HStruct(*stat_data_t, name="stat_data_t")
+        occupancy_stat_data_t = HStruct(
+            (uint32_t[self.HISTOGRAM_ITEMS - 1], "histogram_keys"),
+            (uint32_t[self.HISTOGRAM_ITEMS], "histogram_counters"),
+            (uint32_t, "max_val"),
+            name="occupancy_stat_data_t",
+        )
+        reorder_stat_data_t = HStruct(
+            (uint32_t[self.HISTOGRAM_ITEMS - 1], "histogram_keys"),
+            (uint32_t[self.HISTOGRAM_ITEMS], "histogram_counters"),
+            (uint32_t, "reorder_cnt"),
+            name="reorder_stat_data_t",
         )
-        channel_config_t = HStruct(
+        bandwidth_stat_data_t = HStruct(
+            (uint32_t[self.HISTOGRAM_ITEMS - 1], "histogram_keys"),
+            (uint32_t[self.HISTOGRAM_ITEMS], "histogram_counters"),
+            (uint32_t, "window"),
+            (uint32_t, "min_val"),
+            (uint32_t, "max_val"),
+            name="bandwidth_stat_data_t",
+        )
+        channel_config_t = [
             (uint32_t[self.RW_PATTERN_ITEMS * 2], "pattern"),
             (uint32_t, "dispatched_cntr"),
             (addr_gen_config_t, "addr_gen_config"),
             (stat_data_t, "stats"),
-            name="channel_config_t"
-        )
+            (occupancy_stat_data_t, "occupancy_stats"),
+            (reorder_stat_data_t, "reorder_stats"),
+        ]
+        if self.HAS_BANDWIDTH_STATS:
+            channel_config_t.append((bandwidth_stat_data_t, "bandwidth_stats"))
+        if self.HAS_FIRST_BEAT_STATS:
+            channel_config_t.append((first_beat_stat_data_t, "first_beat_stats"))
+        channel_config_t = HStruct(*channel_config_t, name="channel_config_t")
         control_t = HStruct(
             (BIT, "time_en"),
-            (BIT, "rw_mode"),
+            (Bits(2), "rw_mode"),
             (BIT, "generator_en"),
-            (BIT, "r_ordering_mode"),
-            (BIT, "w_ordering_mode"),
-            (Bits(32 - 5), "reserved"),
+            (Bits(2), "r_ordering_mode"),
+            (Bits(2), "w_ordering_mode"),
+            (BIT, "trace_en"),
+            (Bits(32 - 9), "reserved"),
             name="control_t"
         )
         serialized_config_t = HStruct(
@@ -249,37 +727,69 @@ class AxiPerfTester(Unit):
             (uint16_t, "ID_WIDTH"),
             (uint16_t, "ADDR_WIDTH"),
             (uint16_t, "DATA_WIDTH"),
-            (uint16_t, None),
+            (uint16_t, "MULTI_ID_CNT"),
+            (uint16_t, "ADDR_STREAM_CNT"),
+            (uint16_t, "HAS_TRACE_REPLAY"),
+            (uint16_t, "TOP_K_ITEMS"),
+            (uint16_t, "HAS_FIRST_BEAT_STATS"),
+            (uint16_t, "HAS_BANDWIDTH_STATS"),
+            (uint16_t, "RAW_HISTORY_ITEMS"),
+            (uint16_t, "PORT_CNT"),
+            (uint16_t, "serialized_config_reserved"),
             name="serialized_config_t"
         )
-        ADDR_SPACE = HStruct(
+        ADDR_SPACE = [
             (uint32_t, "id"),  # "TEST"
             (uint32_t, "control"),  # :see: control_t
             (uint32_t, "time"),  # global time in this component
+            (uint32_t, "duration"),  # time limit for RWPatternGenerator.MODE.DURATION
             (serialized_config_t, "serialized_config"),
-            (channel_config_t, "r"),
-            (channel_config_t, "w"),
-        )
+        ]
+        for name in self._channel_names():
+            ADDR_SPACE.append((channel_config_t, name))
+        if self.HAS_TRACE_REPLAY:
+            trace_config_t = HStruct(
+                (uint32_t, "base"),  # address of the first record of the trace
+                (uint32_t, "items"),  # number of records in the trace
+                name="trace_config_t"
+            )
+            ADDR_SPACE.append((trace_config_t, "trace"))
+        if self.RAW_HISTORY_ITEMS:
+            conflict_config_t = HStruct(
+                # 0 disables read after write, 1 the read targets the last write transaction, 2 the one before, ...
+                (uint32_t, "raw_lag"),
+                (uint32_t, "conflict_mask"),  # address bits compared to resolve the read/write conflict
+                (conflict_stat_data_t, "stats"),  # latency of conflicting read transactions
+                name="conflict_config_t"
+            )
+            ADDR_SPACE.append((conflict_config_t, "conflict"))
+        ADDR_SPACE = HStruct(*ADDR_SPACE)
         return  ADDR_SPACE, control_t
 
     def _impl(self) -> None:
         ADDR_SPACE, control_t = self.construct_addr_space_type()
         # print(ADDR_SPACE)
-        cfg = self.build_addr_decoder(ADDR_SPACE)
+        cfg = self.build_addr_decoder(self._decoder_addr_space_type(ADDR_SPACE))
+        cfg_channels = self.decode_channels(cfg, ADDR_SPACE)
         cfg.id.din(int.from_bytes("TEST".encode(), "big"))
         for sc in cfg.serialized_config._interfaces:
-            sc.din(getattr(self, sc._name))
+            if sc._name == "serialized_config_reserved":
+                sc.din(0)
+            else:
+                sc.din(int(getattr(self, sc._name)))
 
         cntrl = self._reg("cntrl", HStruct(
             (BIT, "time_en"),
-            (BIT, "rw_mode"),
-            (BIT, "r_ordering_mode"),
-            (BIT, "w_ordering_mode"),
+            (Bits(2), "rw_mode"),
+            (Bits(2), "r_ordering_mode"),
+            (Bits(2), "w_ordering_mode"),
+            (BIT, "trace_en"),
         ), def_val={
             "time_en":0,
             "rw_mode": RWPatternGenerator.MODE.SYNC,
             "r_ordering_mode": TimeDurationStorage.MODE.IN_ORDER,
             "w_ordering_mode": TimeDurationStorage.MODE.IN_ORDER,
+            "trace_en": 0,
         })
 
         time = self._reg("time", Bits(self.COUNTER_WIDTH))
@@ -291,34 +801,90 @@ class AxiPerfTester(Unit):
         )
         cfg.time.din(time)
 
-        rw_pat = RWPatternGenerator()
-        rw_pat.MAX_BLOCK_DATA_WIDTH = self.MAX_BLOCK_DATA_WIDTH
-        rw_pat.ADDR_WIDTH = self.ADDR_WIDTH
-        rw_pat.ITEMS = self.RW_PATTERN_ITEMS
-        rw_pat.COUNTER_WIDTH = self.COUNTER_WIDTH
-        self.rw_pattern_gen = rw_pat
-        rw_pat.r_pattern(cfg.r.pattern, fit=True)
-        rw_pat.w_pattern(cfg.w.pattern, fit=True)
-        rw_pat.mode(cntrl.rw_mode)
-
         cfg_control_din = cfg.control.din._reinterpret_cast(control_t)
         cfg_control_dout = cfg.control.dout.data._reinterpret_cast(control_t)
-        self.add_channel("r", self.axi.ar, cfg.r, time, cntrl.time_en, rw_pat.r_en, cntrl.r_ordering_mode)
-        rw_pat.r_credit(cfg.r.addr_gen_config.credit)
-        self.add_channel("w", self.axi.aw, cfg.w, time, cntrl.time_en, rw_pat.w_en, cntrl.w_ordering_mode)
-        rw_pat.w_credit(cfg.w.addr_gen_config.credit)
+        if self.HAS_TRACE_REPLAY:
+            trace = TraceReader()
+            trace.ADDR_WIDTH = self.ADDR_WIDTH
+            trace.LEN_WIDTH = self.AXI_CLS.LEN_WIDTH
+            trace.COUNTER_WIDTH = self.COUNTER_WIDTH
+            trace.AXI_CLS = self.AXI_CLS
+            trace.MAX_BURST = self.TRACE_MAX_BURST
+            trace.PREFETCH_ITEMS = self.TRACE_PREFETCH_ITEMS
+            self.trace_reader = trace
+            self.trace_axi(trace.axi)
+            trace.base(cfg.trace.base)
+            trace.items(cfg.trace.items)
+            trace_reqs = (trace.r_req, trace.w_req)
+        else:
+            trace_reqs = (None, None)
+
+        rw_pats = []
+        channel_names = self._channel_names()
+        for port_i, axi in enumerate(self._axi_ports()):
+            r_name, w_name = channel_names[port_i * 2:(port_i + 1) * 2]
+            cfg_r, cfg_w = cfg_channels[port_i * 2:(port_i + 1) * 2]
+            rw_pat = RWPatternGenerator()
+            rw_pat.MAX_BLOCK_DATA_WIDTH = self.MAX_BLOCK_DATA_WIDTH
+            rw_pat.ADDR_WIDTH = self.ADDR_WIDTH
+            rw_pat.ITEMS = self.RW_PATTERN_ITEMS
+            rw_pat.COUNTER_WIDTH = self.COUNTER_WIDTH
+            setattr(self, "rw_pattern_gen" if port_i == 0 else f"rw_pattern_gen{port_i:d}", rw_pat)
+            rw_pats.append(rw_pat)
+            rw_pat.r_pattern(cfg_r.pattern, fit=True)
+            rw_pat.w_pattern(cfg_w.pattern, fit=True)
+            rw_pat.mode(cntrl.rw_mode)
+            rw_pat.time(time)
+            if port_i == 0:
+                rw_pat.duration(cfg.duration)
+            else:
+                # the register of the port 0 is read back
+                rw_pat.duration.dout(cfg.duration.dout)
+
+            # the trace is replayed only on the port 0
+            r_trace_req, w_trace_req = trace_reqs if port_i == 0 else (None, None)
+            self.add_channel(r_name, axi, axi.ar, cfg_r, time, cntrl.time_en, rw_pat.r_en, cntrl.r_ordering_mode,
+                             r_trace_req, cntrl.trace_en)
+            rw_pat.r_credit(cfg_r.addr_gen_config.credit)
+            rw_pat.r_rate(cfg_r.addr_gen_config.rate)
+            rw_pat.r_rate_burst(cfg_r.addr_gen_config.rate_burst)
+            rw_pat.r_gap_mode(cfg_r.addr_gen_config.gap_mode, fit=True)
+            rw_pat.r_gap_param(cfg_r.addr_gen_config.gap_param)
+            self.add_channel(w_name, axi, axi.aw, cfg_w, time, cntrl.time_en, rw_pat.w_en, cntrl.w_ordering_mode,
+                             w_trace_req, cntrl.trace_en)
+            rw_pat.w_credit(cfg_w.addr_gen_config.credit)
+            rw_pat.w_rate(cfg_w.addr_gen_config.rate)
+            rw_pat.w_rate_burst(cfg_w.addr_gen_config.rate_burst)
+            rw_pat.w_gap_mode(cfg_w.addr_gen_config.gap_mode, fit=True)
+            rw_pat.w_gap_param(cfg_w.addr_gen_config.gap_param)
+
+        if self.RAW_HISTORY_ITEMS:
+            self._impl_conflict(cfg, cfg_channels[0], time, cntrl.time_en)
 
         If(cfg.control.dout.vld,
            cntrl.time_en(cfg_control_dout.time_en),
            cntrl.rw_mode(cfg_control_dout.rw_mode),
            cntrl.r_ordering_mode(cfg_control_dout.r_ordering_mode),
            cntrl.w_ordering_mode(cfg_control_dout.w_ordering_mode),
+           cntrl.trace_en(cfg_control_dout.trace_en if self.HAS_TRACE_REPLAY else 0),
         )
-        rw_pat.en.dout.vld(cfg.control.dout.vld)
-        rw_pat.en.dout.data(cfg_control_dout.generator_en)
         cfg_control_din(cntrl, exclude=[cfg_control_din.generator_en, cfg_control_din.reserved])
-        cfg_control_din.generator_en(rw_pat.en.din)
         cfg_control_din.reserved(0)
+        # all generators are started and stopped together, generator_en=1 if any of them is running
+        generator_en = Or(*(rw_pat.en.din for rw_pat in rw_pats))
+        for rw_pat in rw_pats:
+            rw_pat.en.dout.data(cfg_control_dout.generator_en)
+        if self.HAS_TRACE_REPLAY:
+            # start only the selected source, stop both
+            for rw_pat in rw_pats:
+                rw_pat.en.dout.vld(cfg.control.dout.vld & (~cfg_control_dout.trace_en | ~cfg_control_dout.generator_en))
+            trace.en.dout.vld(cfg.control.dout.vld & (cfg_control_dout.trace_en | ~cfg_control_dout.generator_en))
+            trace.en.dout.data(cfg_control_dout.generator_en)
+            cfg_control_din.generator_en(generator_en | trace.en.din)
+        else:
+            for rw_pat in rw_pats:
+                rw_pat.en.dout.vld(cfg.control.dout.vld)
+            cfg_control_din.generator_en(generator_en)
 
         propagateClkRstn(self)
 
@@ -5,6 +5,7 @@ from typing import Tuple, Type
 
 from hwt.hdl.types.hdlType import HdlType
 from hwtAxiPerfTester.axi_perf_tester import AxiPerfTester
+from hwtLib.amba.axi4Lite import Axi4Lite
 from hwtLib.cesnet.mi32.builder import Mi32Builder
 from hwtLib.cesnet.mi32.endpoint import Mi32Endpoint
 from hwtLib.cesnet.mi32.intf import Mi32
@@ -22,10 +23,18 @@ class AxiPerfTesterMi32(AxiPerfTester):
         cfg_decoder.DATA_WIDTH = self.CFG_DATA_WIDTH
 
         self.cfg_decoder = cfg_decoder
-        cfg_decoder.bus(Mi32Builder(self, self.cfg).buff(1, 1).end)
+        cfg_decoder.bus(Mi32Builder(self, self._cfg_in_clk_domain()).buff(1, 1).end)
         cfg = cfg_decoder.decoded
         return cfg
 
+    def _cfg_in_clk_domain(self):
+        if self.HAS_CFG_CLK:
+            # there is no CDC buffer for Mi32, the AXI4-Lite one is used instead (:see: AxiPerfTester._cfg_in_clk_domain)
+            cdc = Mi32Builder(self, self.cfg).to_axi(Axi4Lite).buff().buff_cdc(self.clk, self.rst_n).buff()
+            return Mi32Builder.from_axi(self, cdc.end).end
+        else:
+            return self.cfg
+
 
 if __name__ == "__main__":
     from hwt.synthesizer.utils import to_rtl_str
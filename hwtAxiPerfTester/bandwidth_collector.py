@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from hwt.code import If
+from hwt.hdl.types.bits import Bits
+from hwt.interfaces.std import Signal, BramPort_withoutClk, RegCntrl
+from hwt.interfaces.utils import addClkRstn, propagateClkRstn
+from hwt.math import log2ceil, hMin, hMax
+from hwt.serializer.mode import serializeParamsUniq
+from hwt.synthesizer.param import Param
+from hwt.synthesizer.unit import Unit
+from hwtAxiPerfTester.histogram import HistogramDynamic
+
+
+@serializeParamsUniq
+class BandwidthCollector(Unit):
+    """
+    This component counts data beats in windows of a programmable number of clock cycles (when enabled).
+    It stores a histogram of the number of beats per window and the minimum and maximum of this value.
+    The window is disabled if its size is 0, an incomplete window at the end is not stored.
+
+    .. hwt-autodoc::
+    """
+
+    def _config(self) -> None:
+        self.COUNTER_WIDTH:int = Param(32)
+        self.HISTOGRAM_ITEMS:int = Param(32)
+
+    def _declr(self) -> None:
+        addClkRstn(self)
+        self.en = Signal()
+        # 1 if there is a data beat in this clock cycle
+        self.beat = Signal()
+
+        k = self.histogram_keys = BramPort_withoutClk()
+        c = self.histogram_counters = BramPort_withoutClk()
+        k.ADDR_WIDTH = c.ADDR_WIDTH = log2ceil(self.HISTOGRAM_ITEMS - 1)
+        c.DATA_WIDTH = k.DATA_WIDTH = self.COUNTER_WIDTH
+
+        # size of window in clock cycles
+        self.window = RegCntrl()
+        self.min_val = RegCntrl()
+        self.max_val = RegCntrl()
+        for r in [self.window, self.min_val, self.max_val]:
+            r.DATA_WIDTH = self.COUNTER_WIDTH
+
+    def _impl(self) -> None:
+        histogram = HistogramDynamic()
+        histogram.VALUE_WIDTH = self.COUNTER_WIDTH
+        histogram.COUNTER_WIDTH = self.COUNTER_WIDTH
+        histogram.ITEMS = self.HISTOGRAM_ITEMS
+        self.histogram = histogram
+        histogram.keys(self.histogram_keys)
+        histogram.counters(self.histogram_counters)
+
+        cntr_t = Bits(self.COUNTER_WIDTH)
+        window, min_val, max_val = [
+            self._reg(n, cntr_t, def_val=0)
+            for n in ["window", "min_val", "max_val"]]
+        # clock cycles and beats in actual window
+        cycle_cnt = self._reg("cycle_cnt", cntr_t, def_val=0)
+        beat_cnt = self._reg("beat_cnt", cntr_t, def_val=0)
+
+        en = self.en & (window != 0)
+        window_end = en & cycle_cnt._eq(window - 1)
+        # beats in actual window including this clock cycle
+        beats = self._sig("beats", cntr_t)
+        If(self.beat,
+           beats(beat_cnt + 1),
+        ).Else(
+           beats(beat_cnt),
+        )
+        histogram.data_in.vld(window_end)
+        histogram.data_in.data(beats)
+
+        If(self.window.dout.vld,
+           window(self.window.dout.data),
+           cycle_cnt(0),
+           beat_cnt(0),
+        ).Elif(window_end,
+           cycle_cnt(0),
+           beat_cnt(0),
+        ).Elif(en,
+           cycle_cnt(cycle_cnt + 1),
+           beat_cnt(beats),
+        )
+
+        If(self.min_val.dout.vld,
+           min_val(self.min_val.dout.data),
+        ).Elif(window_end,
+           min_val(hMin(min_val, beats)),
+        )
+        If(self.max_val.dout.vld,
+           max_val(self.max_val.dout.data),
+        ).Elif(window_end,
+           max_val(hMax(max_val, beats)),
+        )
+        for c_io, c in [(self.window, window), (self.min_val, min_val), (self.max_val, max_val)]:
+            c_io.din(c)
+
+        propagateClkRstn(self)
+
+
+if __name__ == "__main__":
+    from hwt.synthesizer.utils import to_rtl_str
+    u = BandwidthCollector()
+    print(to_rtl_str(u))
@@ -13,6 +13,31 @@ from hwt.synthesizer.rtlLevel.rtlSyncSignal import RtlSyncSignal
 from hwt.synthesizer.unit import Unit
 
 
+def drive_reg_array_from_bramport(bram_port: BramPort_withoutClk, reg_array: List[RtlSyncSignal]):
+    """
+    Connect an array of registers to a BRAM port (read without latency, write on en & we)
+
+    :return: tuple (read Switch statement, write If statement), the write statement can be extended
+        with an Else branch to update the registers if they are not written
+    """
+    read_driver = \
+    Switch(bram_port.addr)\
+    .add_cases(
+        ((i, bram_port.dout(k)) for i, k in enumerate(reg_array)),
+    ).Default(
+        bram_port.dout(None),
+    )
+
+    write_driver = \
+    If(bram_port.en & bram_port.we,
+       Switch(bram_port.addr)\
+       .add_cases(
+           ((i, k(bram_port.din)) for i, k in enumerate(reg_array))
+       )
+    )
+    return read_driver, write_driver
+
+
 @serializeParamsUniq
 class HistogramDynamic(Unit):
     """
@@ -37,24 +62,6 @@ class HistogramDynamic(Unit):
         k.DATA_WIDTH = self.VALUE_WIDTH
         c.DATA_WIDTH = self.COUNTER_WIDTH
 
-    def drive_reg_array_from_bramport(self, bram_port, reg_array):
-        read_driver = \
-        Switch(bram_port.addr)\
-        .add_cases(
-            ((i, bram_port.dout(k)) for i, k in enumerate(reg_array)),
-        ).Default(
-            bram_port.dout(None),
-        )
-
-        write_driver = \
-        If(bram_port.en & bram_port.we,
-           Switch(bram_port.addr)\
-           .add_cases(
-               ((i, k(bram_port.din)) for i, k in enumerate(reg_array))
-           )
-        )
-        return read_driver, write_driver
-
     def _cntr_tick_expr(self, keys: List[RtlSyncSignal], i: int):
         din = self.data_in
         last = self.ITEMS - 1
@@ -71,12 +78,12 @@ class HistogramDynamic(Unit):
         key_io = self.keys
         key_t = key_io.din._dtype
         keys = [self._reg(f"key_{i:d}_{i+1:d}", key_t) for i in range(self.ITEMS - 1)]
-        self.drive_reg_array_from_bramport(key_io, keys)
+        drive_reg_array_from_bramport(key_io, keys)
 
         c_io = self.counters
         cntr_t = c_io.din._dtype
         cntr = [self._reg(f"cntr_{i:d}", cntr_t) for i in range(self.ITEMS)]
-        _, counter_write = self.drive_reg_array_from_bramport(c_io, cntr)
+        _, counter_write = drive_reg_array_from_bramport(c_io, cntr)
         counter_write.Else(
             If(self._cntr_tick_expr(keys, i),
                cntr[i](cntr[i] + 1)
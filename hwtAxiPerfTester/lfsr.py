@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from hwt.code import If
+from hwt.hdl.types.bits import Bits
+from hwt.interfaces.std import Signal, VldSynced
+from hwt.interfaces.utils import addClkRstn
+from hwt.serializer.mode import serializeParamsUniq
+from hwt.synthesizer.param import Param
+from hwt.synthesizer.unit import Unit
+from pyMathBitPrecise.bit_utils import mask
+
+
+def xorshift_next(state: int, width: int) -> int:
+    """
+    Python reference of the :class:`~.Xorshift` step
+
+    :return: next state of the generator
+    """
+    a, b, c = Xorshift.SHIFTS[width]
+    m = mask(width)
+    state ^= (state << a) & m
+    state ^= state >> b
+    state ^= (state << c) & m
+    return state
+
+
+def xorshift_width(width: int) -> int:
+    """
+    :return: width of the :class:`~.Xorshift` generator (32 or 64) which covers random numbers of width bits
+        (the random number is the lower part of the generator state)
+    """
+    for w in (32, 64):
+        if width <= w:
+            return w
+    raise ValueError("Random numbers wider than 64b are not supported", width)
+
+
+@serializeParamsUniq
+class Xorshift(Unit):
+    """
+    Xorshift pseudorandom generator (Marsaglia) which produces a new WIDTH bit number in every clock cycle when en=1.
+    The sequence has maximal length (2**WIDTH - 1, all non-zero values), the consecutive values
+    are not just shifted versions of each other and all bits of the output are uniformly distributed.
+
+    :note: The state must not be 0 (the generator would stay in 0)
+    :see: :func:`~.xorshift_next`
+
+    .. hwt-autodoc::
+    """
+    # shift triplets (left, right, left) for maximal-length sequence
+    SHIFTS = {
+        16: (7, 9, 8),
+        32: (13, 17, 5),
+        64: (13, 7, 17),
+    }
+
+    def _config(self) -> None:
+        self.WIDTH = Param(32)
+        self.INIT = Param(1)
+
+    def _declr(self) -> None:
+        addClkRstn(self)
+        self.en = Signal()
+        # load new state, has priority over en
+        self.seed = VldSynced()
+        self.seed.DATA_WIDTH = self.WIDTH
+        self.dataOut = Signal(Bits(self.WIDTH))._m()
+
+    def _impl(self) -> None:
+        assert self.INIT != 0, self.INIT
+        a, b, c = self.SHIFTS[self.WIDTH]
+        state = self._reg("state", Bits(self.WIDTH), def_val=self.INIT)
+        s0 = state ^ (state << a)
+        s1 = s0 ^ (s0 >> b)
+        s2 = s1 ^ (s1 << c)
+
+        If(self.seed.vld,
+           state(self.seed.data),
+        ).Elif(self.en,
+           state(s2),
+        )
+        self.dataOut(state)
+
+
+if __name__ == "__main__":
+    from hwt.synthesizer.utils import to_rtl_str
+    u = Xorshift()
+    print(to_rtl_str(u))
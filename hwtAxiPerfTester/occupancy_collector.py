@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from hwt.code import If
+from hwt.hdl.types.bits import Bits
+from hwt.interfaces.std import Signal, BramPort_withoutClk, RegCntrl
+from hwt.interfaces.utils import addClkRstn, propagateClkRstn
+from hwt.math import log2ceil
+from hwt.serializer.mode import serializeParamsUniq
+from hwt.synthesizer.param import Param
+from hwt.synthesizer.unit import Unit
+from hwtAxiPerfTester.histogram import HistogramDynamic
+
+
+@serializeParamsUniq
+class OccupancyCollector(Unit):
+    """
+    This component samples the number of outstanding transactions in every clock cycle (when enabled).
+    It stores a histogram of the samples and the maximum sampled value.
+
+    .. hwt-autodoc::
+    """
+
+    def _config(self) -> None:
+        self.OCCUPANCY_WIDTH:int = Param(7)
+        self.COUNTER_WIDTH:int = Param(32)
+        self.HISTOGRAM_ITEMS:int = Param(32)
+
+    def _declr(self) -> None:
+        addClkRstn(self)
+        self.en = Signal()
+        self.occupancy = Signal(Bits(self.OCCUPANCY_WIDTH))
+
+        k = self.histogram_keys = BramPort_withoutClk()
+        c = self.histogram_counters = BramPort_withoutClk()
+        k.ADDR_WIDTH = c.ADDR_WIDTH = log2ceil(self.HISTOGRAM_ITEMS - 1)
+        c.DATA_WIDTH = k.DATA_WIDTH = self.COUNTER_WIDTH
+
+        self.max_val = RegCntrl()
+        self.max_val.DATA_WIDTH = self.COUNTER_WIDTH
+
+    def _impl(self) -> None:
+        histogram = HistogramDynamic()
+        histogram.VALUE_WIDTH = self.OCCUPANCY_WIDTH
+        histogram.COUNTER_WIDTH = self.COUNTER_WIDTH
+        histogram.ITEMS = self.HISTOGRAM_ITEMS
+
+        self.histogram = histogram
+        histogram.keys(self.histogram_keys, fit=True)
+        histogram.counters(self.histogram_counters)
+        histogram.data_in.vld(self.en)
+        histogram.data_in.data(self.occupancy)
+
+        max_val = self._reg("max_val", Bits(self.OCCUPANCY_WIDTH))
+        self.max_val.din(max_val, fit=True)
+        If(self.max_val.dout.vld,
+           max_val(self.max_val.dout.data, fit=True),
+        ).Elif(self.en & (self.occupancy > max_val),
+           max_val(self.occupancy),
+        )
+
+        propagateClkRstn(self)
+
+
+if __name__ == "__main__":
+    from hwt.synthesizer.utils import to_rtl_str
+    u = OccupancyCollector()
+    print(to_rtl_str(u))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from hwt.code import If, Concat
+from hwt.hdl.types.bits import Bits
+from hwt.interfaces.std import Signal, BramPort_withoutClk, RegCntrl, \
+    VldSynced
+from hwt.interfaces.utils import addClkRstn, propagateClkRstn
+from hwt.math import log2ceil
+from hwt.serializer.mode import serializeParamsUniq
+from hwt.synthesizer.param import Param
+from hwt.synthesizer.unit import Unit
+from hwtAxiPerfTester.histogram import HistogramDynamic
+
+
+@serializeParamsUniq
+class ReorderCollector(Unit):
+    """
+    This component collects the reorder distance of completed transactions
+    (completion index - issue index, two's complement).
+    It stores a histogram of distances and the number of transactions with non-zero distance (reorder_cnt).
+
+    :note: The histogram compares values with signed->unsigned bias applied (MSB inverted)
+        and the keys have to be written in this format as well.
+
+    .. hwt-autodoc::
+    """
+
+    def _config(self) -> None:
+        self.DISTANCE_WIDTH:int = Param(8)
+        self.COUNTER_WIDTH:int = Param(32)
+        self.HISTOGRAM_ITEMS:int = Param(32)
+
+    def _declr(self) -> None:
+        addClkRstn(self)
+        self.en = Signal()
+        self.distance = VldSynced()
+        self.distance.DATA_WIDTH = self.DISTANCE_WIDTH
+
+        k = self.histogram_keys = BramPort_withoutClk()
+        c = self.histogram_counters = BramPort_withoutClk()
+        k.ADDR_WIDTH = c.ADDR_WIDTH = log2ceil(self.HISTOGRAM_ITEMS - 1)
+        c.DATA_WIDTH = k.DATA_WIDTH = self.COUNTER_WIDTH
+
+        self.reorder_cnt = RegCntrl()
+        self.reorder_cnt.DATA_WIDTH = self.COUNTER_WIDTH
+
+    def _impl(self) -> None:
+        histogram = HistogramDynamic()
+        histogram.VALUE_WIDTH = self.DISTANCE_WIDTH
+        histogram.COUNTER_WIDTH = self.COUNTER_WIDTH
+        histogram.ITEMS = self.HISTOGRAM_ITEMS
+
+        self.histogram = histogram
+        histogram.keys(self.histogram_keys, fit=True)
+        histogram.counters(self.histogram_counters)
+        d = self.distance
+        en = d.vld & self.en
+        histogram.data_in.vld(en)
+        msb = self.DISTANCE_WIDTH - 1
+        histogram.data_in.data(Concat(~d.data[msb], d.data[msb:]))
+
+        reorder_cnt = self._reg("reorder_cnt", Bits(self.COUNTER_WIDTH))
+        self.reorder_cnt.din(reorder_cnt)
+        If(self.reorder_cnt.dout.vld,
+           reorder_cnt(self.reorder_cnt.dout.data),
+        ).Elif(en & (d.data != 0),
+           reorder_cnt(reorder_cnt + 1),
+        )
+
+        propagateClkRstn(self)
+
+
+if __name__ == "__main__":
+    from hwt.synthesizer.utils import to_rtl_str
+    u = ReorderCollector()
+    print(to_rtl_str(u))
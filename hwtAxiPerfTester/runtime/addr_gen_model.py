@@ -0,0 +1,25 @@
+from typing import List
+
+from hwtAxiPerfTester.lfsr import xorshift_next, xorshift_width
+from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterAddrGenConfig
+from pyMathBitPrecise.bit_utils import mask
+
+
+def random_addr_sequence(addr_gen: AxiPerfTesterAddrGenConfig, n: int, addr_width=32) -> List[int]:
+    """
+    Python reference of the addresses generated by :class:`hwtAxiPerfTester.transaction_generator.TransactionGenerator`
+    in :attr:`TransactionGenerator.MODE.RANDOM` address mode
+
+    :param n: number of addresses to generate
+    :return: list of first n addresses after the configuration was applied
+    """
+    state = addr_gen.rand_seed & mask(addr_width)
+    if state == 0:
+        state = 1
+    rnd_width = xorshift_width(addr_width)
+    m = addr_gen.addr_mask & ~addr_gen.rand_align_mask & mask(addr_width)
+    res = []
+    for _ in range(n):
+        res.append(((state & m) + addr_gen.addr_offset) & mask(addr_width))
+        state = xorshift_next(state, rnd_width)
+    return res
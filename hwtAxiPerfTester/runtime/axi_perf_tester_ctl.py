@@ -1,13 +1,20 @@
 
+from copy import deepcopy
 import struct
 import time
-from typing import List
+from typing import List, Dict, Optional, Tuple
 
 from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterTestJob, \
     AxiPerfTesterChannelConfig, AxiPerfTesterTestChannelReport, \
-    AxiPerfTesterTestReport
+    AxiPerfTesterTestReport, AxiPerfTesterStatConfig, AxiPerfTesterAddrGenConfig
+from hwtAxiPerfTester.runtime.dram_mapping import DramAddrLayout, dram_mapping_jobs
+from hwtAxiPerfTester.runtime.histogram_keys import HISTOGRAM_KEY_SPACING, \
+    auto_histogram_keys, linear_histogram_keys, log_histogram_keys
+from hwtAxiPerfTester.runtime.trace import AxiPerfTesterTraceRecord, trace_to_bytes
 from hwtAxiPerfTester.rw_pattern_generator import RWPatternGenerator
 from hwtAxiPerfTester.time_duration_storage import TimeDurationStorage
+from hwtAxiPerfTester.transaction_generator import TransactionGenerator
+from hwtLib.amba.constants import BURST_FIXED, BURST_INCR, BURST_WRAP
 from pyMathBitPrecise.bit_utils import mask
 
 
@@ -25,6 +32,7 @@ class AxiPerfTesterCtl():
             <Bits, 32bits, unsigned> id
             <Bits, 32bits, unsigned> control
             <Bits, 32bits, unsigned> time
+            <Bits, 32bits, unsigned> duration
             struct serialized_config_t {
                 <Bits, 16bits, unsigned> COUNTER_WIDTH
                 <Bits, 16bits, unsigned> RW_PATTERN_ITEMS
@@ -33,7 +41,15 @@ class AxiPerfTesterCtl():
                 <Bits, 16bits, unsigned> ID_WIDTH
                 <Bits, 16bits, unsigned> ADDR_WIDTH
                 <Bits, 16bits, unsigned> DATA_WIDTH
-                //<Bits, 16bits, unsigned> empty space
+                <Bits, 16bits, unsigned> MULTI_ID_CNT
+                <Bits, 16bits, unsigned> ADDR_STREAM_CNT
+                <Bits, 16bits, unsigned> HAS_TRACE_REPLAY
+                <Bits, 16bits, unsigned> TOP_K_ITEMS
+                <Bits, 16bits, unsigned> HAS_FIRST_BEAT_STATS
+                <Bits, 16bits, unsigned> HAS_BANDWIDTH_STATS
+                <Bits, 16bits, unsigned> RAW_HISTORY_ITEMS
+                <Bits, 16bits, unsigned> PORT_CNT
+                <Bits, 16bits, unsigned> serialized_config_reserved
             } serialized_config
             struct channel_config_t {
                 <Bits, 32bits, unsigned>[4] pattern
@@ -49,6 +65,22 @@ class AxiPerfTesterCtl():
                     <Bits, 32bits, unsigned> trans_len_step
                     <Bits, 32bits, unsigned> trans_len_mask
                     <Bits, 32bits, unsigned> trans_len_mode
+                    <Bits, 32bits, unsigned> max_outstanding
+                    <Bits, 32bits, unsigned> id_cnt
+                    <Bits, 32bits, unsigned> rate
+                    <Bits, 32bits, unsigned> rate_burst
+                    <Bits, 32bits, unsigned> gap_mode
+                    <Bits, 32bits, unsigned> gap_param
+                    <Bits, 32bits, unsigned> stride_inner_step
+                    <Bits, 32bits, unsigned> stride_inner_cnt
+                    <Bits, 32bits, unsigned> stride_outer_step
+                    <Bits, 32bits, unsigned> stride_outer_cnt
+                    <Bits, 32bits, unsigned> rand_seed
+                    <Bits, 32bits, unsigned> rand_align_mask
+                    <Bits, 32bits, unsigned> axi_attr // :see: axi_attr_t
+                    <Bits, 32bits, unsigned>[4] stream_base
+                    <Bits, 32bits, unsigned>[4] stream_step
+                    <Bits, 32bits, unsigned>[4] stream_mask
                 } addr_gen_config
                 struct stat_data_t {
                     <Bits, 32bits, unsigned>[3] histogram_keys
@@ -59,21 +91,101 @@ class AxiPerfTesterCtl():
                     <Bits, 32bits, unsigned> sum_val
                     <Bits, 32bits, unsigned> input_cnt
                     <Bits, 32bits, unsigned> last_time
+                    <Bits, 32bits, unsigned> warmup_cnt
+                    <Bits, 32bits, unsigned> warmup_excluded
+                    <Bits, 32bits, unsigned> trigger_threshold
+                    <Bits, 32bits, unsigned> trigger_post_cnt
+                    <Bits, 32bits, unsigned> triggered
+                    <Bits, 32bits, unsigned> trigger_time
+                    <Bits, 32bits, unsigned> trigger_index
+                    <Bits, 32bits, unsigned>[TOP_K_ITEMS * 4] top_k // only if TOP_K_ITEMS > 0
                 } stats
+                struct occupancy_stat_data_t {
+                    <Bits, 32bits, unsigned>[3] histogram_keys
+                    <Bits, 32bits, unsigned>[4] histogram_counters
+                    <Bits, 32bits, unsigned> max_val
+                } occupancy_stats
+                struct reorder_stat_data_t {
+                    <Bits, 32bits, unsigned>[3] histogram_keys
+                    <Bits, 32bits, unsigned>[4] histogram_counters
+                    <Bits, 32bits, unsigned> reorder_cnt
+                } reorder_stats
+                struct bandwidth_stat_data_t {
+                    <Bits, 32bits, unsigned>[3] histogram_keys
+                    <Bits, 32bits, unsigned>[4] histogram_counters
+                    <Bits, 32bits, unsigned> window
+                    <Bits, 32bits, unsigned> min_val
+                    <Bits, 32bits, unsigned> max_val
+                } bandwidth_stats // only if HAS_BANDWIDTH_STATS
+                struct first_beat_stat_data_t {
+                    <Bits, 32bits, unsigned>[3] histogram_keys
+                    <Bits, 32bits, unsigned>[4] histogram_counters
+                    <Bits, 32bits, unsigned>[4] last_values
+                    <Bits, 32bits, unsigned> min_val
+                    <Bits, 32bits, unsigned> max_val
+                    <Bits, 32bits, unsigned> sum_val
+                    <Bits, 32bits, unsigned> input_cnt
+                } first_beat_stats // only if HAS_FIRST_BEAT_STATS
             } r
             struct channel_config_t {
                 // identiacal as "r"
             } w
+            // r1, w1, r2, w2, ... for each other port if PORT_CNT > 1
+            struct trace_config_t {
+                <Bits, 32bits, unsigned> base
+                <Bits, 32bits, unsigned> items
+            } trace // only if HAS_TRACE_REPLAY
+            struct conflict_config_t {
+                <Bits, 32bits, unsigned> raw_lag
+                <Bits, 32bits, unsigned> conflict_mask
+                struct conflict_stat_data_t {
+                    <Bits, 32bits, unsigned>[3] histogram_keys
+                    <Bits, 32bits, unsigned>[4] histogram_counters
+                    <Bits, 32bits, unsigned>[4] last_values
+                    <Bits, 32bits, unsigned> min_val
+                    <Bits, 32bits, unsigned> max_val
+                    <Bits, 32bits, unsigned> sum_val
+                    <Bits, 32bits, unsigned> input_cnt
+                } stats
+            } conflict // only if RAW_HISTORY_ITEMS > 0
         }
         struct control_t {
             <Bits, 1bit> time_en
-            <Bits, 1bit> rw_mode
+            <Bits, 2bits> rw_mode
             <Bits, 1bit> generator_en
-            <Bits, 1bit> r_ordering_mode
-            <Bits, 1bit> w_ordering_mode
-            <Bits, 27bits> reserved
+            <Bits, 2bits> r_ordering_mode
+            <Bits, 2bits> w_ordering_mode
+            <Bits, 1bit> trace_en
+            <Bits, 23bits> reserved
         }
 """
+    # names of scalar fields in addr_gen_config_t in the order of the address space
+    # (followed by stream_base, stream_step, stream_mask arrays)
+    ADDR_GEN_CONFIG_FIELDS = (
+        "credit",
+        "addr",
+        "addr_step",
+        "addr_mask",
+        "addr_mode",
+        "addr_offset",
+        "trans_len",
+        "trans_len_step",
+        "trans_len_mask",
+        "trans_len_mode",
+        "max_outstanding",
+        "id_cnt",
+        "rate",
+        "rate_burst",
+        "gap_mode",
+        "gap_param",
+        "stride_inner_step",
+        "stride_inner_cnt",
+        "stride_outer_step",
+        "stride_outer_cnt",
+        "rand_seed",
+        "rand_align_mask",
+        "axi_attr",
+    )
 
     def __init__(self, addr: int, pooling_interval=0.1):
         # constant intitialization
@@ -85,23 +197,74 @@ class AxiPerfTesterCtl():
         """
         Query the hardware for configuration of the tester and store this information for later use.
         """
-        config = self.read(3 * 4, 4 * 2)
+        config = self.read(4 * 4, 16 * 2)
         # <Bits, 16bits, unsigned> COUNTER_WIDTH
         # <Bits, 16bits, unsigned> RW_PATTERN_ITEMS
         # <Bits, 16bits, unsigned> HISTOGRAM_ITEMS
         # <Bits, 16bits, unsigned> LAST_VALUES_ITEMS
-
-        _, rw_pattern_items, histogram_items, last_values_items = struct.unpack('<HHHH', config)
+        # <Bits, 16bits, unsigned> ID_WIDTH
+        # <Bits, 16bits, unsigned> ADDR_WIDTH
+        # <Bits, 16bits, unsigned> DATA_WIDTH
+        # <Bits, 16bits, unsigned> MULTI_ID_CNT
+        # <Bits, 16bits, unsigned> ADDR_STREAM_CNT
+        # <Bits, 16bits, unsigned> HAS_TRACE_REPLAY
+        # <Bits, 16bits, unsigned> TOP_K_ITEMS
+        # <Bits, 16bits, unsigned> HAS_FIRST_BEAT_STATS
+        # <Bits, 16bits, unsigned> HAS_BANDWIDTH_STATS
+        # <Bits, 16bits, unsigned> RAW_HISTORY_ITEMS
+        # <Bits, 16bits, unsigned> PORT_CNT
+        # <Bits, 16bits, unsigned> serialized_config_reserved
+
+        (_, rw_pattern_items, histogram_items, last_values_items,
+         id_width, addr_width, data_width, multi_id_cnt, addr_stream_cnt,
+         has_trace_replay, top_k_items, has_first_beat_stats, has_bandwidth_stats,
+         raw_history_items, port_cnt, _) = struct.unpack('<HHHHHHHHHHHHHHHH', config)
         self.rw_pattern_items = rw_pattern_items
         self.histogram_items = histogram_items
         self.last_values_items = last_values_items
-        self.channels_offset = 3 * 4 + 8 * 2
+        self.id_width = id_width
+        self.addr_width = addr_width
+        self.data_width = data_width
+        self.multi_id_cnt = multi_id_cnt
+        self.addr_stream_cnt = addr_stream_cnt
+        self.has_trace_replay = bool(has_trace_replay)
+        self.top_k_items = top_k_items
+        self.has_first_beat_stats = bool(has_first_beat_stats)
+        self.has_bandwidth_stats = bool(has_bandwidth_stats)
+        self.raw_history_items = raw_history_items
+        self.port_cnt = port_cnt
+        # read and write channel for each port
+        self.channel_cnt = 2 * port_cnt
+        self.channels_offset = 4 * 4 + 16 * 2
         self.dispatched_cntr_offset = self.channels_offset + rw_pattern_items * 8
-        self.addr_gen_config_t_size = 10 * 4
+        self.addr_gen_config_t_size = (len(self.ADDR_GEN_CONFIG_FIELDS) + 3 * addr_stream_cnt) * 4
         self.addr_gen_config_offset = self.dispatched_cntr_offset + 4
         self.stat_data_offset = self.addr_gen_config_offset + self.addr_gen_config_t_size
-        self.stat_data_size = (self.histogram_items * 2 - 1 + self.last_values_items + 5) * 4
-        self.channel_config_t_size = rw_pattern_items * 8 + 4 + self.addr_gen_config_t_size + self.stat_data_size
+        self.stat_data_size = (self.histogram_items * 2 - 1 + self.last_values_items + 12 + self.top_k_items * 4) * 4
+        self.occupancy_stat_data_offset = self.stat_data_offset + self.stat_data_size
+        self.occupancy_stat_data_size = (self.histogram_items * 2 - 1 + 1) * 4
+        self.reorder_stat_data_offset = self.occupancy_stat_data_offset + self.occupancy_stat_data_size
+        self.reorder_stat_data_size = (self.histogram_items * 2 - 1 + 1) * 4
+        self.bandwidth_stat_data_offset = self.reorder_stat_data_offset + self.reorder_stat_data_size
+        if self.has_bandwidth_stats:
+            self.bandwidth_stat_data_size = (self.histogram_items * 2 - 1 + 3) * 4
+        else:
+            self.bandwidth_stat_data_size = 0
+        self.first_beat_stat_data_offset = self.bandwidth_stat_data_offset + self.bandwidth_stat_data_size
+        # histogram_keys, histogram_counters, last_values, min_val, max_val, sum_val, input_cnt
+        secondary_stat_data_size = (self.histogram_items * 2 - 1 + self.last_values_items + 4) * 4
+        if self.has_first_beat_stats:
+            self.first_beat_stat_data_size = secondary_stat_data_size
+        else:
+            self.first_beat_stat_data_size = 0
+        # the reorder distance is a two's complement number of this width
+        self.reorder_distance_width = id_width + 2
+        self.channel_config_t_size = rw_pattern_items * 8 + 4 + self.addr_gen_config_t_size + \
+            self.stat_data_size + self.occupancy_stat_data_size + self.reorder_stat_data_size + \
+            self.bandwidth_stat_data_size + self.first_beat_stat_data_size
+        self.trace_offset = self.channels_offset + self.channel_cnt * self.channel_config_t_size
+        self.conflict_offset = self.trace_offset + (2 * 4 if self.has_trace_replay else 0)
+        self.conflict_stat_data_offset = self.conflict_offset + 2 * 4
         self.config_loaded = True
 
     def write_control(self, time_en:int,
@@ -109,19 +272,23 @@ class AxiPerfTesterCtl():
                        generator_en: int,
                        r_ordering_mode:TimeDurationStorage.MODE,
                        w_ordering_mode:TimeDurationStorage.MODE,
-                       reset_time:bool):
+                       reset_time:bool,
+                       trace_en:int=0):
         """
         Write control word in control register.
+
+        :param trace_en: if 1 the transactions are taken from the trace in memory instead of the generators
         """
         assert time_en in (0, 1), time_en
-        assert rw_mode in (0, 1), rw_mode
+        assert rw_mode in (0, 1, 2, 3), rw_mode
         assert generator_en in (0, 1), generator_en
-        assert r_ordering_mode in (0, 1), r_ordering_mode
-        assert w_ordering_mode in (0, 1), w_ordering_mode
+        assert r_ordering_mode in (0, 1, 2), r_ordering_mode
+        assert w_ordering_mode in (0, 1, 2), w_ordering_mode
+        assert trace_en in (0, 1), trace_en
 
         v = 0
-        for b in (w_ordering_mode, r_ordering_mode, generator_en, rw_mode, time_en):
-            v <<= 1
+        for b, w in ((trace_en, 1), (w_ordering_mode, 2), (r_ordering_mode, 2), (generator_en, 1), (rw_mode, 2), (time_en, 1)):
+            v <<= w
             v |= b
 
         self.write32(4, v)
@@ -139,6 +306,8 @@ class AxiPerfTesterCtl():
         Upload config to tester.
         """
         write32 = self.write32
+        assert len(config.channel_config) == self.channel_cnt, \
+            ("Job has to have config for read and write channel of each port", len(config.channel_config), self.port_cnt)
         # copy rw pattern
         for ch_i, ch in enumerate(config.channel_config):
             ch: AxiPerfTesterChannelConfig
@@ -153,21 +322,28 @@ class AxiPerfTesterCtl():
             write32(offset + self.dispatched_cntr_offset, 0)
 
             # copy addr_gen_config
-            for i, name in enumerate([
-                    "credit",
-                    "addr",
-                    "addr_step",
-                    "addr_mask",
-                    "addr_mode",
-                    "addr_offset",
-                    "trans_len",
-                    "trans_len_step",
-                    "trans_len_mask",
-                    "trans_len_mode",
-                ]):
-                v = getattr(ch.addr_gen, name)
+            assert 0 <= ch.addr_gen.max_outstanding <= 2 ** self.id_width, (ch.addr_gen.max_outstanding, self.id_width)
+            assert 0 <= ch.addr_gen.id_cnt <= self.multi_id_cnt, (ch.addr_gen.id_cnt, self.multi_id_cnt)
+            assert ch.addr_gen.rate == 0 or ch.addr_gen.rate_burst > 0, ("Rate limiter requires burst of at least 1 transaction", ch.addr_gen.rate_burst)
+            assert ch.addr_gen.gap_mode in (RWPatternGenerator.GAP_MODE.PATTERN,
+                                            RWPatternGenerator.GAP_MODE.GEOMETRIC,
+                                            RWPatternGenerator.GAP_MODE.UNIFORM), ch.addr_gen.gap_mode
+            for i, name in enumerate(self.ADDR_GEN_CONFIG_FIELDS):
+                if name == "axi_attr":
+                    v = self._axi_attr_to_hw(ch.addr_gen)
+                else:
+                    v = getattr(ch.addr_gen, name)
                 write32(offset + self.addr_gen_config_offset + i * 4, v)
 
+            stream_offset = offset + self.addr_gen_config_offset + len(self.ADDR_GEN_CONFIG_FIELDS) * 4
+            for name in ("stream_base", "stream_step", "stream_mask"):
+                values = getattr(ch.addr_gen, name)
+                assert len(values) <= self.addr_stream_cnt, (name, len(values), self.addr_stream_cnt)
+                for i in range(self.addr_stream_cnt):
+                    v = values[i] if i < len(values) else 0
+                    write32(stream_offset + i * 4, v)
+                stream_offset += self.addr_stream_cnt * 4
+
             # init histogram keys and clean counter
             # struct stat_data_t {
             #    <Bits, 32bits, unsigned>[31] histogram_keys
@@ -178,24 +354,216 @@ class AxiPerfTesterCtl():
             #    <Bits, 32bits, unsigned> sum_val
             #    <Bits, 32bits, unsigned> input_cnt
             #    <Bits, 32bits, unsigned> last_time
+            #    <Bits, 32bits, unsigned> warmup_cnt
+            #    <Bits, 32bits, unsigned> warmup_excluded
+            #    <Bits, 32bits, unsigned> trigger_threshold
+            #    <Bits, 32bits, unsigned> trigger_post_cnt
+            #    <Bits, 32bits, unsigned> triggered
+            #    <Bits, 32bits, unsigned> trigger_time
+            #    <Bits, 32bits, unsigned> trigger_index
+            #    <Bits, 32bits, unsigned>[TOP_K_ITEMS * 4] top_k // only if TOP_K_ITEMS > 0
             # } stats
-            assert len(ch.stat_config.histogram_keys) == self.histogram_items - 1, (len(ch.stat_config.histogram_keys), self.histogram_items - 1)
-            for i, v in enumerate(ch.stat_config.histogram_keys):
-                write32(offset + self.stat_data_offset + i * 4, v)
-
-            min_val_i = self.histogram_items + self.last_values_items
-            for i in range(self.histogram_items + self.last_values_items + 5):
-                if i == min_val_i:
-                    v = mask(32)
-                else:
-                    v = 0
-                write32(offset + self.stat_data_offset + (self.histogram_items - 1 + i) * 4, v)
+            sc = ch.stat_config
+            assert 0 <= sc.trigger_post_cnt < self.last_values_items, \
+                ("Values after the trigger have to fit in last_values", sc.trigger_post_cnt, self.last_values_items)
+            self._init_stat_data(offset + self.stat_data_offset, sc.histogram_keys, [
+                mask(32), 0, 0, 0, 0,  # min_val, max_val, sum_val, input_cnt, last_time
+                sc.warmup_cnt, 0,  # warmup_cnt, warmup_excluded
+                sc.trigger_threshold, sc.trigger_post_cnt, 0, 0, 0,
+                *(0 for _ in range(self.top_k_items * 4))
+            ])
+            if self.has_first_beat_stats:
+                # struct first_beat_stat_data_t {
+                #    <Bits, 32bits, unsigned>[31] histogram_keys
+                #    <Bits, 32bits, unsigned>[32] histogram_counters
+                #    <Bits, 32bits, unsigned>[4096] last_values
+                #    <Bits, 32bits, unsigned> min_val
+                #    <Bits, 32bits, unsigned> max_val
+                #    <Bits, 32bits, unsigned> sum_val
+                #    <Bits, 32bits, unsigned> input_cnt
+                # } first_beat_stats
+                self._init_stat_data(offset + self.first_beat_stat_data_offset,
+                                     self._get_first_beat_histogram_keys(sc),
+                                     [mask(32), 0, 0, 0])
+
+            # init occupancy histogram keys and clean counters and max_val
+            # struct occupancy_stat_data_t {
+            #    <Bits, 32bits, unsigned>[31] histogram_keys
+            #    <Bits, 32bits, unsigned>[32] histogram_counters
+            #    <Bits, 32bits, unsigned> max_val
+            # } occupancy_stats
+            occupancy_histogram_keys = self._get_occupancy_histogram_keys(ch.stat_config)
+            for i, v in enumerate(occupancy_histogram_keys):
+                write32(offset + self.occupancy_stat_data_offset + i * 4, v)
+
+            for i in range(self.histogram_items + 1):
+                write32(offset + self.occupancy_stat_data_offset + (self.histogram_items - 1 + i) * 4, 0)
+
+            # init reorder histogram keys and clean counters and reorder_cnt
+            # struct reorder_stat_data_t {
+            #    <Bits, 32bits, unsigned>[31] histogram_keys
+            #    <Bits, 32bits, unsigned>[32] histogram_counters
+            #    <Bits, 32bits, unsigned> reorder_cnt
+            # } reorder_stats
+            reorder_histogram_keys = self._get_reorder_histogram_keys(ch.stat_config)
+            for i, v in enumerate(reorder_histogram_keys):
+                write32(offset + self.reorder_stat_data_offset + i * 4, self._reorder_distance_to_hw(v))
+
+            for i in range(self.histogram_items + 1):
+                write32(offset + self.reorder_stat_data_offset + (self.histogram_items - 1 + i) * 4, 0)
+
+            if self.has_bandwidth_stats:
+                # init bandwidth histogram keys, clean counters and set window, min_val and max_val
+                # struct bandwidth_stat_data_t {
+                #    <Bits, 32bits, unsigned>[31] histogram_keys
+                #    <Bits, 32bits, unsigned>[32] histogram_counters
+                #    <Bits, 32bits, unsigned> window
+                #    <Bits, 32bits, unsigned> min_val
+                #    <Bits, 32bits, unsigned> max_val
+                # } bandwidth_stats
+                bandwidth_histogram_keys = self._get_bandwidth_histogram_keys(ch.stat_config)
+                for i, v in enumerate(bandwidth_histogram_keys):
+                    write32(offset + self.bandwidth_stat_data_offset + i * 4, v)
+
+                for i, v in enumerate([
+                        *(0 for _ in range(self.histogram_items)),
+                        ch.stat_config.bandwidth_window, mask(32), 0]):
+                    write32(offset + self.bandwidth_stat_data_offset + (self.histogram_items - 1 + i) * 4, v)
+
+        self._apply_conflict_config(config)
+
+    def _apply_conflict_config(self, config: AxiPerfTesterTestJob):
+        """
+        Upload config of read-after-write traffic and of the detection of read/write conflicts
+        """
+        r_addr_mode = config.channel_config[0].addr_gen.addr_mode
+        for ch in config.channel_config[1:]:
+            assert ch.addr_gen.addr_mode != TransactionGenerator.MODE.READ_AFTER_WRITE, \
+                "Only the read channel of the port 0 can use READ_AFTER_WRITE addr_mode"
+        if not self.raw_history_items:
+            assert r_addr_mode != TransactionGenerator.MODE.READ_AFTER_WRITE and config.raw_lag == 0, \
+                "The component was synthesized without RAW_HISTORY_ITEMS"
+            return
+
+        assert 0 <= config.raw_lag <= self.raw_history_items, (config.raw_lag, self.raw_history_items)
+        if r_addr_mode == TransactionGenerator.MODE.READ_AFTER_WRITE:
+            assert config.raw_lag > 0, "READ_AFTER_WRITE addr_mode requires raw_lag > 0"
+            # the read would wait on the write which waits on the read
+            assert config.rw_mode != RWPatternGenerator.MODE.SYNC, \
+                "READ_AFTER_WRITE addr_mode can not be used in RWPatternGenerator.MODE.SYNC"
+        # struct conflict_config_t {
+        #    <Bits, 32bits, unsigned> raw_lag
+        #    <Bits, 32bits, unsigned> conflict_mask
+        #    struct conflict_stat_data_t {...} stats
+        # }
+        self.write32(self.conflict_offset, config.raw_lag)
+        self.write32(self.conflict_offset + 4, config.conflict_mask)
+        self._init_stat_data(self.conflict_stat_data_offset,
+                             config.channel_config[0].stat_config.histogram_keys,
+                             [mask(32), 0, 0, 0])
+
+    def _axi_attr_to_hw(self, addr_gen: AxiPerfTesterAddrGenConfig) -> int:
+        """
+        Pack the AXI burst type, size, cache and QoS to a format of axi_attr register
+
+        .. code-block:: text
+
+            struct axi_attr_t {
+                <Bits, 2bits> burst
+                <Bits, 3bits> size
+                <Bits, 4bits> cache
+                <Bits, 4bits> qos
+                <Bits, 19bits> reserved
+            }
+        """
+        max_size = (self.data_width // 8).bit_length() - 1
+        size = max_size if addr_gen.size is None else addr_gen.size
+        assert addr_gen.burst in (BURST_FIXED, BURST_INCR, BURST_WRAP), addr_gen.burst
+        assert 0 <= size <= max_size, ("Size of beat can not be larger than data width", size, max_size)
+        assert 0 <= addr_gen.cache < 16, addr_gen.cache
+        assert 0 <= addr_gen.qos < 16, addr_gen.qos
+        v = 0
+        for b, w in ((addr_gen.qos, 4), (addr_gen.cache, 4), (size, 3), (addr_gen.burst, 2)):
+            v <<= w
+            v |= b
+        return v
+
+    def _init_stat_data(self, offset: int, histogram_keys: List[int], values_after_last_values: List[int]):
+        """
+        Write histogram keys, clean histogram counters and last values and write the values which follows last_values
+        in stat_data_t/first_beat_stat_data_t/conflict_stat_data_t
+        """
+        write32 = self.write32
+        assert len(histogram_keys) == self.histogram_items - 1, (len(histogram_keys), self.histogram_items - 1)
+        for i, v in enumerate(histogram_keys):
+            write32(offset + i * 4, v)
+        offset += len(histogram_keys) * 4
+
+        for i in range(self.histogram_items + self.last_values_items):
+            write32(offset + i * 4, 0)
+        offset += (self.histogram_items + self.last_values_items) * 4
+
+        for i, v in enumerate(values_after_last_values):
+            write32(offset + i * 4, v)
+
+    def _get_first_beat_histogram_keys(self, stat_config: AxiPerfTesterStatConfig):
+        """
+        :return: keys for histogram of time to the first beat, if not specified the keys of the latency histogram are used
+        """
+        keys = stat_config.first_beat_histogram_keys
+        if not keys:
+            keys = stat_config.histogram_keys
+        assert len(keys) == self.histogram_items - 1, (len(keys), self.histogram_items - 1)
+        return keys
+
+    def _get_occupancy_histogram_keys(self, stat_config: AxiPerfTesterStatConfig):
+        """
+        :return: keys for occupancy histogram, if not specified each of the first bins corresponds to a single value
+        """
+        keys = stat_config.occupancy_histogram_keys
+        if not keys:
+            keys = list(range(1, self.histogram_items))
+        assert len(keys) == self.histogram_items - 1, (len(keys), self.histogram_items - 1)
+        return keys
+
+    def _get_reorder_histogram_keys(self, stat_config: AxiPerfTesterStatConfig):
+        """
+        :return: keys for reorder distance histogram, if not specified each of the bins around 0 corresponds to a single value
+        """
+        keys = stat_config.reorder_histogram_keys
+        if not keys:
+            key_cnt = self.histogram_items - 1
+            keys = [i - key_cnt // 2 + 1 for i in range(key_cnt)]
+        assert len(keys) == self.histogram_items - 1, (len(keys), self.histogram_items - 1)
+        return keys
+
+    def _get_bandwidth_histogram_keys(self, stat_config: AxiPerfTesterStatConfig):
+        """
+        :return: keys for histogram of data beats per window, if not specified the bins have the same width
+            and cover all possible values (0 to bandwidth_window)
+        """
+        keys = stat_config.bandwidth_histogram_keys
+        if not keys:
+            if stat_config.bandwidth_window:
+                keys = linear_histogram_keys(0, stat_config.bandwidth_window + 1, self.histogram_items - 1)
+            else:
+                keys = list(range(1, self.histogram_items))
+        assert len(keys) == self.histogram_items - 1, (len(keys), self.histogram_items - 1)
+        return keys
+
+    def _reorder_distance_to_hw(self, v: int):
+        """
+        Convert signed reorder distance to a format used by hardware histogram (two's complement with inverted MSB)
+        """
+        w = self.reorder_distance_width
+        assert -(1 << (w - 1)) <= v < (1 << (w - 1)), (v, w)
+        return (v + (1 << (w - 1))) & mask(w)
 
     def is_generator_running(self) -> bool:
         """
         Retrun True if transaction generator is still running.
         """
-        return (self.read32(4) >> 2) & 0b1
+        return (self.read32(4) >> 3) & 0b1
 
     def get_pending_trans_cnt(self, ch_i: int):
         """
@@ -204,21 +572,23 @@ class AxiPerfTesterCtl():
         offset = self.channel_config_t_size * ch_i
         dispatched_cntr = self.read32(offset + self.dispatched_cntr_offset)
         input_cnt = self.read32(offset + self.stat_data_offset + (self.histogram_items * 2 - 1 + self.last_values_items + 3) * 4)
+        warmup_excluded = self.read32(offset + self.stat_data_offset + (self.histogram_items * 2 - 1 + self.last_values_items + 6) * 4)
 
-        res = dispatched_cntr - input_cnt
+        res = dispatched_cntr - input_cnt - warmup_excluded
         assert res >= 0
         return res
 
-    def download_channel_report(self, ch_i: int, histogram_keys: List[int], rep: AxiPerfTesterTestChannelReport):
+    def download_channel_report(self, ch_i: int, stat_config: AxiPerfTesterStatConfig, rep: AxiPerfTesterTestChannelReport):
         """
         Download all counters histograms and other report registers for specific channel.
         """
         read32 = self.read32
         offset = self.channel_config_t_size * ch_i
+        occupancy_offset = offset + self.occupancy_stat_data_offset
         rep.credit = read32(offset + self.addr_gen_config_offset)
         rep.dispatched_cntr = read32(offset + self.dispatched_cntr_offset)
 
-        rep.histogram_keys = histogram_keys
+        rep.histogram_keys = stat_config.histogram_keys
         offset += self.stat_data_offset + (self.histogram_items - 1) * 4
 
         rep.histogram_counters: List[int] = [
@@ -231,9 +601,76 @@ class AxiPerfTesterCtl():
         ]
         offset += self.last_values_items * 4
 
-        rep.min_val, rep.max_val, rep.sum_val, rep.input_cnt, rep.last_time = [
-            read32(offset + i * 4) for i in range(5)
+        (rep.min_val, rep.max_val, rep.sum_val, rep.input_cnt, rep.last_time, _, rep.warmup_excluded,
+         _, rep.trigger_post_cnt, triggered, rep.trigger_time, rep.trigger_index) = [
+            read32(offset + i * 4) for i in range(12)
+        ]
+        rep.triggered = bool(triggered)
+        offset += 12 * 4
+
+        rep.top_k = []
+        for i in range(self.top_k_items):
+            latency, time, addr, _id = [read32(offset + (i * 4 + j) * 4) for j in range(4)]
+            if latency == 0:
+                # not used yet, the following items are also empty
+                break
+            rep.top_k.append({"latency": latency, "time": time, "addr": addr, "id": _id})
+
+        rep.occupancy_histogram_keys = self._get_occupancy_histogram_keys(stat_config)
+        occupancy_offset += (self.histogram_items - 1) * 4
+        rep.occupancy_histogram_counters: List[int] = [
+            read32(occupancy_offset + i * 4) for i in range(self.histogram_items)
         ]
+        occupancy_offset += self.histogram_items * 4
+        rep.occupancy_max = read32(occupancy_offset)
+
+        reorder_offset = self.channel_config_t_size * ch_i + self.reorder_stat_data_offset
+        rep.reorder_histogram_keys = self._get_reorder_histogram_keys(stat_config)
+        reorder_offset += (self.histogram_items - 1) * 4
+        rep.reorder_histogram_counters: List[int] = [
+            read32(reorder_offset + i * 4) for i in range(self.histogram_items)
+        ]
+        reorder_offset += self.histogram_items * 4
+        rep.reorder_cnt = read32(reorder_offset)
+
+        if self.has_bandwidth_stats:
+            bandwidth_offset = self.channel_config_t_size * ch_i + self.bandwidth_stat_data_offset
+            rep.bandwidth_window = stat_config.bandwidth_window
+            rep.bandwidth_histogram_keys = self._get_bandwidth_histogram_keys(stat_config)
+            bandwidth_offset += (self.histogram_items - 1) * 4
+            rep.bandwidth_histogram_counters: List[int] = [
+                read32(bandwidth_offset + i * 4) for i in range(self.histogram_items)
+            ]
+            bandwidth_offset += (self.histogram_items + 1) * 4
+            rep.bandwidth_min, rep.bandwidth_max = [read32(bandwidth_offset + i * 4) for i in range(2)]
+
+        if self.has_first_beat_stats:
+            first_beat_offset = self.channel_config_t_size * ch_i + self.first_beat_stat_data_offset
+            rep.first_beat_histogram_keys = self._get_first_beat_histogram_keys(stat_config)
+            (rep.first_beat_histogram_counters, rep.first_beat_last_values,
+             rep.first_beat_min_val, rep.first_beat_max_val, rep.first_beat_sum_val,
+             rep.first_beat_input_cnt) = self._download_secondary_stat_data(first_beat_offset)
+
+        if self.raw_history_items and ch_i == 0:
+            rep.conflict_histogram_keys = stat_config.histogram_keys
+            (rep.conflict_histogram_counters, rep.conflict_last_values,
+             rep.conflict_min_val, rep.conflict_max_val, rep.conflict_sum_val,
+             rep.conflict_input_cnt) = self._download_secondary_stat_data(self.conflict_stat_data_offset)
+
+    def _download_secondary_stat_data(self, offset: int) -> Tuple[List[int], List[int], int, int, int, int]:
+        """
+        Read first_beat_stat_data_t/conflict_stat_data_t
+
+        :return: tuple (histogram_counters, last_values, min_val, max_val, sum_val, input_cnt)
+        """
+        read32 = self.read32
+        offset += (self.histogram_items - 1) * 4
+        histogram_counters = [read32(offset + i * 4) for i in range(self.histogram_items)]
+        offset += self.histogram_items * 4
+        last_values = [read32(offset + i * 4) for i in range(self.last_values_items)]
+        offset += self.last_values_items * 4
+        min_val, max_val, sum_val, input_cnt = [read32(offset + i * 4) for i in range(4)]
+        return histogram_counters, last_values, min_val, max_val, sum_val, input_cnt
 
     def exec_test(self, job: AxiPerfTesterTestJob) -> AxiPerfTesterTestReport:
         """
@@ -245,35 +682,189 @@ class AxiPerfTesterCtl():
         _id = self.read32(0)
         _id_ref = int.from_bytes("TEST".encode(), "big")
         assert _id == _id_ref, (f"got {_id:x}, expected {_id_ref:x}")
+        # the ordering mode is set in control register for all read/write channels at once
+        r_ordering_mode = job.channel_config[0].addr_gen.ordering_mode
+        w_ordering_mode = job.channel_config[1].addr_gen.ordering_mode
+        for ch_i, ch in enumerate(job.channel_config):
+            assert ch.addr_gen.ordering_mode == (w_ordering_mode if ch_i % 2 else r_ordering_mode), \
+                ("All ports have to use the same ordering_mode as the port 0", ch_i, ch.addr_gen.ordering_mode)
+        trace_en = int(job.trace_base is not None)
         self.write_control(
             0, job.rw_mode, 0,
-            job.channel_config[0].addr_gen.ordering_mode,
-            job.channel_config[1].addr_gen.ordering_mode, True)
+            r_ordering_mode, w_ordering_mode, True, trace_en)
         # reset time
         self.write32(2 * 4, 0)
+        if job.rw_mode == RWPatternGenerator.MODE.DURATION:
+            assert job.duration > 0, "Duration has to be specified for MODE.DURATION"
+        self.write32(3 * 4, job.duration)
 
         self.apply_config(job)
+        if trace_en:
+            assert self.has_trace_replay, "The component was synthesized without HAS_TRACE_REPLAY"
+            self.write32(self.trace_offset, job.trace_base)
+            self.write32(self.trace_offset + 4, job.trace_items)
         self.write_control(
             1, job.rw_mode, 1,
-            job.channel_config[0].addr_gen.ordering_mode,
-            job.channel_config[1].addr_gen.ordering_mode, False)
+            r_ordering_mode, w_ordering_mode, False, trace_en)
 
         while self.is_generator_running() or \
-                self.get_pending_trans_cnt(0) > 0 or\
-                self.get_pending_trans_cnt(1) > 0:
+                any(self.get_pending_trans_cnt(ch_i) > 0 for ch_i in range(self.channel_cnt)):
             time.sleep(self.pooling_interval)
         self.write_control(
             0, job.rw_mode, 0,
-            job.channel_config[0].addr_gen.ordering_mode,
-            job.channel_config[1].addr_gen.ordering_mode, False)
+            r_ordering_mode, w_ordering_mode, False, trace_en)
 
-        rep = AxiPerfTesterTestReport()
+        rep = AxiPerfTesterTestReport(self.channel_cnt)
         rep.time = self.get_time()
         for ch_i, ch_rep in enumerate(rep.channel):
-            self.download_channel_report(ch_i, job.channel_config[ch_i].stat_config.histogram_keys, ch_rep)
+            self.download_channel_report(ch_i, job.channel_config[ch_i].stat_config, ch_rep)
 
         return rep
 
+    def exec_auto_histogram_test(self, job: AxiPerfTesterTestJob, spacing=HISTOGRAM_KEY_SPACING.LOG,
+                                 probe_credit: Optional[int]=None,
+                                 probe: Optional[AxiPerfTesterTestReport]=None) -> AxiPerfTesterTestReport:
+        """
+        Run the job with histogram keys resolved from a probe run (:see: :func:`auto_histogram_keys`)
+
+        :param probe_credit: if specified the credit of channels in the probe run is limited to this value
+        :param probe: report of a previous run which is used instead of the probe run
+            (its histogram keys have to be stored in the report)
+        """
+        if not self.config_loaded:
+            self._load_config()
+
+        key_cnt = self.histogram_items - 1
+        if probe is None:
+            probe_job = deepcopy(job)
+            for ch in probe_job.channel_config:
+                if probe_credit is not None:
+                    ch.addr_gen.credit = min(ch.addr_gen.credit, probe_credit)
+                if len(ch.stat_config.histogram_keys) != key_cnt:
+                    # wide range because nothing is known about the latency yet
+                    ch.stat_config.histogram_keys = log_histogram_keys(1, mask(32), key_cnt)
+            probe = self.exec_test(probe_job)
+
+        _job = deepcopy(job)
+        for ch, ch_probe in zip(_job.channel_config, probe.channel):
+            keys = auto_histogram_keys(ch_probe, key_cnt, spacing)
+            if keys is not None:
+                ch.stat_config.histogram_keys = keys
+
+        return self.exec_test(_job)
+
+    def exec_max_outstanding_sweep(self, job: AxiPerfTesterTestJob, max_outstanding_values: List[int]) -> List[AxiPerfTesterTestReport]:
+        """
+        Run the job repeatedly with a different limit of outstanding transactions for all channels
+        (e.g. to collect latency-vs-queue-depth curves without re-synthesis).
+
+        :return: list of reports, one for each value from max_outstanding_values
+        """
+        reports = []
+        for max_outstanding in max_outstanding_values:
+            _job = deepcopy(job)
+            for ch in _job.channel_config:
+                ch.addr_gen.max_outstanding = max_outstanding
+            reports.append(self.exec_test(_job))
+
+        return reports
+
+    @staticmethod
+    def rate_to_hw(transactions_per_clk: float) -> int:
+        """
+        Convert the rate of transactions per clock cycle to a format of rate register (fixed point)
+        """
+        assert 0 <= transactions_per_clk, transactions_per_clk
+        v = int(round(transactions_per_clk * (1 << RWPatternGenerator.RATE_FRAC_WIDTH)))
+        assert v <= mask(32), ("Rate too large", transactions_per_clk)
+        return v
+
+    @staticmethod
+    def gap_param_for_mean(gap_mode: RWPatternGenerator.GAP_MODE, mean_gap: float) -> int:
+        """
+        Resolve the value of gap_param register for random gap generator which results in specified mean gap
+        between transactions (in clock cycles)
+        """
+        assert mean_gap >= 0, mean_gap
+        rnd_max = 1 << RWPatternGenerator.GAP_RANDOM_WIDTH
+        if gap_mode == RWPatternGenerator.GAP_MODE.GEOMETRIC:
+            # probability of release in each clock cycle
+            return max(1, min(rnd_max, int(round(rnd_max / (mean_gap + 1)))))
+        elif gap_mode == RWPatternGenerator.GAP_MODE.UNIFORM:
+            v = int(round(2 * mean_gap + 1))
+            assert v < rnd_max, ("Mean gap too large", mean_gap)
+            return v
+        else:
+            raise ValueError("Gap mode does not have a mean gap parameter", gap_mode)
+
+    def exec_offered_load_sweep(self, job: AxiPerfTesterTestJob, rates: List[float], rate_burst=1) -> List[AxiPerfTesterTestReport]:
+        """
+        Run the job repeatedly with a different rate of generated transactions for all channels
+        (open-loop offered load, e.g. to find the saturation point of the memory controller from latency-vs-load curve).
+
+        :param rates: rates in transactions per clock cycle, 0 means no limit
+        :param rate_burst: maximal number of transactions which may be generated at once after idle period
+        :return: list of reports, one for each value from rates
+        """
+        reports = []
+        for rate in rates:
+            _job = deepcopy(job)
+            for ch in _job.channel_config:
+                ch.addr_gen.rate = self.rate_to_hw(rate)
+                ch.addr_gen.rate_burst = rate_burst
+            reports.append(self.exec_test(_job))
+
+        return reports
+
+    def exec_id_cnt_sweep(self, job: AxiPerfTesterTestJob, id_cnt_values: List[int]) -> List[AxiPerfTesterTestReport]:
+        """
+        Run the job repeatedly in :attr:`TimeDurationStorage.MODE.IN_ORDER_MULTI_ID` mode
+        with a different number of used ids for all channels (e.g. to see how the throughput scales with the number of ids).
+
+        :return: list of reports, one for each value from id_cnt_values
+        """
+        reports = []
+        for id_cnt in id_cnt_values:
+            _job = deepcopy(job)
+            for ch in _job.channel_config:
+                ch.addr_gen.ordering_mode = TimeDurationStorage.MODE.IN_ORDER_MULTI_ID
+                ch.addr_gen.id_cnt = id_cnt
+            reports.append(self.exec_test(_job))
+
+        return reports
+
+    def exec_dram_mapping_test(self, job: AxiPerfTesterTestJob, layout: DramAddrLayout) -> Dict[str, AxiPerfTesterTestReport]:
+        """
+        Run row-hit, row-miss and bank-conflict jobs derived from the job (:see: :func:`dram_mapping_jobs`)
+        in order to resolve the timing of the memory controller for a given DRAM address layout.
+
+        :return: dictionary test name -> report
+        """
+        if not self.config_loaded:
+            self._load_config()
+
+        ag = job.channel_config[0].addr_gen
+        trans_size = (ag.trans_len + 1) * self.data_width // 8
+        return {
+            name: self.exec_test(_job)
+            for name, _job in dram_mapping_jobs(job, layout, trans_size).items()
+        }
+
+    def exec_trace_test(self, job: AxiPerfTesterTestJob, records: List[AxiPerfTesterTraceRecord],
+                        trace_base: int) -> AxiPerfTesterTestReport:
+        """
+        Copy the trace to memory at trace_base and replay it (the rw pattern and address generator config
+        of the job is not used, the statistic config is).
+
+        :param trace_base: address of the trace in memory accessed by trace_axi master of the component,
+            should be aligned to the size of the burst of the trace reader
+        """
+        _job = deepcopy(job)
+        self.write_mem(trace_base, trace_to_bytes(records))
+        _job.trace_base = trace_base
+        _job.trace_items = len(records)
+        return self.exec_test(_job)
+
     def read32(self, addr: int) -> int:
         return int.from_bytes(self.read(addr, 4), 'little')
 
@@ -285,3 +876,10 @@ class AxiPerfTesterCtl():
 
     def write(self, addr:int, size:int, data:int):
         raise NotImplementedError("Override in your implementation")
+
+    def write_mem(self, addr:int, data: bytes):
+        """
+        Write data to the memory which is accessed by the component (not to the address space of the component),
+        used to upload the trace for trace replay.
+        """
+        raise NotImplementedError("Override in your implementation")
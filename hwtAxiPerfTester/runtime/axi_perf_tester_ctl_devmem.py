@@ -40,3 +40,11 @@ class AxiPerfTesterCtlDevmem(AxiPerfTesterCtl):
 
             addr += word_size
             data >>= word_size * 8
+
+    def write_mem(self, addr:int, data: bytes):
+        # :note: devmem accesses physical address space
+        word_size = self.word_size
+        assert addr % word_size == 0 and len(data) % word_size == 0, (addr, len(data))
+        for i in range(0, len(data), word_size):
+            d = int.from_bytes(data[i:i + word_size], "little")
+            subprocess.check_output([self.devmem, f"0x{addr + i:x}", 'w', f"0x{d:x}"])
@@ -1,8 +1,10 @@
-from typing import Tuple, List
+from typing import Dict, Tuple, List, Optional
 
 from hwtAxiPerfTester.transaction_generator import TransactionGenerator
 from hwtAxiPerfTester.rw_pattern_generator import RWPatternGenerator
 from hwtAxiPerfTester.time_duration_storage import TimeDurationStorage
+from hwtLib.amba.constants import BURST_INCR, CACHE_DEFAULT, QOS_DEFAULT
+from pyMathBitPrecise.bit_utils import mask
 
 
 class PrimitiveJsonObject():
@@ -27,6 +29,33 @@ class AxiPerfTesterAddrGenConfig():
     :ivar addr_mode: :see: :class:`AddressGenerator.MODE`
     :ivar addr_offset: final offset of address
     :ivar trans_len: starting length of transaction (0 = 1 word, 1=2words, ...)
+    :ivar max_outstanding: maximal number of transactions executed and not completed at once,
+        0 means no limit (limited only by 2**ID_WIDTH)
+    :ivar id_cnt: number of ids used in :attr:`TimeDurationStorage.MODE.IN_ORDER_MULTI_ID` ordering mode
+        (at most MULTI_ID_CNT)
+    :ivar rate: max number of generated transactions per clock cycle, fixed point number
+        with :attr:`RWPatternGenerator.RATE_FRAC_WIDTH` fractional bits, 0 means no limit
+        (:see: :meth:`AxiPerfTesterCtl.rate_to_hw`)
+    :ivar rate_burst: max number of transactions which can be generated at once (size of the token bucket)
+    :ivar gap_mode: source of the delay after transaction :see: :class:`RWPatternGenerator.GAP_MODE`
+    :ivar gap_param: parameter of random gap distribution (:see: :meth:`AxiPerfTesterCtl.gap_param_for_mean`)
+    :ivar stride_inner_step: address step of inner loop for :attr:`TransactionGenerator.MODE.STRIDE_2D`
+    :ivar stride_inner_cnt: number of transactions in inner loop
+    :ivar stride_outer_step: address step of outer loop (applied on start address of inner loop)
+    :ivar stride_outer_cnt: number of iterations of outer loop before the address returns to addr
+    :ivar rand_seed: initial state of the random generator for :attr:`TransactionGenerator.MODE.RANDOM`
+        (:see: :func:`hwtAxiPerfTester.runtime.addr_gen_model.random_addr_sequence`)
+    :ivar rand_align_mask: lower bits of the random address which are set to 0 (e.g. transaction size - 1)
+    :ivar stream_base: base address of each stream for :attr:`TransactionGenerator.MODE.STREAM_ROUND_ROBIN`
+        and :attr:`TransactionGenerator.MODE.STREAM_PATTERN` (at most ADDR_STREAM_CNT items, missing are 0)
+    :ivar stream_step: address step of each stream
+    :ivar stream_mask: mask of offset from the base of each stream
+    :ivar burst: AXI burst type of transactions (BURST_FIXED, BURST_INCR, BURST_WRAP from hwtLib.amba.constants),
+        note that BURST_WRAP requires transactions of 2, 4, 8 or 16 beats
+    :ivar size: AXI size of transactions (log2 of number of bytes in beat), None means the full data width,
+        smaller values produce narrow transfers
+    :ivar cache: AXI cache attributes (AxCACHE) of transactions
+    :ivar qos: AXI QoS value (AxQOS) of transactions
     """
 
     def __init__(self):
@@ -41,6 +70,25 @@ class AxiPerfTesterAddrGenConfig():
         self.trans_len_step = 0
         self.trans_len_mask = 1
         self.trans_len_mode = TransactionGenerator.MODE.MODULO
+        self.max_outstanding = 0
+        self.id_cnt = 1
+        self.rate = 0
+        self.rate_burst = 1
+        self.gap_mode = RWPatternGenerator.GAP_MODE.PATTERN
+        self.gap_param = 0
+        self.stride_inner_step = 64
+        self.stride_inner_cnt = 1
+        self.stride_outer_step = 0
+        self.stride_outer_cnt = 1
+        self.rand_seed = 1
+        self.rand_align_mask = 0
+        self.stream_base: List[int] = []
+        self.stream_step: List[int] = []
+        self.stream_mask: List[int] = []
+        self.burst = BURST_INCR
+        self.size: Optional[int] = None
+        self.cache = CACHE_DEFAULT
+        self.qos = QOS_DEFAULT
 
 
 class AxiPerfTesterChannelConfig():
@@ -52,18 +100,66 @@ class AxiPerfTesterChannelConfig():
 
 
 class AxiPerfTesterStatConfig():
+    """
+    :ivar histogram_keys: boundaries between bins of latency histogram
+    :ivar occupancy_histogram_keys: boundaries between bins of histogram of outstanding transaction count,
+        if empty the bins are [0, 1, ..., HISTOGRAM_ITEMS - 2, >= HISTOGRAM_ITEMS - 1]
+    :ivar reorder_histogram_keys: boundaries between bins of histogram of reorder distance
+        (completion index - issue index, signed), if empty each of the bins around 0 corresponds to a single value
+    :ivar bandwidth_window: size of window (in clock cycles) in which data beats are counted
+        for the bandwidth histogram, 0 means disabled
+    :ivar bandwidth_histogram_keys: boundaries between bins of histogram of data beats per window,
+        if empty the bins have the same width and cover 0 to bandwidth_window
+    :ivar first_beat_histogram_keys: boundaries between bins of histogram of time to the first data beat
+        (only if HAS_FIRST_BEAT_STATS), if empty histogram_keys are used
+    :ivar warmup_cnt: number of first completed transactions which are excluded from statistics
+        (they are still counted in dispatched_cntr)
+    :ivar trigger_threshold: if not 0 the first latency larger than this value freezes last_values
+        after trigger_post_cnt next values, so the last_values contain the values around this latency
+        (:see: :meth:`AxiPerfTesterTestChannelReport.get_trigger_context`)
+    :ivar trigger_post_cnt: number of values stored in last_values after the value which caused the trigger
+        (should be smaller than LAST_VALUES_ITEMS)
+    """
 
     def __init__(self):
         self.histogram_keys:List[int] = []
+        self.occupancy_histogram_keys:List[int] = []
+        self.reorder_histogram_keys:List[int] = []
+        self.bandwidth_window = 0
+        self.bandwidth_histogram_keys:List[int] = []
+        self.first_beat_histogram_keys:List[int] = []
+        self.warmup_cnt = 0
+        self.trigger_threshold = 0
+        self.trigger_post_cnt = 0
 
 
 class AxiPerfTesterTestJob():
+    """
+    :ivar rw_mode: :see: :class:`RWPatternGenerator.MODE`
+    :ivar duration: number of clock cycles after which the generators are stopped in :attr:`RWPatternGenerator.MODE.DURATION`
+        (the credit of the channels should be set large enough to not run out before)
+    :ivar trace_base: address of the trace in memory, if not None the transactions are replayed from the trace
+        instead of the generators (:see: :meth:`AxiPerfTesterCtl.exec_trace_test`)
+    :ivar trace_items: number of records in the trace
+    :ivar raw_lag: the read channel in :attr:`TransactionGenerator.MODE.READ_AFTER_WRITE` addr_mode targets the address
+        of the write transaction raw_lag transactions back (1 = the last one, at most RAW_HISTORY_ITEMS),
+        the read waits until there is such a transaction (the rw_mode can not be :attr:`RWPatternGenerator.MODE.SYNC`)
+    :ivar conflict_mask: address bits which are compared with the addresses of the last RAW_HISTORY_ITEMS
+        write transactions to resolve if the completed read transaction is conflicting
+        (e.g. all bits for the same address, bank bits for the same DRAM bank)
+    :ivar channel_config: config for read and write channel of each port (r, w, r1, w1, ...),
+        the number of ports has to match the PORT_CNT of the component
+    """
 
-    def __init__(self):
+    def __init__(self, port_cnt=1):
         self.rw_mode = RWPatternGenerator.MODE.SYNC
-        self.channel_config: Tuple[AxiPerfTesterChannelConfig, AxiPerfTesterChannelConfig] = (
-            AxiPerfTesterChannelConfig(),
-            AxiPerfTesterChannelConfig(),
+        self.duration = 0
+        self.trace_base: Optional[int] = None
+        self.trace_items = 0
+        self.raw_lag = 0
+        self.conflict_mask = mask(32)
+        self.channel_config: Tuple[AxiPerfTesterChannelConfig, ...] = tuple(
+            AxiPerfTesterChannelConfig() for _ in range(2 * port_cnt)
         )
 
 
@@ -75,12 +171,13 @@ class AxiPerfTesterTestReport():
         (use time from the channel directly for better time precission).
     :note: Start time is set to be 0 when test is executed
     :note: End time is stored in data for specific channel
+    :ivar channel: report for read and write channel of each port (r, w, r1, w1, ...)
     """
 
-    def __init__(self):
+    def __init__(self, channel_cnt=2):
         self.time = 0
-        self.channel: Tuple[AxiPerfTesterTestChannelReport, AxiPerfTesterTestChannelReport] = (
-            AxiPerfTesterTestChannelReport(), AxiPerfTesterTestChannelReport()
+        self.channel: Tuple[AxiPerfTesterTestChannelReport, ...] = tuple(
+            AxiPerfTesterTestChannelReport() for _ in range(channel_cnt)
         )
 
     def to_json(self):
@@ -104,6 +201,40 @@ class AxiPerfTesterTestChannelReport(PrimitiveJsonObject):
     :ivar histogram_counters: values of histogram
     :ivar last_values: n last values (cyclyc buffer, last item is on position input_cnt % last_values_items)
     :ivar last_time: time of last data arrival, used to determine total duration of batch
+    :ivar warmup_excluded: number of transactions excluded from statistics (min_val, max_val, sum_val, input_cnt, histogram, last_values)
+        because of warmup
+    :ivar occupancy_histogram_counters: histogram of outstanding transaction count sampled in every clock cycle
+    :ivar occupancy_max: maximum number of outstanding transactions
+    :ivar reorder_histogram_counters: histogram of reorder distance (completion index - issue index) of transactions
+    :ivar reorder_cnt: number of transactions which did not complete on the position in which they were issued
+    :ivar triggered: True if the capture of last_values was triggered (:see: :class:`AxiPerfTesterStatConfig`)
+    :ivar trigger_post_cnt: number of values stored in last_values after the value which caused the trigger
+    :ivar trigger_time: completion time of the transaction which caused the trigger
+    :ivar trigger_index: index (input_cnt) of the value which caused the trigger
+    :ivar bandwidth_window: size of window (in clock cycles) for bandwidth histogram
+    :ivar bandwidth_histogram_counters: histogram of data beats per window (bandwidth distribution),
+        only complete windows are counted, bandwidth_* are present only if HAS_BANDWIDTH_STATS
+    :ivar bandwidth_min: minimal number of data beats in window
+    :ivar bandwidth_max: maximal number of data beats in window
+    :ivar first_beat_histogram_counters: histogram of time from the address handshake to the first data beat
+        (R for read, W for write), the other latency values are measured to the last beat (R) or to the write response (B),
+        first_beat_* are present only if HAS_FIRST_BEAT_STATS
+    :ivar first_beat_last_values: n last values of time to the first data beat (cyclic buffer)
+    :ivar first_beat_min_val: min time to the first data beat
+    :ivar first_beat_max_val: max time to the first data beat
+    :ivar first_beat_sum_val: sum of times to the first data beat
+    :ivar first_beat_input_cnt: number of transactions in first_beat_* statistic
+    :ivar top_k: transactions with the largest latency sorted from the largest,
+        dictionaries {"latency", "time" (of completion), "addr", "id"} (only if TOP_K_ITEMS > 0)
+    :ivar conflict_histogram_counters: latency histogram of the read transactions which conflicted
+        with one of the last write transactions (:see: :attr:`AxiPerfTesterTestJob.conflict_mask`),
+        the keys are the same as for the latency histogram,
+        conflict_* are present only for the read channel and only if RAW_HISTORY_ITEMS > 0
+    :ivar conflict_last_values: n last latencies of conflicting transactions (cyclic buffer)
+    :ivar conflict_min_val: min latency of conflicting transactions
+    :ivar conflict_max_val: max latency of conflicting transactions
+    :ivar conflict_sum_val: sum of latencies of conflicting transactions
+    :ivar conflict_input_cnt: number of conflicting transactions
     """
 
     def __init__(self):
@@ -117,6 +248,76 @@ class AxiPerfTesterTestChannelReport(PrimitiveJsonObject):
         self.sum_val = 0
         self.input_cnt = 0
         self.last_time = 0
+        self.warmup_excluded = 0
+        self.occupancy_histogram_counters: List[int] = []
+        self.occupancy_histogram_keys: List[int] = []
+        self.occupancy_max = 0
+        self.reorder_histogram_counters: List[int] = []
+        self.reorder_histogram_keys: List[int] = []
+        self.reorder_cnt = 0
+        self.bandwidth_window = 0
+        self.bandwidth_histogram_counters: List[int] = []
+        self.bandwidth_histogram_keys: List[int] = []
+        self.bandwidth_min = 0
+        self.bandwidth_max = 0
+        self.first_beat_histogram_counters: List[int] = []
+        self.first_beat_histogram_keys: List[int] = []
+        self.first_beat_last_values: List[int] = []
+        self.first_beat_min_val = 0
+        self.first_beat_max_val = 0
+        self.first_beat_sum_val = 0
+        self.first_beat_input_cnt = 0
+        self.triggered = False
+        self.trigger_post_cnt = 0
+        self.trigger_time = 0
+        self.trigger_index = 0
+        self.top_k: List[Dict[str, int]] = []
+        self.conflict_histogram_counters: List[int] = []
+        self.conflict_histogram_keys: List[int] = []
+        self.conflict_last_values: List[int] = []
+        self.conflict_min_val = 0
+        self.conflict_max_val = 0
+        self.conflict_sum_val = 0
+        self.conflict_input_cnt = 0
+
+    def get_trigger_context(self) -> Tuple[List[int], int]:
+        """
+        :return: tuple (values from last_values in the order of arrival, position of the value which caused the trigger)
+            or ([], -1) if not triggered
+        """
+        if not self.triggered:
+            return [], -1
+        items = len(self.last_values)
+        # index of the last written value
+        end = min(self.input_cnt - 1, self.trigger_index + self.trigger_post_cnt)
+        start = max(0, end - items + 1)
+        values = [self.last_values[i % items] for i in range(start, end + 1)]
+        return values, self.trigger_index - start
+
+    def get_non_conflict_stats(self) -> Tuple[List[int], int, int]:
+        """
+        :return: tuple (histogram_counters, input_cnt, sum_val) of transactions which were not conflicting,
+            resolved as a difference of all and conflicting transactions
+
+        :note: The warmup is applied separately on the conflicting transactions, because of this
+            the result is exact only if warmup_cnt is 0.
+        """
+        histogram_counters = [a - c for a, c in zip(self.histogram_counters, self.conflict_histogram_counters)]
+        return (histogram_counters,
+                self.input_cnt - self.conflict_input_cnt,
+                self.sum_val - self.conflict_sum_val)
+
+    def get_bandwidth_distribution(self, bytes_per_beat: int) -> List[Tuple[float, float, int]]:
+        """
+        :return: for each bin of bandwidth histogram tuple (bandwidth from, bandwidth to (exclusive), number of windows),
+            the bandwidth is in bytes per clock cycle
+        """
+        if not self.bandwidth_window:
+            return []
+        edges = [0, *self.bandwidth_histogram_keys, self.bandwidth_window + 1]
+        to_bw = bytes_per_beat / self.bandwidth_window
+        return [(lo * to_bw, hi * to_bw, cnt)
+                for lo, hi, cnt in zip(edges, edges[1:], self.bandwidth_histogram_counters)]
 
 
 if __name__ == "__main__":
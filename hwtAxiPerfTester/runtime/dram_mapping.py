@@ -0,0 +1,78 @@
+from copy import deepcopy
+from typing import Tuple, Dict
+
+from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterTestJob
+from hwtAxiPerfTester.transaction_generator import TransactionGenerator
+from pyMathBitPrecise.bit_utils import mask
+
+
+class DramAddrLayout():
+    """
+    Position of column, bank and row bits in the address as it is mapped by memory controller to DRAM.
+
+    :ivar column_bits: tuple (offset, width), bits under the offset are bytes in a single column access (burst)
+    :ivar bank_bits: tuple (offset, width), (bank group and bank bits, if they are continuous)
+    :ivar row_bits: tuple (offset, width)
+    """
+
+    def __init__(self, column_bits: Tuple[int, int], bank_bits: Tuple[int, int], row_bits: Tuple[int, int]):
+        self.column_bits = column_bits
+        self.bank_bits = bank_bits
+        self.row_bits = row_bits
+        used = 0
+        for offset, width in (column_bits, bank_bits, row_bits):
+            assert offset >= 0 and width > 0, (offset, width)
+            m = mask(width) << offset
+            assert used & m == 0, ("Address fields overlap", column_bits, bank_bits, row_bits)
+            used |= m
+
+    def addr_mask(self) -> int:
+        """
+        :return: mask of the address which covers all fields
+        """
+        return mask(max(o + w for o, w in (self.column_bits, self.bank_bits, self.row_bits)))
+
+
+def dram_mapping_jobs(job: AxiPerfTesterTestJob, layout: DramAddrLayout, trans_size: int,
+                      max_loop_cnt=64) -> Dict[str, AxiPerfTesterTestJob]:
+    """
+    Generate jobs with :attr:`TransactionGenerator.MODE.STRIDE_2D` address pattern which access DRAM in a specific way
+    (the job is used as a template for everything else than address generator)
+
+    * row_hit: all transactions access columns in a single row of a single bank
+    * row_miss: each transaction accesses a different bank and a row in the bank changes in each round over banks
+    * bank_conflict: each transaction accesses a different row of the same bank
+
+    :param trans_size: size of a single transaction in bytes
+    :param max_loop_cnt: limit for the number of the iterations of a stride loop
+    :return: dictionary test name -> job
+    """
+    col_offset, col_width = layout.column_bits
+    bank_offset, bank_width = layout.bank_bits
+    row_offset, row_width = layout.row_bits
+
+    col_step = max(trans_size, 1 << col_offset)
+    col_cnt = max(1, min((1 << (col_offset + col_width)) // col_step, max_loop_cnt))
+    bank_cnt = min(1 << bank_width, max_loop_cnt)
+    row_cnt = min(1 << row_width, max_loop_cnt)
+
+    # (inner_step, inner_cnt, outer_step, outer_cnt)
+    strides = {
+        "row_hit": (col_step, col_cnt, 0, 1),
+        "row_miss": (1 << bank_offset, bank_cnt, 1 << row_offset, row_cnt),
+        "bank_conflict": (1 << row_offset, row_cnt, col_step, col_cnt),
+    }
+    jobs = {}
+    for name, (inner_step, inner_cnt, outer_step, outer_cnt) in strides.items():
+        _job = deepcopy(job)
+        for ch in _job.channel_config:
+            ag = ch.addr_gen
+            ag.addr_mode = TransactionGenerator.MODE.STRIDE_2D
+            ag.addr_mask = layout.addr_mask()
+            ag.stride_inner_step = inner_step
+            ag.stride_inner_cnt = inner_cnt
+            ag.stride_outer_step = outer_step
+            ag.stride_outer_cnt = outer_cnt
+        jobs[name] = _job
+
+    return jobs
@@ -0,0 +1,199 @@
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterTestJob, \
+    AxiPerfTesterTestReport
+from hwtAxiPerfTester.runtime.dram_mapping import DramAddrLayout
+from hwtAxiPerfTester.runtime.stream_model import model_job
+from pyMathBitPrecise.bit_utils import mask
+
+
+class DramTiming():
+    """
+    Timing parameters of DRAM and its controller in clock cycles of the tester
+
+    :ivar tRCD: activate to read/write command delay
+    :ivar tRP: precharge command period
+    :ivar tCL: read command to the first data (CAS latency)
+    :ivar tCWL: write command to the first data
+    :ivar tBEAT: number of clock cycles for which the data bus is occupied by a single beat of AXI transaction
+    :ivar tREFI: refresh interval (0 = refresh is not modeled)
+    :ivar tRFC: refresh cycle time (all banks are blocked and all rows are closed after refresh)
+    :ivar controller_latency: constant latency of the controller and interconnect (request and response path)
+    """
+
+    def __init__(self, tRCD=14, tRP=14, tCL=14, tCWL=10, tBEAT=1, tREFI=0, tRFC=0, controller_latency=10):
+        self.tRCD = tRCD
+        self.tRP = tRP
+        self.tCL = tCL
+        self.tCWL = tCWL
+        self.tBEAT = tBEAT
+        self.tREFI = tREFI
+        self.tRFC = tRFC
+        self.controller_latency = controller_latency
+
+
+def _segmented_max_accumulate(v: np.ndarray, group_start: np.ndarray) -> np.ndarray:
+    """
+    np.maximum.accumulate which restarts at each index where group_start is True
+    """
+    if v.size == 0:
+        return v
+    gid = np.cumsum(group_start)
+    span = int(v.max()) - int(v.min()) + 1
+    # shift groups to disjoint ranges so the maximum from previous groups never wins
+    shifted = (v - v.min()) + gid * span
+    return np.maximum.accumulate(shifted) - gid * span + v.min()
+
+
+class DramModel():
+    """
+    Analytic model of DRAM with an open page policy which predicts the latency of transactions
+    (as it is measured by :class:`hwtAxiPerfTester.axi_perf_tester.AxiPerfTester`).
+
+    Each bank serves its transactions in the order of issue and the column command waits for a precharge (row conflict)
+    and/or activate (row closed) of the bank. Data of all transactions are transferred over a single data bus in
+    the order of issue. Both stages are evaluated in max-plus algebra on whole arrays
+    (f_i = max(x_i, f_{i-1}) + s_i is computed as cumsum(s) + maximum.accumulate(x - exclusive cumsum(s))).
+
+    :note: The refresh is resolved from the time of the issue of the transaction.
+    :ivar layout: position of bank and row bits in the address
+    :ivar timing: timing parameters of DRAM
+    :ivar addr_map: function addr -> (bank, row) if the mapping can not be described by :class:`DramAddrLayout`
+        (e.g. with bank XOR hashing)
+    """
+
+    def __init__(self, layout: DramAddrLayout, timing: DramTiming,
+                 addr_map: Optional[Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]]=None):
+        self.layout = layout
+        self.timing = timing
+        self.addr_map = addr_map
+
+    def bank_row(self, addr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.addr_map is not None:
+            return self.addr_map(addr)
+
+        addr = addr.astype(np.uint64)
+        res = []
+        for offset, width in (self.layout.bank_bits, self.layout.row_bits):
+            res.append(((addr >> np.uint64(offset)) & np.uint64(mask(width))).astype(np.int64))
+        return tuple(res)
+
+    def latency(self, transactions: np.ndarray, issue_time: Optional[np.ndarray]=None,
+                issue_interval=1) -> np.ndarray:
+        """
+        :param transactions: array of :data:`hwtAxiPerfTester.runtime.stream_model.TRANSACTION_DTYPE`
+            sorted by the time of issue
+        :param issue_time: time of issue of each transaction, if None it is slot * issue_interval
+            (the generator releases a transaction each issue_interval clock cycles, pattern delays, rate limits
+            and max_outstanding are not considered)
+        :return: array of latencies (clock cycles from the address handshake to the last data/write response)
+        """
+        t = self.timing
+        if issue_time is None:
+            a = transactions["slot"].astype(np.int64) * issue_interval
+        else:
+            a = np.asarray(issue_time, dtype=np.int64)
+        n = a.size
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        bank, row = self.bank_row(transactions["addr"])
+        is_write = transactions["channel"] == 1
+
+        if t.tREFI:
+            phase = a % t.tREFI
+            refresh_stall = np.where(phase < t.tRFC, t.tRFC - phase, 0)
+            epoch = a // t.tREFI
+        else:
+            refresh_stall = np.zeros(n, dtype=np.int64)
+            epoch = np.zeros(n, dtype=np.int64)
+
+        # bank stage, transactions of each bank in the order of issue
+        if bank.max() < 2 ** 16:
+            # numpy uses radix sort for stable sort of small integers
+            order = np.argsort(bank.astype(np.uint16), kind="stable")
+        else:
+            order = np.argsort(bank, kind="stable")
+        b = bank[order]
+        r = row[order]
+        e = epoch[order]
+        group_start = np.ones(n, dtype=bool)
+        group_start[1:] = b[1:] != b[:-1]
+        row_closed = group_start.copy()
+        # the refresh closes all rows
+        row_closed[1:] |= e[1:] != e[:-1]
+        row_hit = np.zeros(n, dtype=bool)
+        row_hit[1:] = r[1:] == r[:-1]
+        penalty = np.where(row_closed, t.tRCD, np.where(row_hit, 0, t.tRP + t.tRCD)).astype(np.int64)
+
+        P = np.cumsum(penalty)
+        group_base = np.maximum.accumulate(np.where(group_start, P - penalty, 0))
+        P -= group_base
+        P_excl = P - penalty
+        x = (a + refresh_stall)[order]
+        col_cmd = np.empty(n, dtype=np.int64)
+        col_cmd[order] = P + _segmented_max_accumulate(x - P_excl, group_start)
+
+        # data bus stage, in the order of issue
+        data_ready = col_cmd + np.where(is_write, t.tCWL, t.tCL)
+        beats = transactions["len"].astype(np.int64) + 1
+        B = np.cumsum(beats * t.tBEAT)
+        B_excl = B - beats * t.tBEAT
+        data_done = B + np.maximum.accumulate(data_ready - B_excl)
+
+        return data_done - a + t.controller_latency
+
+    def expected_histograms(self, job: AxiPerfTesterTestJob, rw_pattern_items: int,
+                            issue_interval=1, **model_job_kwargs) -> List[np.ndarray]:
+        """
+        Predict the latency histogram of each channel of the job in the bins specified by
+        :attr:`AxiPerfTesterStatConfig.histogram_keys` (the warmup transactions are excluded as in hardware)
+
+        :param model_job_kwargs: :see: :func:`hwtAxiPerfTester.runtime.stream_model.model_job`
+        """
+        trans = model_job(job, rw_pattern_items, **model_job_kwargs)
+        lat = self.latency(trans, issue_interval=issue_interval)
+        res = []
+        for ch_i, ch in enumerate(job.channel_config):
+            ch_lat = lat[trans["channel"] == ch_i][ch.stat_config.warmup_cnt:]
+            res.append(latency_histogram(ch_lat, ch.stat_config.histogram_keys))
+        return res
+
+
+def latency_histogram(latency: np.ndarray, keys: List[int]) -> np.ndarray:
+    """
+    :return: counters of histogram in the same format as :class:`hwtAxiPerfTester.histogram.HistogramDynamic`
+        (bin i counts values keys[i - 1] <= v < keys[i], first bin is < keys[0], last >= keys[-1])
+    """
+    bins = np.searchsorted(np.asarray(keys, dtype=np.int64), latency, side="right")
+    return np.bincount(bins, minlength=len(keys) + 1)
+
+
+def histogram_deviation(measured: List[int], expected: List[int]) -> float:
+    """
+    :return: total variation distance between normalized histograms (0 = same distribution, 1 = disjoint)
+    """
+    m = np.asarray(measured, dtype=np.float64)
+    e = np.asarray(expected, dtype=np.float64)
+    assert m.shape == e.shape, (m.shape, e.shape)
+    m_sum = m.sum()
+    e_sum = e.sum()
+    if m_sum == 0 or e_sum == 0:
+        return 0.0 if m_sum == e_sum else 1.0
+    return float(np.abs(m / m_sum - e / e_sum).sum() / 2)
+
+
+def deviating_channels(rep: AxiPerfTesterTestReport, expected: List[np.ndarray],
+                       max_deviation=0.1) -> List[Tuple[int, float]]:
+    """
+    :param expected: :see: :meth:`DramModel.expected_histograms`
+    :return: list of (channel index, deviation) for channels where the measured latency histogram
+        deviates from the model more than max_deviation (:see: :func:`~.histogram_deviation`)
+    """
+    res = []
+    for ch_i, (ch, e) in enumerate(zip(rep.channel, expected)):
+        d = histogram_deviation(ch.histogram_counters, e)
+        if d > max_deviation:
+            res.append((ch_i, d))
+    return res
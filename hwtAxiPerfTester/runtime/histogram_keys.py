@@ -0,0 +1,99 @@
+from typing import List, Optional
+
+from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterTestChannelReport
+from pyMathBitPrecise.bit_utils import mask
+
+
+class HISTOGRAM_KEY_SPACING:
+    """
+    :cvar LINEAR: bins of the same width
+    :cvar LOG: width of bins grows exponentially (for long tails)
+    :cvar QUANTILE: each bin has approximately the same number of values (according to the histogram of a probe run)
+    """
+    LINEAR = 0
+    LOG = 1
+    QUANTILE = 2
+
+
+def _strictly_increasing(keys: List[float], lo: int) -> List[int]:
+    """
+    Round the keys and make them strictly increasing (bins can not be narrower than 1 clock cycle)
+    """
+    res = []
+    prev = lo
+    for k in keys:
+        k = max(int(round(k)), prev + 1)
+        res.append(k)
+        prev = k
+    assert prev <= mask(32), ("Keys out of range", res)
+    return res
+
+
+def linear_histogram_keys(lo: int, hi: int, key_cnt: int) -> List[int]:
+    """
+    :param lo: the smallest value
+    :param hi: the largest value + 1
+    :return: keys which split [lo, hi) to key_cnt + 1 bins of the same width
+    """
+    step = (hi - lo) / (key_cnt + 1)
+    return _strictly_increasing([lo + step * (i + 1) for i in range(key_cnt)], lo)
+
+
+def log_histogram_keys(lo: int, hi: int, key_cnt: int) -> List[int]:
+    """
+    :return: keys which split [lo, hi) to key_cnt + 1 bins where each bin is wider by the same ratio
+    """
+    _lo = max(lo, 1)
+    ratio = (max(hi, _lo + 1) / _lo) ** (1 / (key_cnt + 1))
+    return _strictly_increasing([_lo * ratio ** (i + 1) for i in range(key_cnt)], lo)
+
+
+def quantile_histogram_keys(probe_keys: List[int], probe_counters: List[int], lo: int, hi: int,
+                            key_cnt: int) -> List[int]:
+    """
+    :param probe_keys: keys of the histogram from probe run
+    :param probe_counters: counters of the histogram from probe run
+    :return: keys which split [lo, hi) to key_cnt + 1 bins with approximately the same number of values
+        (values are expected to be uniformly distributed in each bin of the probe histogram)
+    """
+    assert len(probe_counters) == len(probe_keys) + 1, (len(probe_counters), len(probe_keys))
+    total = sum(probe_counters)
+    if total == 0:
+        return linear_histogram_keys(lo, hi, key_cnt)
+
+    edges = [lo, *(min(max(k, lo), hi) for k in probe_keys), hi]
+    keys = []
+    bin_i = 0
+    cdf = 0
+    for i in range(key_cnt):
+        q = total * (i + 1) / (key_cnt + 1)
+        while bin_i < len(probe_counters) - 1 and cdf + probe_counters[bin_i] < q:
+            cdf += probe_counters[bin_i]
+            bin_i += 1
+        c = probe_counters[bin_i]
+        b_lo, b_hi = edges[bin_i], edges[bin_i + 1]
+        keys.append(b_lo + (b_hi - b_lo) * ((q - cdf) / c if c else 1))
+
+    return _strictly_increasing(keys, lo)
+
+
+def auto_histogram_keys(probe: AxiPerfTesterTestChannelReport, key_cnt: int,
+                        spacing=HISTOGRAM_KEY_SPACING.LOG) -> Optional[List[int]]:
+    """
+    Resolve histogram keys for a channel from the report of a probe run (min_val, max_val and the histogram)
+
+    :return: list of keys or None if the probe run does not contain any value
+    """
+    if probe.input_cnt == 0:
+        return None
+
+    lo = probe.min_val
+    hi = probe.max_val + 1
+    if spacing == HISTOGRAM_KEY_SPACING.LINEAR:
+        return linear_histogram_keys(lo, hi, key_cnt)
+    elif spacing == HISTOGRAM_KEY_SPACING.LOG:
+        return log_histogram_keys(lo, hi, key_cnt)
+    elif spacing == HISTOGRAM_KEY_SPACING.QUANTILE:
+        return quantile_histogram_keys(probe.histogram_keys, probe.histogram_counters, lo, hi, key_cnt)
+    else:
+        raise ValueError("Invalid spacing", spacing)
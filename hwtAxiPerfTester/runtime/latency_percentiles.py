@@ -0,0 +1,92 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterTestChannelReport, \
+    AxiPerfTesterTestReport
+
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _valid_last_values(ch: AxiPerfTesterTestChannelReport) -> List[int]:
+    """
+    :return: values from last_values buffer which were actually written
+    """
+    return ch.last_values[:min(ch.input_cnt, len(ch.last_values))]
+
+
+def estimate_percentiles(channels: Sequence[AxiPerfTesterTestChannelReport],
+                         percentiles: Sequence[float]=DEFAULT_PERCENTILES) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Estimate latency percentiles from the histogram and last_values of channel reports.
+
+    The histogram gives the exact number of values in each bin (and min_val/max_val narrow the first and last bin),
+    so the bin which contains the percentile is known exactly and its boundaries are the error bounds.
+    The position in the bin is interpolated on the empirical distribution of last_values samples which fall
+    into this bin (bin boundaries are used as the first and the last point),
+    if there are not any samples, the values in the bin are expected to be uniformly distributed.
+
+    :param channels: reports of channels from a components with the same HISTOGRAM_ITEMS and LAST_VALUES_ITEMS
+    :param percentiles: percentiles to estimate (0-100)
+    :return: tuple (estimate, lower bound, upper bound) of arrays of shape (len(channels), len(percentiles)),
+        NaN for channels without any value
+    """
+    R = len(channels)
+    counters = np.array([ch.histogram_counters for ch in channels], dtype=np.int64).reshape(R, -1)
+    keys = np.array([ch.histogram_keys for ch in channels], dtype=np.int64).reshape(R, -1)
+    min_val = np.array([ch.min_val for ch in channels], dtype=np.int64)
+    max_val = np.array([ch.max_val for ch in channels], dtype=np.int64)
+    L = max([len(ch.last_values) for ch in channels], default=0)
+    samples = np.full((R, L + 1), np.inf)
+    for i, ch in enumerate(channels):
+        v = _valid_last_values(ch)
+        samples[i, :len(v)] = v
+    samples.sort(axis=1)
+
+    # bin boundaries (inclusive) with the first and the last bin narrowed by min/max
+    lo_edges = np.concatenate([min_val[:, None], keys], axis=1)
+    hi_edges = np.concatenate([keys - 1, max_val[:, None]], axis=1)
+    lo_edges = np.clip(lo_edges, min_val[:, None], max_val[:, None])
+    hi_edges = np.clip(hi_edges, min_val[:, None], max_val[:, None])
+
+    total = counters.sum(axis=1)
+    cdf = np.cumsum(counters, axis=1)
+    # 1-based rank of the percentile value in sorted values
+    rank = np.maximum(np.ceil(total[:, None] * np.asarray(percentiles, dtype=np.float64)[None, :] / 100), 1)
+    bin_i = np.minimum((cdf[:, None, :] < rank[:, :, None]).sum(axis=2), counters.shape[1] - 1)
+    lower = np.take_along_axis(lo_edges, bin_i, axis=1).astype(np.float64)
+    upper = np.take_along_axis(hi_edges, bin_i, axis=1).astype(np.float64)
+    bin_cnt = np.take_along_axis(counters, bin_i, axis=1)
+    before = np.take_along_axis(cdf, bin_i, axis=1) - bin_cnt
+    frac = (rank - before) / np.maximum(bin_cnt, 1)
+
+    # samples in the bin are samples[first:first + k]
+    first = (samples[:, None, :] < lower[:, :, None]).sum(axis=2)
+    k = (samples[:, None, :] <= upper[:, :, None]).sum(axis=2) - first
+    # piecewise linear interpolation over points [lower, *samples, upper], each segment has the same probability
+    t = frac * (k + 1)
+    seg = np.minimum(np.floor(t).astype(np.int64), k)
+    seg_frac = t - seg
+    padded = np.concatenate([samples, np.full((R, 1), np.inf)], axis=1)
+    left = np.where(seg == 0, lower, np.take_along_axis(padded, np.maximum(first + seg - 1, 0), axis=1))
+    right = np.where(seg == k, upper, np.take_along_axis(padded, np.minimum(first + seg, L + 1), axis=1))
+    estimate = np.clip(left + (right - left) * seg_frac, lower, upper)
+
+    empty = total == 0
+    for a in (estimate, lower, upper):
+        a[empty] = np.nan
+    return estimate, lower, upper
+
+
+def report_percentiles(rep: AxiPerfTesterTestReport, percentiles: Sequence[float]=DEFAULT_PERCENTILES
+                       ) -> List[Dict[float, Tuple[float, float, float]]]:
+    """
+    :see: :func:`~.estimate_percentiles`
+    :return: for each channel a dictionary percentile -> (estimate, lower bound, upper bound)
+    """
+    estimate, lower, upper = estimate_percentiles(rep.channel, percentiles)
+    return [
+        {p: (float(estimate[ch_i, p_i]), float(lower[ch_i, p_i]), float(upper[ch_i, p_i]))
+         for p_i, p in enumerate(percentiles)}
+        for ch_i in range(len(rep.channel))
+    ]
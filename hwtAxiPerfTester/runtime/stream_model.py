@@ -0,0 +1,244 @@
+from typing import Callable, Tuple
+import zlib
+
+import numpy as np
+
+from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterChannelConfig, \
+    AxiPerfTesterTestJob
+from hwtAxiPerfTester.rw_pattern_generator import RWPatternGenerator
+from hwtAxiPerfTester.lfsr import xorshift_next, xorshift_width
+from hwtAxiPerfTester.transaction_generator import TransactionGenerator
+from pyMathBitPrecise.bit_utils import mask
+
+# the stream of transactions of the job, :see: :func:`~.model_job`
+TRANSACTION_DTYPE = np.dtype([
+    ("channel", np.uint8),  # 0 = read, 1 = write
+    ("addr", np.uint64),
+    ("len", np.uint16),
+    ("slot", np.uint64),  # index of the pattern item (step of the channel credit counter) which issued the transaction
+])
+
+
+class Gf2AffineMap():
+    """
+    Function x -> L(x) ^ c where L is linear over GF(2) (e.g. CRC of a word or xorshift step)
+    which can be evaluated on numpy arrays using a lookup table for each byte of x.
+    """
+
+    def __init__(self, tables: np.ndarray, const: int):
+        self.tables = tables
+        self.const = np.uint64(const)
+
+    @classmethod
+    def from_fn(cls, fn: Callable[[int], int], width: int) -> "Gf2AffineMap":
+        """
+        Resolve the map from a python function by evaluating it for 0 and each bit
+        """
+        const = fn(0)
+        cols = [fn(1 << i) ^ const for i in range(width)]
+        return cls._from_columns(np.array(cols, dtype=np.uint64), width, const)
+
+    @classmethod
+    def _from_columns(cls, cols: np.ndarray, width: int, const: int) -> "Gf2AffineMap":
+        byte_cnt = (width + 7) // 8
+        cols = np.concatenate([cols, np.zeros(byte_cnt * 8 - width, dtype=np.uint64)])
+        v = np.arange(256, dtype=np.uint64)
+        tables = np.zeros((byte_cnt, 256), dtype=np.uint64)
+        for b in range(byte_cnt):
+            for i in range(8):
+                tables[b] ^= np.where((v >> np.uint64(i)) & np.uint64(1), cols[b * 8 + i], np.uint64(0))
+        return cls(tables, const)
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        # bytes of x (little endian)
+        x_bytes = np.ascontiguousarray(x, dtype="<u8").view(np.uint8).reshape(-1, 8)
+        res = self.tables[0][x_bytes[:, 0]]
+        for b in range(1, self.tables.shape[0]):
+            res ^= self.tables[b][x_bytes[:, b]]
+        res ^= self.const
+        return res.reshape(x.shape)
+
+    def compose(self, other: "Gf2AffineMap") -> "Gf2AffineMap":
+        """
+        :return: map x -> self(other(x))
+        """
+        width = self.tables.shape[0] * 8
+        basis = np.concatenate([
+            np.zeros(1, dtype=np.uint64),
+            np.uint64(1) << np.arange(width, dtype=np.uint64)
+        ])
+        vals = self(other(basis))
+        const = int(vals[0])
+        return self._from_columns(vals[1:] ^ np.uint64(const), width, const)
+
+
+def gf2_affine_sequence(fn: Callable[[int], int], width: int, x0: int, n: int) -> np.ndarray:
+    """
+    :return: array [x0, fn(x0), fn(fn(x0)), ...] of length n where fn is affine over GF(2)
+        (computed by repeated doubling of the already known part of the sequence)
+    """
+    res = np.empty(n, dtype=np.uint64)
+    filled = min(n, 64)
+    x = x0
+    for i in range(filled):
+        res[i] = x
+        x = fn(x)
+
+    f = Gf2AffineMap.from_fn(fn, width)
+    # f_pow = fn^filled
+    f_pow = f
+    for _ in range(filled.bit_length() - 1):
+        f_pow = f_pow.compose(f_pow)
+
+    while filled < n:
+        m = min(filled, n - filled)
+        res[filled:filled + m] = f_pow(res[:m])
+        filled += m
+        if filled < n:
+            f_pow = f_pow.compose(f_pow)
+
+    return res
+
+
+def _crc32(width: int):
+    """
+    :return: function which is equal to CrcComb(CRC_32) with DATA_WIDTH=width
+    """
+    assert width % 8 == 0, width
+    return lambda x: zlib.crc32(x.to_bytes(width // 8, "little"))
+
+
+def _crc8(x: int) -> int:
+    """
+    Equal to CrcComb(CRC_8) with DATA_WIDTH=8
+    """
+    crc = 0
+    for i in range(7, -1, -1):
+        if ((x >> i) & 1) ^ (crc >> 7):
+            crc = ((crc << 1) & 0xff) ^ 0xD5
+        else:
+            crc = (crc << 1) & 0xff
+    return crc
+
+
+def model_channel(ch: AxiPerfTesterChannelConfig, slot_cnt: int, rw_pattern_items: int,
+                  addr_width=32, len_width=8, addr_stream_cnt=4) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Model the transactions which are generated by :class:`RWPatternGenerator` and
+    :class:`TransactionGenerator` for a single channel.
+
+    :param slot_cnt: number of pattern items which are read by the pattern generator
+        (the channel credit or the credit of the read channel in :attr:`RWPatternGenerator.MODE.SYNC`)
+    :return: tuple of arrays (addr, len, slot)
+    """
+    ag = ch.addr_gen
+    assert len(ch.pattern) == rw_pattern_items, (len(ch.pattern), rw_pattern_items)
+    p_addr = np.array([a for a, _, _ in ch.pattern], dtype=np.uint64)
+    p_en = np.array([en for _, _, en in ch.pattern], dtype=bool)
+
+    # the pattern RAM is addressed by the credit counter which counts down
+    slot = np.arange(slot_cnt, dtype=np.uint64)
+    idx = (np.uint64(ag.credit % rw_pattern_items + rw_pattern_items) - slot % np.uint64(rw_pattern_items)) % np.uint64(rw_pattern_items)
+    en = p_en[idx]
+    slot = slot[en]
+    idx = idx[en]
+    n = slot.size
+    k = np.arange(n, dtype=np.uint64)
+
+    m_addr = np.uint64(mask(addr_width))
+    addr_mask = np.uint64(ag.addr_mask & mask(addr_width))
+    addr_offset = np.uint64(ag.addr_offset & mask(addr_width))
+    MODE = TransactionGenerator.MODE
+    mode = ag.addr_mode
+    if mode == MODE.MODULO:
+        addr = (np.uint64(ag.addr) + k * np.uint64(ag.addr_step)) & m_addr
+        addr = (addr & addr_mask) + addr_offset
+    elif mode == MODE.CRC:
+        addr = gf2_affine_sequence(_crc32(addr_width), addr_width, ag.addr & mask(addr_width), n)
+        addr = (addr & addr_mask) + addr_offset
+    elif mode == MODE.EXACT:
+        addr = (p_addr[idx] & addr_mask) + addr_offset
+    elif mode == MODE.RANDOM:
+        seed = ag.rand_seed & mask(addr_width)
+        rnd_width = xorshift_width(addr_width)
+        rnd = gf2_affine_sequence(lambda x: xorshift_next(x, rnd_width), rnd_width, seed if seed else 1, n)
+        addr = (rnd & m_addr & addr_mask & ~np.uint64(ag.rand_align_mask & mask(addr_width))) + addr_offset
+    elif mode == MODE.STRIDE_2D:
+        inner_cnt = np.uint64(max(ag.stride_inner_cnt, 1))
+        outer_cnt = np.uint64(max(ag.stride_outer_cnt, 1))
+        addr = np.uint64(ag.addr) \
+            + ((k // inner_cnt) % outer_cnt) * np.uint64(ag.stride_outer_step) \
+            + (k % inner_cnt) * np.uint64(ag.stride_inner_step)
+        addr = (addr & m_addr & addr_mask) + addr_offset
+    elif mode in (MODE.STREAM_ROUND_ROBIN, MODE.STREAM_PATTERN):
+        S = addr_stream_cnt
+
+        def stream_param(name):
+            v = getattr(ag, name)
+            return np.array([v[i] if i < len(v) else 0 for i in range(S)], dtype=np.uint64)
+
+        base, step, stream_mask = stream_param("stream_base"), stream_param("stream_step"), stream_param("stream_mask")
+        if mode == MODE.STREAM_ROUND_ROBIN:
+            s = k % np.uint64(S)
+            j = k // np.uint64(S)
+        else:
+            # :see: log2ceil in TransactionGenerator
+            s = p_addr[idx] & np.uint64(mask(max(1, (S - 1).bit_length())))
+            if s.size and s.max() >= S:
+                raise ValueError("Pattern selects non-existing stream", int(s.max()), S)
+            j = np.empty(n, dtype=np.uint64)
+            for i in range(S):
+                m = s == i
+                j[m] = np.arange(np.count_nonzero(m), dtype=np.uint64)
+        addr = base[s] + ((j * step[s]) & m_addr & stream_mask[s]) + addr_offset
+    else:
+        raise ValueError("Invalid addr_mode", mode)
+    addr &= m_addr
+
+    m_len = mask(len_width)
+    len_mask = np.uint64(ag.trans_len_mask & m_len)
+    mode = ag.trans_len_mode
+    if mode == MODE.MODULO:
+        _len = ((np.uint64(ag.trans_len) + k * np.uint64(ag.trans_len_step)) & np.uint64(m_len)) & len_mask
+    elif mode == MODE.CRC:
+        assert len_width == 8, len_width
+        _len = gf2_affine_sequence(_crc8, len_width, ag.trans_len & m_len, n) & len_mask
+    elif mode == MODE.EXACT:
+        _len = np.full(n, ag.trans_len & m_len, dtype=np.uint64) & len_mask
+    else:
+        raise ValueError("Invalid trans_len_mode", mode)
+
+    return addr, _len.astype(np.uint16), slot
+
+
+def model_job(job: AxiPerfTesterTestJob, rw_pattern_items: int,
+              addr_width=32, len_width=8, addr_stream_cnt=4) -> np.ndarray:
+    """
+    Predict the addresses and lengths of transactions generated by the job (without running it).
+
+    :note: In :attr:`RWPatternGenerator.MODE.INDEPENDENT` and :attr:`RWPatternGenerator.MODE.DURATION`
+        the number of transactions depends on timing, the model generates transactions for the whole credit
+        of the channel (upper bound).
+    :return: array of :data:`~.TRANSACTION_DTYPE` sorted by slot and channel
+    """
+    assert job.trace_base is None, "Trace replay is not modeled, the trace is the stream of transactions"
+    cols = []
+    for ch_i, ch in enumerate(job.channel_config):
+        if job.rw_mode == RWPatternGenerator.MODE.SYNC:
+            slot_cnt = job.channel_config[0].addr_gen.credit
+        else:
+            slot_cnt = ch.addr_gen.credit
+        addr, _len, slot = model_channel(ch, slot_cnt, rw_pattern_items,
+                                         addr_width=addr_width, len_width=len_width,
+                                         addr_stream_cnt=addr_stream_cnt)
+        cols.append((np.full(addr.size, ch_i, dtype=np.uint8), addr, _len, slot))
+
+    # :note: sorting of plain arrays is much faster than sorting of a structured array
+    channel, addr, _len, slot = (np.concatenate(c) for c in zip(*cols))
+    order = np.argsort(slot, kind="stable")
+    res = np.empty(slot.size, dtype=TRANSACTION_DTYPE)
+    res["channel"] = channel[order]
+    res["addr"] = addr[order]
+    res["len"] = _len[order]
+    res["slot"] = slot[order]
+    return res
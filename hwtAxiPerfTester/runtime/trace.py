@@ -0,0 +1,63 @@
+import struct
+from typing import List
+
+
+class AxiPerfTesterTraceRecord():
+    """
+    A single transaction of the trace for :class:`hwtAxiPerfTester.trace_reader.TraceReader`
+
+    :ivar rw: 0 for read, 1 for write transaction
+    :ivar addr: address of the transaction
+    :ivar len: length of the transaction (0 = 1 word, 1=2words, ...)
+    :ivar delay: number of clock cycles to wait after this transaction before the next transaction is released
+    """
+
+    def __init__(self, rw: int, addr: int, len: int=0, delay: int=0):
+        self.rw = rw
+        self.addr = addr
+        self.len = len
+        self.delay = delay
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__:s} {'rw'[self.rw]:s} 0x{self.addr:x} len:{self.len:d} delay:{self.delay:d}>"
+
+
+# :see: TraceReader.record_t
+TRACE_RECORD_SIZE = 8
+
+
+def trace_to_bytes(records: List[AxiPerfTesterTraceRecord]) -> bytes:
+    """
+    Serialize the records to a format of the trace in memory (:attr:`TraceReader.record_t`)
+    """
+    res = []
+    for r in records:
+        assert r.rw in (0, 1), r
+        assert 0 <= r.len <= 0xff, r
+        assert 0 <= r.delay <= 0xffff, r
+        res.append(struct.pack("<IHBB", r.addr, r.delay, r.len, r.rw))
+
+    return b"".join(res)
+
+
+def load_trace_file(file_name: str) -> List[AxiPerfTesterTraceRecord]:
+    """
+    Load the trace from a text file with a transaction on each line in format "<r|w> <addr> [<len> [<delay>]]"
+    (numbers can be also in 0x hexadecimal format, empty lines and lines starting with # are ignored)
+    """
+    records = []
+    with open(file_name) as f:
+        for line_i, line in enumerate(f):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            items = line.split()
+            if len(items) < 2 or len(items) > 4 or items[0].lower() not in ("r", "w"):
+                raise ValueError(f"{file_name:s}:{line_i + 1:d}: invalid record format", line)
+
+            rw = int(items[0].lower() == "w")
+            addr, _len, delay = (int(v, 0) for v in items[1:] + ["0"] * (4 - len(items)))
+            records.append(AxiPerfTesterTraceRecord(rw, addr, _len, delay))
+
+    return records
@@ -0,0 +1,203 @@
+from collections import Counter
+from typing import List, Tuple, Sequence, Optional
+
+from hwtAxiPerfTester.runtime.data_containers import AxiPerfTesterChannelConfig, \
+    AxiPerfTesterTestJob
+from hwtAxiPerfTester.runtime.trace import AxiPerfTesterTraceRecord
+from hwtAxiPerfTester.rw_pattern_generator import RWPatternGenerator
+from hwtAxiPerfTester.transaction_generator import TransactionGenerator
+from pyMathBitPrecise.bit_utils import mask
+
+# (addr, len, delay after transaction on this channel)
+_TraceItem = Tuple[int, int, int]
+
+
+class TraceCompilationReport():
+    """
+    Information about how faithfully the compiled channel config reproduces the trace
+
+    :ivar addr_mode: :attr:`TransactionGenerator.MODE.MODULO` if a constant stride was found
+        else :attr:`TransactionGenerator.MODE.EXACT`
+    :ivar trans_cnt: number of transactions of the channel in the trace
+    :ivar period: number of pattern items which are repeated by the compiled config
+        (the period of the trace if it divides the number of pattern items,
+        else trans_cnt or the number of pattern items if the trace does not fit to the pattern)
+    :ivar addr_match: number of transactions with the same address as in the trace
+    :ivar len_match: number of transactions with the same length as in the trace
+    :ivar delay_match: number of transactions with the same delay after transaction as in the trace
+    :ivar delay_abs_error: sum of absolute differences of delays in clock cycles
+    """
+
+    def __init__(self):
+        self.addr_mode = TransactionGenerator.MODE.EXACT
+        self.trans_cnt = 0
+        self.period = 0
+        self.addr_match = 0
+        self.len_match = 0
+        self.delay_match = 0
+        self.delay_abs_error = 0
+
+    def is_exact(self) -> bool:
+        """
+        :return: True if the compiled config reproduces the trace exactly
+        """
+        return self.addr_match == self.len_match == self.delay_match == self.trans_cnt
+
+    def fidelity(self) -> float:
+        """
+        :return: ratio of transactions which are reproduced exactly (1.0 = all)
+        """
+        if self.trans_cnt == 0:
+            return 1.0
+        return min(self.addr_match, self.len_match, self.delay_match) / self.trans_cnt
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__:s} addr_mode:{self.addr_mode:d} trans_cnt:{self.trans_cnt:d}"
+                f" period:{self.period:d} addr_match:{self.addr_match:d} len_match:{self.len_match:d}"
+                f" delay_match:{self.delay_match:d} delay_abs_error:{self.delay_abs_error:d}>")
+
+
+def trace_channel_items(records: List[AxiPerfTesterTraceRecord], rw: int) -> List[_TraceItem]:
+    """
+    Select transactions of a single channel from the trace and convert the delay between consecutive records
+    in trace to the delay between transactions of this channel (the generator releases at most one transaction
+    per clock cycle and channel)
+    """
+    res = []
+    last_time = None
+    time = 0
+    for r in records:
+        if r.rw == rw:
+            if res:
+                addr, _len, _ = res[-1]
+                res[-1] = (addr, _len, time - last_time - 1)
+            res.append((r.addr, r.len, 0))
+            last_time = time
+        time += 1 + r.delay
+
+    return res
+
+
+def _item_eq(a: Tuple[int, Optional[int]], b: Tuple[int, Optional[int]]):
+    """
+    Compare (addr, delay) items where delay None matches any delay
+    """
+    return a[0] == b[0] and (a[1] is None or b[1] is None or a[1] == b[1])
+
+
+def _find_period(seq: Sequence[Tuple[int, Optional[int]]], max_period: int) -> int:
+    """
+    :return: the smallest period which divides max_period and with which the sequence repeats, 0 if there is not any
+    """
+    for p in range(1, min(len(seq), max_period) + 1):
+        if max_period % p == 0 and all(_item_eq(seq[i], seq[i - p]) for i in range(p, len(seq))):
+            return p
+    return 0
+
+
+def _pattern_index(k: int, credit: int, rw_pattern_items: int):
+    """
+    :return: index of pattern item used for k-th transaction
+        (the pattern RAM is addressed by credit counter which counts down)
+    """
+    return (credit - k) % rw_pattern_items
+
+
+def compile_trace_channel(items: List[_TraceItem], rw_pattern_items: int,
+                          addr_width=32) -> Tuple[AxiPerfTesterChannelConfig, TraceCompilationReport]:
+    """
+    Compile transactions of a single channel to a config of the rw pattern and address generator.
+    A constant address stride is mapped to :attr:`TransactionGenerator.MODE.MODULO` and only delays are stored
+    in the pattern, otherwise the addresses are stored in the pattern and :attr:`TransactionGenerator.MODE.EXACT`
+    is used. If the sequence does not fit to the pattern RAM only its beginning is stored
+    and it is repeated.
+
+    :param items: list of (addr, len, delay) :see: :func:`~.trace_channel_items`
+    """
+    ch = AxiPerfTesterChannelConfig()
+    ag = ch.addr_gen
+    rep = TraceCompilationReport()
+    n = rep.trans_cnt = ag.credit = len(items)
+    addr_mask = mask(addr_width)
+    # :see: RWPatternGenerator.en_ram_item_t.delay
+    max_delay = mask(16)
+    addrs = [a for a, _, _ in items]
+    delays = [min(d, max_delay) for _, _, d in items]
+
+    strides = set((addrs[i + 1] - addrs[i]) & addr_mask for i in range(n - 1))
+    if n and len(strides) <= 1:
+        ag.addr_mode = TransactionGenerator.MODE.MODULO
+        ag.addr = addrs[0]
+        ag.addr_step = strides.pop() if strides else 0
+        seq = [(0, d) for d in delays]
+    else:
+        ag.addr_mode = TransactionGenerator.MODE.EXACT
+        ag.addr = 0
+        ag.addr_step = 0
+        seq = list(zip(addrs, delays))
+    if seq:
+        # the delay after the last transaction does not matter
+        seq[-1] = (seq[-1][0], None)
+    rep.addr_mode = ag.addr_mode
+    ag.addr_mask = addr_mask
+    ag.addr_offset = 0
+
+    lens = Counter(_len for _, _len, _ in items)
+    ag.trans_len = lens.most_common(1)[0][0] if lens else 0
+    ag.trans_len_step = 0
+    ag.trans_len_mask = mask(8)
+    ag.trans_len_mode = TransactionGenerator.MODE.EXACT
+    ag.gap_mode = RWPatternGenerator.GAP_MODE.PATTERN
+
+    period = _find_period(seq, rw_pattern_items)
+    if period == 0:
+        # does not fit, repeat the beginning
+        period = min(n, rw_pattern_items)
+    rep.period = period
+    pattern = [(0, 0, 1) for _ in range(rw_pattern_items)]
+    for k in range(rw_pattern_items):
+        if period:
+            addr, delay = seq[k % period]
+            if delay is None:
+                delay = 0
+            pattern[_pattern_index(k, n, rw_pattern_items)] = (addr, delay, 1)
+    ch.pattern = pattern
+
+    # check the result against the trace
+    for k, (addr, _len, delay) in enumerate(items):
+        p_addr, p_delay, _ = pattern[_pattern_index(k, n, rw_pattern_items)]
+        if ag.addr_mode == TransactionGenerator.MODE.MODULO:
+            p_addr = (ag.addr + k * ag.addr_step) & addr_mask
+        rep.addr_match += p_addr == addr
+        rep.len_match += (ag.trans_len & ag.trans_len_mask) == _len
+        if k == n - 1:
+            # delay after the last transaction does not matter
+            rep.delay_match += 1
+        else:
+            rep.delay_match += p_delay == delay
+            rep.delay_abs_error += abs(p_delay - delay)
+
+    return ch, rep
+
+
+def compile_trace(records: List[AxiPerfTesterTraceRecord], rw_pattern_items: int,
+                  addr_width=32) -> Tuple[AxiPerfTesterTestJob, Tuple[TraceCompilationReport, TraceCompilationReport]]:
+    """
+    Compile the trace to a job for the rw pattern and address generators (for the case where the trace replay
+    is not available, :see: :meth:`AxiPerfTesterCtl.exec_trace_test`).
+    The channels run independently and the timing of read/write transactions in the trace is converted
+    to the delays between transactions of the same channel.
+
+    :return: tuple (job, reports for read and write channel)
+    """
+    job = AxiPerfTesterTestJob()
+    job.rw_mode = RWPatternGenerator.MODE.INDEPENDENT_TO_COMPLETION
+    reports = []
+    channel_config = []
+    for rw in (0, 1):
+        ch, rep = compile_trace_channel(trace_channel_items(records, rw), rw_pattern_items, addr_width=addr_width)
+        channel_config.append(ch)
+        reports.append(rep)
+
+    job.channel_config = tuple(channel_config)
+    return job, tuple(reports)
@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 from hwt.code import Switch, If, Concat
+from hwt.code_utils import rename_signal
 from hwt.hdl.types.bits import Bits
 from hwt.hdl.types.defs import BIT
 from hwt.hdl.types.struct import HStruct
@@ -12,6 +13,7 @@ from hwt.math import log2ceil
 from hwt.synthesizer.param import Param
 from hwt.synthesizer.rtlLevel.rtlSyncSignal import RtlSyncSignal
 from hwt.synthesizer.unit import Unit
+from hwtAxiPerfTester.lfsr import Xorshift
 from hwtLib.handshaked.builder import HsBuilder
 from hwtLib.handshaked.ramAsHs import RamAsHs
 from hwtLib.handshaked.streamNode import StreamNode
@@ -25,6 +27,10 @@ class RWPatternGenerator(Unit):
     This component is based on several RAMs which can be read synchronusly or independendently for each channel.
     Each word in ram corresponds to action for this channel. By populating of this RAM any R/W pattern of constrained period
     can be generated.
+    Additionally each channel has a token bucket rate limiter which limits the rate of generated transactions
+    to a rate tokens per clock cycle (fixed point number with RATE_FRAC_WIDTH fractional bits)
+    with max burst of rate_burst transactions. Rate 0 disables the limiter.
+    The delay between transactions may be also generated randomly using :class:`~.Xorshift`, :see: :class:`~.RWPatternGenerator.GAP_MODE`.
 
     .. figure:: ./_static/RWPatternGenerator.png
 
@@ -32,8 +38,34 @@ class RWPatternGenerator(Unit):
     """
 
     class MODE:
+        """
+        :cvar SYNC: both channels are enabled at once and stop when credit is exhausted
+        :cvar INDEPENDENT: each channel runs independently but both stop when the first one exhausts its credit
+        :cvar INDEPENDENT_TO_COMPLETION: each channel runs independently until it exhausts its own credit
+        :cvar DURATION: same as INDEPENDENT_TO_COMPLETION but both channels also stop when time >= duration
+        """
         SYNC = 0
         INDEPENDENT = 1
+        INDEPENDENT_TO_COMPLETION = 2
+        DURATION = 3
+
+    class GAP_MODE:
+        """
+        Select the source of delay after transaction on the channel.
+
+        :cvar PATTERN: delay is taken from the pattern RAM item
+        :cvar GEOMETRIC: the transaction is released in every clock cycle with probability gap_param / 2**16
+            (Bernoulli process, geometric distribution of the gap with mean 2**16 / gap_param - 1 clock cycles)
+        :cvar UNIFORM: delay is uniformly distributed in [0, gap_param) (gap_param < 2**16)
+        """
+        PATTERN = 0
+        GEOMETRIC = 1
+        UNIFORM = 2
+
+    # number of fractional bits of the rate register
+    RATE_FRAC_WIDTH = 16
+    # number of bits of random number used for gap generator
+    GAP_RANDOM_WIDTH = 16
 
     def _config(self):
         self.ITEMS = Param(1024)
@@ -45,7 +77,11 @@ class RWPatternGenerator(Unit):
         addClkRstn(self)
         self.en = RegCntrl()
         self.en.DATA_WIDTH = 1
-        self.mode = Signal()
+        self.mode = Signal(Bits(2))
+        self.time = Signal(Bits(self.COUNTER_WIDTH))
+        # time limit for MODE.DURATION
+        self.duration = RegCntrl()
+        self.duration.DATA_WIDTH = self.COUNTER_WIDTH
 
         self.en_ram_item_t = HStruct(
             (Bits(32), "addr"),  # optional address for transaction (could be used by address generator)
@@ -64,12 +100,112 @@ class RWPatternGenerator(Unit):
         for c in [self.r_credit, self.w_credit]:
             c.DATA_WIDTH = self.COUNTER_WIDTH
 
+        self.r_rate = RegCntrl()
+        self.w_rate = RegCntrl()
+        self.r_rate_burst = RegCntrl()
+        self.w_rate_burst = RegCntrl()
+        for c in [self.r_rate, self.w_rate, self.r_rate_burst, self.w_rate_burst]:
+            c.DATA_WIDTH = 32
+
+        self.r_gap_mode = RegCntrl()
+        self.w_gap_mode = RegCntrl()
+        for c in [self.r_gap_mode, self.w_gap_mode]:
+            c.DATA_WIDTH = 2
+        self.r_gap_param = RegCntrl()
+        self.w_gap_param = RegCntrl()
+        for c in [self.r_gap_param, self.w_gap_param]:
+            c.DATA_WIDTH = 32
+
         self.r_en = Handshaked()._m()
         self.w_en = Handshaked()._m()
         for i in [self.r_en, self.w_en]:
             i.DATA_WIDTH = self.ADDR_WIDTH
 
-    def _construct_pattern_ram(self, cntr: RtlSyncSignal, name:str, en_reg, en_out: Handshaked):
+    def _construct_rate_limiter(self, name: str, rate_io: RegCntrl, rate_burst_io: RegCntrl, en_out: Handshaked):
+        """
+        Construct a token bucket which is filled by rate in every clock cycle up to rate_burst transactions
+        and each transaction on en_out consumes a single token.
+
+        :return: the flag which tells that the en_out can be send
+        """
+        rate_t = Bits(rate_io.DATA_WIDTH)
+        rate = self._reg(f"{name:s}_rate", rate_t, def_val=0)
+        rate_burst = self._reg(f"{name:s}_rate_burst", rate_t, def_val=1)
+        rate_io.din(rate)
+        rate_burst_io.din(rate_burst)
+
+        # +1 bit to avoid overflow before saturation
+        tokens_t = Bits(rate_io.DATA_WIDTH + self.RATE_FRAC_WIDTH + 1)
+        tokens = self._reg(f"{name:s}_tokens", tokens_t, def_val=0)
+        rate_ext = self._sig(f"{name:s}_rate_ext", tokens_t)
+        rate_ext(rate, fit=True)
+        tokens_max = self._sig(f"{name:s}_tokens_max", tokens_t)
+        tokens_max(Concat(rate_burst, Bits(self.RATE_FRAC_WIDTH).from_py(0)), fit=True)
+        token = 1 << self.RATE_FRAC_WIDTH
+
+        tokens_next = self._sig(f"{name:s}_tokens_next", tokens_t)
+        If(en_out.vld & en_out.rd & (rate != 0),
+           tokens_next(tokens + rate_ext - token),
+        ).Else(
+           tokens_next(tokens + rate_ext),
+        )
+
+        If(rate_io.dout.vld | rate_burst_io.dout.vld,
+            If(rate_io.dout.vld,
+               rate(rate_io.dout.data),
+            ),
+            If(rate_burst_io.dout.vld,
+               rate_burst(rate_burst_io.dout.data),
+            ),
+            tokens(0),
+        ).Elif(tokens_next > tokens_max,
+            tokens(tokens_max),
+        ).Else(
+            tokens(tokens_next),
+        )
+
+        return rate._eq(0) | (tokens >= token)
+
+    def _construct_gap_generator(self, name: str, gap_mode_io: RegCntrl, gap_param_io: RegCntrl, rnd_init: int):
+        """
+        Construct a generator of random delay between transactions.
+
+        :note: :class:`~.Xorshift` is used because the consecutive values of a plain shift register generator
+            are shifted versions of each other and the gaps would be correlated
+
+        :return: tuple (gap_mode, flag which tells that the transaction can be released, random delay)
+        """
+        gap_mode = self._reg(f"{name:s}_gap_mode", Bits(gap_mode_io.DATA_WIDTH), def_val=self.GAP_MODE.PATTERN)
+        gap_param = self._reg(f"{name:s}_gap_param", Bits(gap_param_io.DATA_WIDTH), def_val=0)
+        for io, reg in [(gap_mode_io, gap_mode), (gap_param_io, gap_param)]:
+            io.din(reg)
+            If(io.dout.vld,
+               reg(io.dout.data),
+            )
+
+        rnd_gen = Xorshift()
+        rnd_gen.WIDTH = self.GAP_RANDOM_WIDTH
+        rnd_gen.INIT = rnd_init
+        setattr(self, f"{name:s}_gap_rnd_gen", rnd_gen)
+        rnd_gen.en(1)
+        rnd_gen.seed.vld(0)
+        rnd_gen.seed.data(None)
+
+        rnd_t = Bits(2 * self.GAP_RANDOM_WIDTH)
+        rnd = self._sig(f"{name:s}_gap_rnd", rnd_t)
+        rnd(rnd_gen.dataOut, fit=True)
+        gap_param_low = self._sig(f"{name:s}_gap_param_low", rnd_t)
+        gap_param_low(gap_param[self.GAP_RANDOM_WIDTH:], fit=True)
+        # uniform random number in [0, gap_param) = rnd * gap_param / 2**GAP_RANDOM_WIDTH
+        random_gap = (rnd * gap_param_low)[2 * self.GAP_RANDOM_WIDTH:self.GAP_RANDOM_WIDTH]
+
+        release_ok = gap_mode != self.GAP_MODE.GEOMETRIC
+        release_ok = release_ok | (rnd < gap_param)
+
+        return gap_mode, release_ok, random_gap
+
+    def _construct_pattern_ram(self, cntr: RtlSyncSignal, name:str, en_out: Handshaked, release_en,
+                               gap_mode: RtlSyncSignal, random_gap):
         ram = RamSingleClock()
         ram.MAX_BLOCK_DATA_WIDTH = self.MAX_BLOCK_DATA_WIDTH
         ram.HAS_BE = True
@@ -88,23 +224,44 @@ class RWPatternGenerator(Unit):
 
         en = HsBuilder(self, hs.r.data).buff(1, (1, 2)).end
         en_data = en.data._reinterpret_cast(self.en_ram_item_t)
+
+        # number of items which were read from the ram but not yet released to en_out
+        # (they may be held for a long time by the rate limiter or the gap generator)
+        in_flight = self._reg(f"{name:s}_in_flight", Bits(3), def_val=0)
+        addr_ack = hs.r.addr.vld & hs.r.addr.rd
+        item_ack = en.vld & en.rd
+        If(addr_ack & ~item_ack,
+           in_flight(in_flight + 1),
+        ).Elif(~addr_ack & item_ack,
+           in_flight(in_flight - 1),
+        )
         stall_cntr = self._reg(f"{name:s}_stall_cntr",
                                self.en_ram_item_t.field_by_name["delay"].dtype,
                                def_val=0)
         sync = StreamNode(
             [en, ], [en_out],
-            skipWhen={en_out: en.vld & ~en_data.en & en_reg}
+            # :note: disabled items are skipped also if they are released after the credit was exhausted
+            skipWhen={en_out: en.vld & ~en_data.en}
         )
-        sync.sync(stall_cntr._eq(0))
+        sync.sync(stall_cntr._eq(0) & release_en)
         en_out.data(en_data.addr)
 
         If(stall_cntr._eq(0) & sync.ack(),
-           stall_cntr(en_data.delay),
+            Switch(gap_mode)\
+            .Case(self.GAP_MODE.PATTERN,
+                stall_cntr(en_data.delay),
+            ).Case(self.GAP_MODE.GEOMETRIC,
+                stall_cntr(0),
+            ).Case(self.GAP_MODE.UNIFORM,
+                stall_cntr(random_gap, fit=True),
+            ).Default(
+                stall_cntr(None),
+            )
         ).Elif(stall_cntr != 0,
            stall_cntr(stall_cntr - 1)
         )
 
-        return ram, hs, conn
+        return ram, hs, conn, in_flight != 0
 
     def _drive_ram_port(self, master_port: BramPort_withoutClk, ram_port: BramPort_withoutClk):
         word_sel_delayed = self._reg(f"{master_port._name}_word_sel_delayed")
@@ -132,7 +289,6 @@ class RWPatternGenerator(Unit):
 
     def _impl(self):
         en = self._reg("en", def_val=0)
-        self.en.din(en)
 
         # how many transactions left to send
         cntr_t = Bits(self.COUNTER_WIDTH)
@@ -141,17 +297,56 @@ class RWPatternGenerator(Unit):
         self.r_credit.din(credit_r)
         self.w_credit.din(credit_w)
 
-        r_pattern, r_hs, r_ram_conn = self._construct_pattern_ram(credit_r, "r", en, self.r_en)
-        w_pattern, w_hs, w_ram_conn = self._construct_pattern_ram(credit_w, "w", en, self.w_en)
+        r_rate_limit_ok = self._construct_rate_limiter("r", self.r_rate, self.r_rate_burst, self.r_en)
+        w_rate_limit_ok = self._construct_rate_limiter("w", self.w_rate, self.w_rate_burst, self.w_en)
+        r_gap_mode, r_release_ok, r_random_gap = self._construct_gap_generator("r", self.r_gap_mode, self.r_gap_param, 1)
+        w_gap_mode, w_release_ok, w_random_gap = self._construct_gap_generator("w", self.w_gap_mode, self.w_gap_param, 0xACE1)
+        r_pattern, r_hs, r_ram_conn, r_in_flight = self._construct_pattern_ram(
+            credit_r, "r", self.r_en, r_rate_limit_ok & r_release_ok, r_gap_mode, r_random_gap)
+        w_pattern, w_hs, w_ram_conn, w_in_flight = self._construct_pattern_ram(
+            credit_w, "w", self.w_en, w_rate_limit_ok & w_release_ok, w_gap_mode, w_random_gap)
+        # the generator is running until all items read from the pattern ram are released
+        running = rename_signal(self, en | r_in_flight | w_in_flight, "running")
+        self.en.din(running)
 
         sync = StreamNode([], [r_hs.r.addr, w_hs.r.addr])
         sync_r = StreamNode([], [r_hs.r.addr])
         sync_w = StreamNode([], [w_hs.r.addr])
 
-        If(en,
+        duration = self._reg("duration", cntr_t, def_val=0)
+        self.duration.din(duration)
+        If(self.duration.dout.vld,
+           duration(self.duration.dout.data),
+        )
+
+        def run_to_completion(time_ok):
+            # each channel runs until its credit is exhausted (or time_ok is 0)
+            r_active = (credit_r != 0) & time_ok
+            w_active = (credit_w != 0) & time_ok
+            r_ack = r_active & sync_r.ack()
+            w_ack = w_active & sync_w.ack()
+            r_done = ~r_active | (credit_r._eq(1) & r_ack)
+            w_done = ~w_active | (credit_w._eq(1) & w_ack)
+            return [
+                sync_r.sync(r_active),
+                sync_w.sync(w_active),
+                If(r_ack,
+                   credit_r(credit_r - 1),
+                ),
+                If(w_ack,
+                   credit_w(credit_w - 1),
+                ),
+                en(~(r_done & w_done)),
+            ]
+
+        If(running,
             *r_ram_conn,
             *w_ram_conn,
-            If(self.en.dout.vld & ~self.en.dout.data,
+            If(~en,
+                # credit exhausted, waiting for items which are still in flight
+                r_hs.r.addr.vld(0),
+                w_hs.r.addr.vld(0),
+            ).Elif(self.en.dout.vld & ~self.en.dout.data,
                 # premature exit
                 en(0),
                 r_hs.r.addr.vld(0),
@@ -181,6 +376,10 @@ class RWPatternGenerator(Unit):
                        en(credit_w != 1),
                        credit_w(credit_w - 1),
                     ),
+                ).Case(self.MODE.INDEPENDENT_TO_COMPLETION,
+                    run_to_completion(1),
+                ).Case(self.MODE.DURATION,
+                    run_to_completion(self.time < duration),
                 ).Default(
                     r_hs.r.addr.vld(0),
                     w_hs.r.addr.vld(0),
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from hwt.code import If
+from hwt.code import If, Switch
 from hwt.code_utils import rename_signal
 from hwt.hdl.types.bits import Bits
+from hwt.hdl.types.struct import HStruct
 from hwt.interfaces.std import Signal, BramPort_withoutClk, \
     Handshaked, RegCntrl
 from hwt.interfaces.utils import addClkRstn, propagateClkRstn
@@ -11,6 +12,7 @@ from hwt.math import log2ceil, hMin, hMax
 from hwt.serializer.mode import serializeParamsUniq
 from hwt.synthesizer.hObjList import HObjList
 from hwt.synthesizer.param import Param
+from hwt.synthesizer.rtlLevel.rtlSignal import RtlSignal
 from hwt.synthesizer.unit import Unit
 from hwtAxiPerfTester.histogram import HistogramDynamic
 from hwtLib.handshaked.builder import HsBuilder
@@ -22,6 +24,12 @@ class StatisticCollector(Unit):
     """
     This component takes a transaction time as input.
     It stores a histogram, last n values and several other values (min_val, max_val, sum_val, input_cnt, last_time)
+    The first warmup_cnt transactions are not stored, only counted in warmup_excluded.
+    If trigger_threshold != 0 the first value larger than trigger_threshold triggers the capture,
+    its index (input_cnt) and time are stored and the last values stop to be overwritten
+    after next trigger_post_cnt values. The last values then contain the values around the trigger.
+    If TOP_K_ITEMS > 0 the TOP_K_ITEMS largest values are stored together with the completion time, address and id
+    of the transaction (sorted from the largest, the trans_stats data then contains also the id and address).
 
     .. figure:: ./_static/StatisticCollector.png
 
@@ -34,6 +42,8 @@ class StatisticCollector(Unit):
         self.HISTOGRAM_ITEMS:int = Param(32)
         self.LAST_VALUES_ITEMS = Param(4096)
         self.TIME_WIDTH:int = Param(32)
+        self.TOP_K_ITEMS:int = Param(0)
+        self.ADDR_WIDTH:int = Param(32)
 
     def _declr(self) -> None:
         addClkRstn(self)
@@ -41,7 +51,15 @@ class StatisticCollector(Unit):
         self.time = Signal(Bits(self.TIME_WIDTH))
 
         trans_stats = self.trans_stats = Handshaked()
-        trans_stats.DATA_WIDTH = self.TIME_WIDTH
+        if self.TOP_K_ITEMS:
+            # Concat(addr, id, duration)
+            trans_stats.DATA_WIDTH = self.ADDR_WIDTH + self.TRANS_ID_WIDTH + self.TIME_WIDTH
+            # [value, completion time, addr, id] for each item
+            top_k = self.top_k = BramPort_withoutClk()
+            top_k.ADDR_WIDTH = log2ceil(self.TOP_K_ITEMS * 4)
+            top_k.DATA_WIDTH = self.COUNTER_WIDTH
+        else:
+            trans_stats.DATA_WIDTH = self.TIME_WIDTH
 
         k = self.histogram_keys = BramPort_withoutClk()
         c = self.histogram_counters = BramPort_withoutClk()
@@ -49,13 +67,29 @@ class StatisticCollector(Unit):
         c.DATA_WIDTH = k.DATA_WIDTH = self.COUNTER_WIDTH
 
         lv = self.last_values = BramPort_withoutClk()
-        lv.DATA_WIDTH = self.trans_stats.DATA_WIDTH
+        lv.DATA_WIDTH = self.TIME_WIDTH
         lv.ADDR_WIDTH = log2ceil(self.LAST_VALUES_ITEMS - 1)
 
         self.cntr_io = HObjList([RegCntrl() for _ in range(5)])
         for r in self.cntr_io:
             r.DATA_WIDTH = self.COUNTER_WIDTH
 
+        # number of transactions to ignore at the beginning and number of actually ignored transactions
+        self.warmup_cnt = RegCntrl()
+        self.warmup_excluded = RegCntrl()
+        for r in [self.warmup_cnt, self.warmup_excluded]:
+            r.DATA_WIDTH = self.COUNTER_WIDTH
+
+        # capture of last values around the first value > trigger_threshold (0 = disabled),
+        # triggered is 1 after trigger, trigger_index is input_cnt of the value which caused the trigger
+        self.trigger_threshold = RegCntrl()
+        self.trigger_post_cnt = RegCntrl()
+        self.triggered = RegCntrl()
+        self.trigger_time = RegCntrl()
+        self.trigger_index = RegCntrl()
+        for r in [self.trigger_threshold, self.trigger_post_cnt, self.triggered, self.trigger_time, self.trigger_index]:
+            r.DATA_WIDTH = self.COUNTER_WIDTH
+
     def _impl(self) -> None:
         histogram = HistogramDynamic()
         histogram.VALUE_WIDTH = self.TIME_WIDTH
@@ -68,32 +102,52 @@ class StatisticCollector(Unit):
 
         last_values = RamSingleClock()
         last_values.PORT_CNT = 1
-        last_values.DATA_WIDTH = self.trans_stats.DATA_WIDTH
+        last_values.DATA_WIDTH = self.TIME_WIDTH
         last_values.ADDR_WIDTH = log2ceil(self.LAST_VALUES_ITEMS - 1)
         self.last_values_ram = last_values
 
         min_val, max_val, sum_val, input_cnt, last_time = [
              self._reg(n, Bits(self.COUNTER_WIDTH))
-            for n in  ["min_val", "max_val", "sum_val", "input_cnt", "last_time",  # "reorder_cnt"
-                       ]]
+            for n in  ["min_val", "max_val", "sum_val", "input_cnt", "last_time"]]
         regs = [min_val, max_val, sum_val, input_cnt, last_time]
 
+        warmup_cnt, warmup_excluded = [
+            self._reg(n, Bits(self.COUNTER_WIDTH), def_val=0)
+            for n in ["warmup_cnt", "warmup_excluded"]]
+        for c_io, c in [(self.warmup_cnt, warmup_cnt), (self.warmup_excluded, warmup_excluded)]:
+            c_io.din(c)
+
         stats = HsBuilder(self, self.trans_stats).buff(1, (1, 2)).end
         stats.rd(1)
-        histogram.data_in(stats, exclude=[stats.rd])
+        warmup = rename_signal(self, warmup_excluded < warmup_cnt, "warmup")
+        trans_accept = rename_signal(self, stats.vld & self.en & ~warmup, "trans_accept")
+        duration = stats.data[self.TIME_WIDTH:]
+        histogram.data_in.vld(trans_accept)
+        histogram.data_in.data(duration)
         for c_io, c in zip(self.cntr_io, regs):
             c_io.din(c)
 
-        If(rename_signal(self, stats.vld & self.en, "trans_accept"),
-           min_val(hMin(min_val, stats.data)),
-           max_val(hMax(max_val, stats.data)),
-           sum_val(sum_val + stats.data),
+        If(self.warmup_cnt.dout.vld,
+           warmup_cnt(self.warmup_cnt.dout.data),
+        )
+        If(self.warmup_excluded.dout.vld,
+           warmup_excluded(self.warmup_excluded.dout.data),
+        ).Elif(stats.vld & self.en & warmup,
+           warmup_excluded(warmup_excluded + 1),
+        )
+
+        lv_we = self._impl_trigger(trans_accept, duration, input_cnt)
+
+        If(trans_accept,
+           min_val(hMin(min_val, duration)),
+           max_val(hMax(max_val, duration)),
+           sum_val(sum_val + duration),
            input_cnt(input_cnt + 1),
            last_time(self.time),
            last_values.port[0].addr(input_cnt, fit=True),
            last_values.port[0].en(1),
-           last_values.port[0].we(1),
-           last_values.port[0].din(stats.data),
+           last_values.port[0].we(lv_we),
+           last_values.port[0].din(duration),
            self.last_values.dout(None),
         ).Else(
             *(
@@ -104,9 +158,99 @@ class StatisticCollector(Unit):
             ),
             last_values.port[0](self.last_values)
         )
+        if self.TOP_K_ITEMS:
+            self._impl_top_k(trans_accept, stats.data)
 
         propagateClkRstn(self)
 
+    def _impl_trigger(self, trans_accept: RtlSignal, duration: RtlSignal, input_cnt: RtlSignal):
+        """
+        :return: write enable for last values
+        """
+        trigger_threshold, trigger_post_cnt, triggered, trigger_time, trigger_index = [
+            self._reg(n, Bits(self.COUNTER_WIDTH), def_val=0)
+            for n in ["trigger_threshold", "trigger_post_cnt", "triggered", "trigger_time", "trigger_index"]]
+        # number of values which should be still written to last values after trigger
+        post_remaining = self._reg("trigger_post_remaining", Bits(self.COUNTER_WIDTH), def_val=0)
+        regs = [trigger_threshold, trigger_post_cnt, triggered, trigger_time, trigger_index]
+        regs_io = [self.trigger_threshold, self.trigger_post_cnt, self.triggered, self.trigger_time, self.trigger_index]
+        for c_io, c in zip(regs_io, regs):
+            c_io.din(c)
+
+        is_triggered = triggered != 0
+        trigger = rename_signal(
+            self,
+            trans_accept & ~is_triggered & (trigger_threshold != 0) & (duration > trigger_threshold),
+            "trigger")
+        If(trigger,
+           triggered(1),
+           trigger_time(self.time),
+           trigger_index(input_cnt),
+           post_remaining(trigger_post_cnt),
+        ).Else(
+            *(
+                If(c_io.dout.vld,
+                   c(c_io.dout.data)
+                )
+                for c_io, c in zip(regs_io, regs)
+            ),
+            If(trans_accept & is_triggered & (post_remaining != 0),
+               post_remaining(post_remaining - 1),
+            )
+        )
+
+        return ~is_triggered | (post_remaining != 0)
+
+    def _impl_top_k(self, trans_accept: RtlSignal, trans_stats: RtlSignal):
+        """
+        Registers with the largest values sorted from the largest, a new value is inserted on a position
+        of the first smaller value and the following items are shifted
+        """
+        item_t = HStruct(
+            (Bits(self.TIME_WIDTH), "val"),
+            (Bits(self.TIME_WIDTH), "time"),
+            (Bits(self.ADDR_WIDTH), "addr"),
+            (Bits(self.TRANS_ID_WIDTH), "id"),
+        )
+        items = [self._reg(f"top_{i:d}", item_t, def_val={"val": 0}) for i in range(self.TOP_K_ITEMS)]
+        regs = [r for item in items for r in (item.val, item.time, item.addr, item.id)]
+
+        duration = trans_stats[self.TIME_WIDTH:]
+        new_item = {
+            "val": duration,
+            "time": self.time,
+            "addr": trans_stats[:self.TIME_WIDTH + self.TRANS_ID_WIDTH],
+            "id": trans_stats[self.TIME_WIDTH + self.TRANS_ID_WIDTH:self.TIME_WIDTH],
+        }
+        insert = [trans_accept & (duration > item.val) for item in items]
+
+        port = self.top_k
+        Switch(port.addr)\
+        .add_cases(
+            (i, port.dout(r, fit=True)) for i, r in enumerate(regs)
+        ).Default(
+            port.dout(None),
+        )
+        If(port.en & port.we,
+           Switch(port.addr)\
+           .add_cases(
+               (i, r(port.din, fit=True)) for i, r in enumerate(regs)
+           )
+        ).Else(
+            If(insert[i],
+               (
+                   # the previous item is also smaller, shift it
+                   If(insert[i - 1],
+                      *(getattr(item, n)(getattr(items[i - 1], n)) for n in new_item.keys())
+                   ).Else(
+                      *(getattr(item, n)(v) for n, v in new_item.items())
+                   )
+               ) if i > 0 else [
+                   getattr(item, n)(v) for n, v in new_item.items()
+               ]
+            ) for i, item in enumerate(items)
+        )
+
 
 if __name__ == "__main__":
     from hwt.synthesizer.utils import to_rtl_str
@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from hwt.code import Switch
+from hwt.code import Switch, If, Concat
 from hwt.hdl.constants import WRITE, READ
 from hwt.hdl.types.bits import Bits
 from hwt.hdl.types.struct import HStruct
 from hwt.interfaces.hsStructIntf import HsStructIntf
-from hwt.interfaces.std import Handshaked, Signal
+from hwt.interfaces.std import Handshaked, Signal, RegCntrl, VldSynced
 from hwt.interfaces.utils import addClkRstn, propagateClkRstn
+from hwt.math import log2ceil
+from hwt.synthesizer.hObjList import HObjList
 from hwt.synthesizer.interfaceLevel.interfaceUtils.utils import walkPhysInterfaces
 from hwt.synthesizer.param import Param
+from hwt.synthesizer.rtlLevel.rtlSignal import RtlSignal
 from hwt.synthesizer.unit import Unit
 from hwtLib.amba.axi4 import Axi4
 from hwtLib.amba.axi_comp.lsu.fifo_oooread import FifoOutOfOrderRead
@@ -25,20 +28,36 @@ class TimeDurationStorage(Unit):
     class MODE:
         """
         Select which storage with pending transactions is used.
+
+        :cvar IN_ORDER: all transactions use id 0 and are expected to complete in order
+        :cvar OUT_OF_ORDER: each pending transaction has an unique id and may complete in any order
+        :cvar IN_ORDER_MULTI_ID: transactions are assigned to id_cnt ids in round-robin fashion
+            and they are expected to complete in order only within the same id,
+            each id except 0 can have at most 2**ID_WIDTH // MULTI_ID_CNT pending transactions
         """
         IN_ORDER = 0
         OUT_OF_ORDER = 1
+        IN_ORDER_MULTI_ID = 2
 
     def _config(self) -> None:
         self.ID_WIDTH = Param(6)
+        # max number of ids used in IN_ORDER_MULTI_ID mode
+        self.MULTI_ID_CNT = Param(4)
         self.TIME_WIDTH:int = Param(32)
         self.ADDR_WIDTH = Param(32)
         self.LEN_WIDTH = Param(Axi4.LEN_WIDTH)
+        # if True the id and address of each transaction is stored and returned with its duration
+        self.HAS_TRANS_INFO:bool = Param(False)
+        # if True the time from the execution to the first beat of the transaction is resolved
+        # for each id marked by mark_trans_first_beat
+        self.HAS_FIRST_BEAT:bool = Param(False)
+        # width of max_outstanding and id_cnt config registers, out of range values are saturated
+        self.CFG_WIDTH:int = Param(32)
 
     def _declr(self) -> None:
         addClkRstn(self)
         self.time = Signal(Bits(self.TIME_WIDTH))
-        self.mode = Signal()
+        self.mode = Signal(Bits(2))
 
         # port with data to reserve the transaction id and store
         p = self.push = HsStructIntf()
@@ -62,17 +81,62 @@ class TimeDurationStorage(Unit):
         # port to collect transaction metadata (duration time,)
         trans_stats = self.get_trans_stats = Handshaked()._m()
         trans_stats.DATA_WIDTH = self.TIME_WIDTH
+        # completion index - issue index of the transaction (two's complement),
+        # valid with each transaction on get_trans_stats
+        # (the distance is limited by the number of outstanding transactions)
+        self.REORDER_DISTANCE_WIDTH = self.ID_WIDTH + 2
+        self.reorder_distance = VldSynced()._m()
+        self.reorder_distance.DATA_WIDTH = self.REORDER_DISTANCE_WIDTH
+        if self.HAS_TRANS_INFO:
+            # id and address of the transaction, valid with each transaction on get_trans_stats
+            self.trans_id = Signal(Bits(self.ID_WIDTH))._m()
+            self.trans_addr = Signal(Bits(self.ADDR_WIDTH))._m()
+
+        if self.HAS_FIRST_BEAT:
+            # id of the transaction which received the first data beat, the transaction is expected
+            # to be the oldest not completed transaction with this id
+            # (rd depends only on the id, it is 0 if the record of the transaction is not available yet)
+            self.mark_trans_first_beat = Handshaked()
+            self.mark_trans_first_beat.DATA_WIDTH = self.ID_WIDTH
+            # time from the execution to the first beat (1 clock cycle after mark_trans_first_beat in OUT_OF_ORDER mode)
+            self.get_first_beat_stats = VldSynced()._m()
+            self.get_first_beat_stats.DATA_WIDTH = self.TIME_WIDTH
+
+        # number of transactions which were executed and are not complete yet
+        self.outstanding = Signal(Bits(self.ID_WIDTH + 1))._m()
+        # limit for the number of outstanding transactions, 0 means no limit (2**ID_WIDTH),
+        # values > 2**ID_WIDTH are saturated to 2**ID_WIDTH
+        self.max_outstanding = RegCntrl()
+        self.max_outstanding.DATA_WIDTH = self.CFG_WIDTH
+        # number of ids used in IN_ORDER_MULTI_ID mode, 0 and 1 means that only id 0 is used,
+        # values > MULTI_ID_CNT are saturated to MULTI_ID_CNT
+        assert 1 <= self.MULTI_ID_CNT <= 2 ** self.ID_WIDTH, (self.MULTI_ID_CNT, self.ID_WIDTH)
+        self.id_cnt = RegCntrl()
+        self.id_cnt.DATA_WIDTH = self.CFG_WIDTH
 
     def _impl(self) -> None:
         push = self.push
         time = self.time
+        # time, issue index (, id, address)
+        RECORD_WIDTH = self.TIME_WIDTH + self.REORDER_DISTANCE_WIDTH
+        if self.HAS_TRANS_INFO:
+            RECORD_WIDTH += self.ID_WIDTH + self.ADDR_WIDTH
 
-        f = HandshakedFifo(Handshaked)
-        f.DEPTH = int(2 ** self.ID_WIDTH)
-        f.DATA_WIDTH = self.TIME_WIDTH
-        self.fifo = f
+        # a fifo for each id used in IN_ORDER/IN_ORDER_MULTI_ID mode,
+        # the fifo for id 0 stores all transactions in IN_ORDER mode, the other fifos
+        # are used only in IN_ORDER_MULTI_ID mode where the transactions are split between ids
+        fifos = HObjList()
+        for i in range(self.MULTI_ID_CNT):
+            f = HandshakedFifo(Handshaked)
+            if i == 0:
+                f.DEPTH = int(2 ** self.ID_WIDTH)
+            else:
+                f.DEPTH = max(2, int(2 ** self.ID_WIDTH) // self.MULTI_ID_CNT)
+            f.DATA_WIDTH = RECORD_WIDTH
+            fifos.append(f)
+        self.fifo = fifos
         ooof = FifoOutOfOrderRead()
-        ooof.ITEMS = f.DEPTH
+        ooof.ITEMS = int(2 ** self.ID_WIDTH)
         self.ooofifo = ooof
 
         ooof_ram = RamSingleClock()
@@ -84,13 +148,14 @@ class TimeDurationStorage(Unit):
         hs_ram_w.HAS_R = False
         for c in [hs_ram_r, hs_ram_w, ooof_ram]:
             c.ADDR_WIDTH = self.ID_WIDTH
-            c.DATA_WIDTH = self.TIME_WIDTH
+            c.DATA_WIDTH = RECORD_WIDTH
         self.ooof_ram = ooof_ram
         self.hs_ram_r = hs_ram_r
         self.hs_ram_w = hs_ram_w
 
-        f = self.fifo
         complete = self.mark_trans_complete
+        trans_stats = self.get_trans_stats
+        reorder_distance = self.reorder_distance
 
         ooof_ram.port[0](hs_ram_w.ram)
         ooof_ram.port[1](hs_ram_r.ram)
@@ -101,25 +166,151 @@ class TimeDurationStorage(Unit):
 
         get_trans_exe = self.get_trans_exe
 
-        def dissable_inorder_part():
-            return (
-                f.dataIn.vld(0),
-                f.dataIn.data(None),
-                f.dataOut.rd(1),
+        outstanding = self._reg("outstanding", self.outstanding._dtype, def_val=0)
+        max_outstanding = self._reg("max_outstanding", self.outstanding._dtype, def_val=0)
+        max_outstanding_in = self.max_outstanding.dout.data
+        If(self.max_outstanding.dout.vld,
+           If(max_outstanding_in > 2 ** self.ID_WIDTH,
+              max_outstanding(2 ** self.ID_WIDTH),
+           ).Else(
+              max_outstanding(max_outstanding_in, fit=True),
+           )
+        )
+        self.max_outstanding.din(max_outstanding, fit=True)
+        # the total number of outstanding transactions is limited by the size of the fifo for id 0
+        # (in IN_ORDER_MULTI_ID mode the push to a full fifo of other id stalls the transactions)
+        exe_en = (outstanding != 2 ** self.ID_WIDTH) & \
+            (max_outstanding._eq(0) | (outstanding < max_outstanding))
+
+        # id which will be used for next transaction in IN_ORDER/IN_ORDER_MULTI_ID mode
+        id_cnt_t = Bits(log2ceil(self.MULTI_ID_CNT) + 1)
+        id_cnt = self._reg("id_cnt", id_cnt_t, def_val=1)
+        in_order_id = self._reg("in_order_id", id_cnt_t, def_val=0)
+        self.id_cnt.din(id_cnt, fit=True)
+        id_cnt_in = self.id_cnt.dout.data
+        If(self.id_cnt.dout.vld,
+           # in_order_id has to stay in the range of existing fifos
+           If(id_cnt_in._eq(0),
+              id_cnt(1),
+           ).Elif(id_cnt_in > self.MULTI_ID_CNT,
+              id_cnt(self.MULTI_ID_CNT),
+           ).Else(
+              id_cnt(id_cnt_in, fit=True),
+           ),
+           in_order_id(0),
+        ).Elif(self.mode != self.MODE.IN_ORDER_MULTI_ID,
+           in_order_id(0),
+        ).Elif(get_trans_exe.vld & get_trans_exe.rd,
+            If(in_order_id + 1 >= id_cnt,
+               in_order_id(0),
+            ).Else(
+               in_order_id(in_order_id + 1),
             )
+        )
 
-        def dissable_ooo_part():
+        # sequence numbers of executed/completed transactions, stored together with the start time
+        # in order to resolve the reorder distance
+        idx_t = Bits(self.REORDER_DISTANCE_WIDTH)
+        issue_idx = self._reg("issue_idx", idx_t, def_val=0)
+        complete_idx = self._reg("complete_idx", idx_t, def_val=0)
+        If(get_trans_exe.vld & get_trans_exe.rd,
+           issue_idx(issue_idx + 1),
+        )
+        trans_stats_ack = trans_stats.vld & trans_stats.rd
+        If(trans_stats_ack,
+           complete_idx(complete_idx + 1),
+        )
+        reorder_distance.vld(trans_stats_ack)
+        idx_end = self.TIME_WIDTH + self.REORDER_DISTANCE_WIDTH
+        if self.HAS_TRANS_INFO:
+            # the id is driven in all modes when the transaction is executed
+            record = Concat(get_trans_exe.data.addr, get_trans_exe.data.id, issue_idx, time)
+        else:
+            record = Concat(issue_idx, time)
+
+        def load_record(record):
+            res = [
+                trans_stats.data(time - record[self.TIME_WIDTH:]),
+                reorder_distance.data(complete_idx - record[idx_end:self.TIME_WIDTH]),
+            ]
+            if self.HAS_TRANS_INFO:
+                res.extend([
+                    self.trans_id(record[idx_end + self.ID_WIDTH:idx_end]),
+                    self.trans_addr(record[:idx_end + self.ID_WIDTH]),
+                ])
+            return res
+
+        def no_record():
+            res = [
+                trans_stats.data(None),
+                reorder_distance.data(None),
+            ]
+            if self.HAS_TRANS_INFO:
+                res.extend([
+                    self.trans_id(None),
+                    self.trans_addr(None),
+                ])
+            return res
+
+        def dissable_inorder_part():
             return [
-                *((_i(0)
-                    if _i is i.vld else
-                    _i(None)
-                    for _i in walkPhysInterfaces(i) if _i._direction == i.vld._direction
+                *((f.dataIn.vld(0),
+                   f.dataIn.data(None),
+                   f.dataOut.rd(1)) for f in fifos)
+            ]
+
+        def inorder_part():
+            # push to fifo selected by in_order_id, pop from fifo selected by id of completed transaction
+            return [
+                *(f.dataIn.data(record) for f in fifos),
+                Switch(in_order_id).add_cases(
+                    (i, [
+                        StreamNode([push], [f.dataIn, get_trans_exe]).sync(exe_en),
+                        *(other.dataIn.vld(0) for other in fifos if other is not f),
+                    ]) for i, f in enumerate(fifos)
+                ).Default(
+                    push.rd(0),
+                    get_trans_exe.vld(0),
+                    *(f.dataIn.vld(0) for f in fifos),
+                ),
+                get_trans_exe.data.id(in_order_id, fit=True),
+                get_trans_exe.data(push.data, exclude=[get_trans_exe.data.id]),
+
+                If(complete.vld,
+                    Switch(complete.data).add_cases(
+                        (i, [
+                            StreamNode([f.dataOut, complete], [trans_stats, ]).sync(),
+                            *load_record(f.dataOut.data),
+                            *(other.dataOut.rd(0) for other in fifos if other is not f),
+                        ]) for i, f in enumerate(fifos)
+                    ).Default(
+                        # unknown id, the transaction can not be matched
+                        complete.rd(1),
+                        trans_stats.vld(0),
+                        *no_record(),
+                        *(f.dataOut.rd(0) for f in fifos),
                     )
+                ).Else(
+                    # the id is not valid without complete.vld, do not let it select the fifo
+                    complete.rd(1),
+                    trans_stats.vld(0),
+                    *no_record(),
+                    *(f.dataOut.rd(0) for f in fifos),
+                ),
+            ]
+
+        def dissable_ooo_part():
+            return [
+                *(_i(0)
+                  if _i is i.vld else
+                  _i(None)
                   for i in [hs_ram_w.w,
-                             hs_ram_r.r.addr,
-                             ooof.write_confirm,
-                             ooof.read_confirm,
-                             push_tmp.dataIn]),
+                            hs_ram_r.r.addr,
+                            ooof.write_confirm,
+                            ooof.read_confirm,
+                            push_tmp.dataIn]
+                  for _i in walkPhysInterfaces(i) if _i._direction == i.vld._direction
+                ),
                 *(i.rd(1)
                   for i in [hs_ram_r.r.data, ooof.read_execute, push_tmp.dataOut]
                 )
@@ -127,14 +318,10 @@ class TimeDurationStorage(Unit):
 
         Switch(self.mode)\
         .Case(self.MODE.IN_ORDER,
-            f.dataIn.data(time),
-            StreamNode([push], [f.dataIn, get_trans_exe]).sync(),
-            get_trans_exe.data.id(0),
-            get_trans_exe.data(push.data, exclude=[get_trans_exe.data.id]),
-
-            StreamNode([f.dataOut, complete],
-                       [self.get_trans_stats, ]).sync(),
-            self.get_trans_stats.data(self.time - f.dataOut.data),
+            *inorder_part(),
+            *dissable_ooo_part(),
+        ).Case(self.MODE.IN_ORDER_MULTI_ID,
+            *inorder_part(),
             *dissable_ooo_part(),
         ).Case(self.MODE.OUT_OF_ORDER,
             # # allocates id for transaction
@@ -149,9 +336,9 @@ class TimeDurationStorage(Unit):
             push_tmp.dataIn.data(push.data),
 
             StreamNode([push_tmp.dataOut, ooof.read_execute],
-                       [hs_ram_w.w, get_trans_exe]).sync(),
+                       [hs_ram_w.w, get_trans_exe]).sync(exe_en),
             hs_ram_w.w.addr(ooof.read_execute.index),
-            hs_ram_w.w.data(time),
+            hs_ram_w.w.data(record),
             get_trans_exe.data.id(ooof.read_execute.index),
             get_trans_exe.data(push_tmp.dataOut.data, exclude=[get_trans_exe.data.id]),
 
@@ -163,15 +350,86 @@ class TimeDurationStorage(Unit):
 
             # from ooo fifo ram to out
             StreamNode([hs_ram_r.r.data],
-                       [self.get_trans_stats, ]).sync(),
-            self.get_trans_stats.data(self.time - hs_ram_r.r.data.data),
+                       [trans_stats, ]).sync(),
+            *load_record(hs_ram_r.r.data.data),
             *dissable_inorder_part(),
         ).Default(
             *dissable_inorder_part(),
             *dissable_ooo_part(),
+            trans_stats.vld(0),
+            *no_record(),
         )
+
+        trans_exe_ack = get_trans_exe.vld & get_trans_exe.rd
+        if self.HAS_FIRST_BEAT:
+            self._impl_first_beat(fifos, trans_exe_ack, ooof.read_execute.index)
+
+        trans_complete_ack = complete.vld & complete.rd
+        If(trans_exe_ack & ~trans_complete_ack,
+           outstanding(outstanding + 1),
+        ).Elif(~trans_exe_ack & trans_complete_ack,
+           outstanding(outstanding - 1),
+        )
+        self.outstanding(outstanding)
+
         propagateClkRstn(self)
 
+    def _impl_first_beat(self, fifos: HObjList, trans_exe_ack: RtlSignal, ooo_id: RtlSignal):
+        """
+        Resolve the time from the execution to the first beat from the start time of the oldest pending
+        transaction with the id (head of the fifo in IN_ORDER modes, a separate ram with start time for each id
+        in OUT_OF_ORDER mode because the record in ooof_ram is read only on completion)
+        """
+        time = self.time
+        first_beat = self.mark_trans_first_beat
+        first_beat_stats = self.get_first_beat_stats
+
+        start_time_ram = RamSingleClock()
+        start_time_ram.PORT_CNT = (WRITE, READ)
+        start_time_ram.ADDR_WIDTH = self.ID_WIDTH
+        start_time_ram.DATA_WIDTH = self.TIME_WIDTH
+        self.start_time_ram = start_time_ram
+        w, r = start_time_ram.port
+        w.en(trans_exe_ack & self.mode._eq(self.MODE.OUT_OF_ORDER))
+        w.addr(ooo_id)
+        w.din(time)
+        r.en(first_beat.vld)
+        r.addr(first_beat.data)
+        # the ram has read latency of 1 clock cycle, use the time of the first beat
+        ooo_vld = self._reg("first_beat_ooo_vld", def_val=0)
+        ooo_vld(first_beat.vld)
+        ooo_time = self._reg("first_beat_ooo_time", time._dtype)
+        ooo_time(time)
+
+        If(self.mode._eq(self.MODE.OUT_OF_ORDER),
+            first_beat.rd(1),
+        ).Else(
+            Switch(first_beat.data).add_cases(
+                (i, first_beat.rd(f.dataOut.vld)) for i, f in enumerate(fifos)
+            ).Default(
+                # unknown id, the transaction can not be matched
+                first_beat.rd(1),
+            )
+        )
+        If(self.mode._eq(self.MODE.OUT_OF_ORDER),
+            first_beat_stats.vld(ooo_vld),
+            first_beat_stats.data(ooo_time - r.dout),
+        ).Elif(first_beat.vld,
+            Switch(first_beat.data).add_cases(
+                (i, [
+                    first_beat_stats.vld(f.dataOut.vld),
+                    first_beat_stats.data(time - f.dataOut.data[self.TIME_WIDTH:]),
+                ]) for i, f in enumerate(fifos)
+            ).Default(
+                first_beat_stats.vld(0),
+                first_beat_stats.data(None),
+            )
+        ).Else(
+            # the id is not valid without first_beat.vld, do not let it select the fifo
+            first_beat_stats.vld(0),
+            first_beat_stats.data(None),
+        )
+
 
 if __name__ == "__main__":
     from hwt.synthesizer.utils import to_rtl_str
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from hwt.code import If
+from hwt.hdl.types.bits import Bits
+from hwt.hdl.types.defs import BIT
+from hwt.hdl.types.struct import HStruct
+from hwt.interfaces.hsStructIntf import HsStructIntf
+from hwt.interfaces.std import RegCntrl, Handshaked
+from hwt.interfaces.utils import addClkRstn, propagateClkRstn
+from hwt.math import log2ceil
+from hwt.synthesizer.param import Param
+from hwt.synthesizer.unit import Unit
+from hwtLib.amba.axi4 import Axi4
+from hwtLib.amba.constants import BURST_INCR, PROT_DEFAULT, BYTES_IN_TRANS, \
+    LOCK_DEFAULT, CACHE_DEFAULT, QOS_DEFAULT
+from hwtLib.handshaked.fifo import HandshakedFifo
+from hwtLib.types.ctypes import uint16_t
+
+
+class TraceReader(Unit):
+    """
+    Reads a trace of transactions from memory using AXI read master and releases the transactions
+    to read/write channel (trace replay, the trace can be much longer than RW_PATTERN_ITEMS).
+    Records are prefetched in bursts of MAX_BURST records to a FIFO of PREFETCH_ITEMS records,
+    a new burst is requested as soon as there is a space for it in the FIFO so the records can be released
+    in every clock cycle if the memory keeps up.
+
+    Each record is a single bus word of :attr:`~.record_t` format, the delay is the number of clock cycles
+    to wait after the transaction before the next record is released.
+    The base address should be aligned to MAX_BURST records so the bursts do not cross 4KB boundary.
+    Writing 1 to en starts the replay of items records from the base address, en reads 1 until all records
+    are released and all prefetched data are received. Writing 0 to en stops the replay.
+
+    :see: :func:`hwtAxiPerfTester.runtime.trace.trace_to_bytes`
+
+    .. hwt-autodoc::
+    """
+    record_t = HStruct(
+        (Bits(32), "addr"),
+        (uint16_t, "delay"),
+        (Bits(8), "len"),
+        (BIT, "rw"),  # 0 = read, 1 = write
+        (Bits(7), None),
+    )
+
+    def _config(self) -> None:
+        self.ADDR_WIDTH = Param(32)
+        self.LEN_WIDTH = Param(Axi4.LEN_WIDTH)
+        self.COUNTER_WIDTH = Param(32)
+        self.AXI_CLS = Param(Axi4)
+        # max number of records in a single read transaction
+        self.MAX_BURST = Param(16)
+        self.PREFETCH_ITEMS = Param(64)
+
+    def _declr(self) -> None:
+        assert self.MAX_BURST <= self.PREFETCH_ITEMS, (self.MAX_BURST, self.PREFETCH_ITEMS)
+        assert self.MAX_BURST <= 2 ** self.AXI_CLS.LEN_WIDTH, self.MAX_BURST
+        assert self.LEN_WIDTH <= self.record_t.field_by_name["len"].dtype.bit_length()
+        assert self.ADDR_WIDTH <= self.record_t.field_by_name["addr"].dtype.bit_length()
+        addClkRstn(self)
+
+        axi = self.axi = self.AXI_CLS()._m()
+        axi.ADDR_WIDTH = self.ADDR_WIDTH
+        axi.DATA_WIDTH = self.record_t.bit_length()
+        axi.ID_WIDTH = 1
+
+        self.en = RegCntrl()
+        self.en.DATA_WIDTH = 1
+        # address of the first record
+        self.base = RegCntrl()
+        self.base.DATA_WIDTH = self.ADDR_WIDTH
+        # number of records to replay (reads the number of records which were not released yet)
+        self.items = RegCntrl()
+        self.items.DATA_WIDTH = self.COUNTER_WIDTH
+
+        req_t = HStruct(
+            (Bits(self.ADDR_WIDTH), "addr"),
+            (Bits(self.LEN_WIDTH), "len"),
+        )
+        self.r_req: HsStructIntf = HsStructIntf()._m()
+        self.w_req: HsStructIntf = HsStructIntf()._m()
+        for req in [self.r_req, self.w_req]:
+            req.T = req_t
+
+        self.fifo = HandshakedFifo(Handshaked)
+        self.fifo.DEPTH = self.PREFETCH_ITEMS
+        self.fifo.DATA_WIDTH = self.record_t.bit_length()
+
+    def _impl(self) -> None:
+        addr_t = Bits(self.ADDR_WIDTH)
+        cntr_t = Bits(self.COUNTER_WIDTH)
+        en = self._reg("en", def_val=0)
+        base = self._reg("base", addr_t)
+        # address of the next burst
+        rd_addr = self._reg("rd_addr", addr_t)
+        # records which were not released yet
+        items = self._reg("items", cntr_t, def_val=0)
+        # records which were not requested yet
+        req_items = self._reg("req_items", cntr_t, def_val=0)
+        # space in fifo taken by received records and records which are being read
+        reserved = self._reg("reserved", Bits(log2ceil(self.PREFETCH_ITEMS + 1)), def_val=0)
+        stall_cntr = self._reg("stall_cntr", self.record_t.field_by_name["delay"].dtype, def_val=0)
+
+        busy = en | (reserved != 0)
+        self.en.din(busy)
+        self.base.din(base)
+        self.items.din(items)
+
+        # read of the trace
+        ar = self.axi.ar
+        burst_len = self._sig("burst_len", ar.len._dtype)
+        If(req_items >= self.MAX_BURST,
+           burst_len(self.MAX_BURST - 1),
+        ).Else(
+           burst_len(req_items[burst_len._dtype.bit_length():] - 1),
+        )
+        # number of records in burst as a type of address, counter and fifo item counter
+        beats = self._sig("beats", addr_t)
+        beats(burst_len, fit=True)
+        beats = beats + 1
+        beats_cntr = self._sig("beats_cntr", cntr_t)
+        beats_cntr(beats, fit=True)
+        beats_reserved = self._sig("beats_reserved", reserved._dtype)
+        beats_reserved(beats, fit=True)
+        ar.id(0)
+        ar.addr(rd_addr)
+        ar.len(burst_len)
+        ar.burst(BURST_INCR)
+        ar.prot(PROT_DEFAULT)
+        ar.size(BYTES_IN_TRANS(self.axi.DATA_WIDTH // 8))
+        ar.lock(LOCK_DEFAULT)
+        ar.cache(CACHE_DEFAULT)
+        ar.qos(QOS_DEFAULT)
+        ar.valid(en & (req_items != 0) & (reserved <= self.PREFETCH_ITEMS - self.MAX_BURST))
+        ar_ack = ar.valid & ar.ready
+
+        r = self.axi.r
+        fifo = self.fifo
+        fifo.dataIn.data(r.data)
+        fifo.dataIn.vld(r.valid)
+        r.ready(fifo.dataIn.rd)
+
+        # the write channels are not used
+        aw = self.axi.aw
+        for s in aw._interfaces:
+            if s is aw.valid:
+                s(0)
+            elif s is not aw.ready:
+                s(None)
+        w = self.axi.w
+        for s in w._interfaces:
+            if s is w.valid:
+                s(0)
+            elif s is not w.ready:
+                s(None)
+        self.axi.b.ready(1)
+
+        # release of the records
+        rec = fifo.dataOut.data._reinterpret_cast(self.record_t)
+        for req in [self.r_req, self.w_req]:
+            req.data.addr(rec.addr, fit=True)
+            req.data.len(rec.len, fit=True)
+
+        release_en = stall_cntr._eq(0)
+        If(~en | ~fifo.dataOut.vld,
+           # :note: if en=0 this flushes the records prefetched before stop
+           self.r_req.vld(0),
+           self.w_req.vld(0),
+           fifo.dataOut.rd(1),
+        ).Elif(rec.rw,
+           self.r_req.vld(0),
+           self.w_req.vld(release_en),
+           fifo.dataOut.rd(release_en & self.w_req.rd),
+        ).Else(
+           self.r_req.vld(release_en),
+           self.w_req.vld(0),
+           fifo.dataOut.rd(release_en & self.r_req.rd),
+        )
+        out_ack = fifo.dataOut.vld & fifo.dataOut.rd
+
+        If(ar_ack & out_ack,
+           reserved(reserved + beats_reserved - 1),
+        ).Elif(ar_ack,
+           reserved(reserved + beats_reserved),
+        ).Elif(out_ack,
+           reserved(reserved - 1),
+        )
+
+        If(~en,
+           stall_cntr(0),
+        ).Elif(out_ack,
+           stall_cntr(rec.delay),
+        ).Elif(stall_cntr != 0,
+           stall_cntr(stall_cntr - 1),
+        )
+
+        If(self.en.dout.vld,
+           en(self.en.dout.data),
+        ).Elif(items._eq(0) | (items._eq(1) & out_ack),
+           en(0),
+        )
+
+        If(self.base.dout.vld,
+           base(self.base.dout.data),
+           rd_addr(self.base.dout.data),
+        ).Elif(ar_ack,
+           rd_addr(rd_addr + (beats << log2ceil(self.axi.DATA_WIDTH // 8))),
+        )
+
+        If(self.items.dout.vld,
+           items(self.items.dout.data),
+           req_items(self.items.dout.data),
+        ).Else(
+           If(en & out_ack,
+              items(items - 1),
+           ),
+           If(ar_ack,
+              req_items(req_items - beats_cntr),
+           ),
+        )
+
+        propagateClkRstn(self)
+
+
+if __name__ == "__main__":
+    from hwt.synthesizer.utils import to_rtl_str
+    u = TraceReader()
+    print(to_rtl_str(u))
@@ -10,13 +10,16 @@ from hwt.hdl.types.defs import BIT
 from hwt.hdl.types.hdlType import HdlType
 from hwt.hdl.types.struct import HStruct, HStructField
 from hwt.interfaces.hsStructIntf import HsStructIntf
-from hwt.interfaces.std import HandshakeSync, Handshaked
+from hwt.interfaces.std import HandshakeSync, Handshaked, BramPort_withoutClk
 from hwt.interfaces.structIntf import StructIntf
 from hwt.interfaces.utils import addClkRstn, propagateClkRstn
+from hwt.math import log2ceil
 from hwt.synthesizer.interface import Interface
 from hwt.synthesizer.param import Param
 from hwt.synthesizer.rtlLevel.rtlSyncSignal import RtlSyncSignal
 from hwt.synthesizer.unit import Unit
+from hwtAxiPerfTester.histogram import drive_reg_array_from_bramport
+from hwtAxiPerfTester.lfsr import Xorshift, xorshift_width
 from hwtLib.abstract.busEndpoint import BusEndpoint
 from hwtLib.amba.axi4 import Axi4
 from hwtLib.handshaked.streamNode import StreamNode
@@ -30,6 +33,29 @@ class TransactionGenerator(Unit):
     Allows for modulo or random steps in address and transaction length.
     It supports in-order and out-of-order mode.
 
+    In MODE.STREAM_* address modes the address is generated by one of ADDR_STREAM_CNT independent
+    streams (e.g. to emulate multiple DMA engines). Each stream has its own base, step and mask
+    and the address of the stream is stream_base[i] + (stream_offset[i] & stream_mask[i]) + addr_offset
+    where the stream_offset[i] is incremented by stream_step[i] after each transaction of this stream
+    and it is reset to 0 when the stream_base[i] is written.
+    The stream is selected in round-robin manner (MODE.STREAM_ROUND_ROBIN) or by lower bits of the address
+    from the pattern (MODE.STREAM_PATTERN).
+
+    In MODE.STRIDE_2D address mode the address is generated by two nested loops starting at addr.
+    The inner loop performs stride_inner_cnt steps of stride_inner_step, after that the start of the inner loop
+    is moved by stride_outer_step. After stride_outer_cnt iterations of the outer loop the address returns to addr
+    (e.g. inner loop over DRAM columns/banks and outer loop over rows).
+
+    In MODE.RANDOM address mode the address is (rnd & addr_mask & ~rand_align_mask) + addr_offset
+    where rnd is the lower ADDR_WIDTH bits of :class:`~.Xorshift` generator which is advanced after each transaction
+    and which is loaded by a write to rand_seed (0 is replaced by 1). Unlike MODE.CRC all aligned addresses
+    in the range are generated with the same probability.
+    :see: :func:`hwtAxiPerfTester.runtime.addr_gen_model.random_addr_sequence`
+
+    In MODE.READ_AFTER_WRITE address mode (only if HAS_RAW_ADDR) the address is (raw_addr & addr_mask) + addr_offset
+    where raw_addr is the address of a previous write transaction, the generator waits until it is available.
+    :see: :class:`hwtAxiPerfTester.write_addr_history.WriteAddrHistory`
+
     .. figure:: ./_static/TransactionGenerator.png
 
     .. hwt-autodoc::
@@ -39,16 +65,28 @@ class TransactionGenerator(Unit):
         MODULO = 0
         CRC = 1
         EXACT = 2
+        # only for addr_mode
+        STREAM_ROUND_ROBIN = 3
+        STREAM_PATTERN = 4
+        STRIDE_2D = 5
+        RANDOM = 6
+        READ_AFTER_WRITE = 7
 
     def _config(self) -> None:
         self.ADDR_WIDTH = Param(32)
         self.LEN_WIDTH = Param(Axi4.LEN_WIDTH)
+        self.ADDR_STREAM_CNT = Param(4)
+        # if True the raw_addr input is used as a source of address in MODE.READ_AFTER_WRITE
+        self.HAS_RAW_ADDR:bool = Param(False)
 
     def _declr(self) -> None:
         addClkRstn(self)
 
         self.en = Handshaked()
         self.en.DATA_WIDTH = self.ADDR_WIDTH
+        if self.HAS_RAW_ADDR:
+            self.raw_addr = Handshaked()
+            self.raw_addr.DATA_WIDTH = self.ADDR_WIDTH
 
         self.req_out: HsStructIntf = HsStructIntf()._m()
         self.req_out.T = HStruct(
@@ -62,13 +100,25 @@ class TransactionGenerator(Unit):
             (addr_t, "addr"),
             (addr_t, "addr_step"),
             (addr_t, "addr_mask"),
-            (Bits(2), "addr_mode"),
+            (Bits(3), "addr_mode"),
             (addr_t, "addr_offset"),
 
             (len_t, "trans_len"),
             (len_t, "trans_len_step"),
             (len_t, "trans_len_mask"),
             (Bits(2), "trans_len_mode"),
+
+            (addr_t, "stride_inner_step"),
+            (addr_t, "stride_inner_cnt"),
+            (addr_t, "stride_outer_step"),
+            (addr_t, "stride_outer_cnt"),
+
+            (addr_t, "rand_seed"),
+            (addr_t, "rand_align_mask"),
+
+            (addr_t[self.ADDR_STREAM_CNT], "stream_base"),
+            (addr_t[self.ADDR_STREAM_CNT], "stream_step"),
+            (addr_t[self.ADDR_STREAM_CNT], "stream_mask"),
         )
         self.STRUCT_TEMPLATE = self.ADDR_SPACE
         self.addr_space_io = StructIntf(
@@ -85,6 +135,9 @@ class TransactionGenerator(Unit):
     def propagate_addr_space(self, data: Dict[str, Union[RtlSyncSignal, Interface]], read_or_write):
         res = []
         for io in self.addr_space_io._interfaces:
+            if isinstance(io, BramPort_withoutClk):
+                # register arrays are handled separately
+                continue
             reg = data[io._name]
             if read_or_write == READ:
                 o = io.din(reg)
@@ -103,7 +156,7 @@ class TransactionGenerator(Unit):
         addr = self._reg("addr", addr_t)
         addr_step = self._reg("addr_step", addr_t)
         addr_mask = self._reg("addr_mask", addr_t)
-        addr_mode = self._reg("addr_mode", Bits(2))
+        addr_mode = self._reg("addr_mode", Bits(3))
         addr_offset = self._reg("addr_offset", addr_t)
 
         addr_crc32 = CrcComb()
@@ -123,22 +176,121 @@ class TransactionGenerator(Unit):
         self.trans_len_crc8 = trans_len_crc8
         trans_len_crc8.dataIn(trans_len)
 
+        # 2D strided address, addr is used as a current address
+        stride_inner_step = self._reg("stride_inner_step", addr_t)
+        stride_inner_cnt = self._reg("stride_inner_cnt", addr_t)
+        stride_outer_step = self._reg("stride_outer_step", addr_t)
+        stride_outer_cnt = self._reg("stride_outer_cnt", addr_t)
+        # the addr as written by the user
+        stride_base = self._reg("stride_base", addr_t)
+        # the start address of the current inner loop
+        stride_row = self._reg("stride_row", addr_t)
+        stride_inner_i = self._reg("stride_inner_i", addr_t)
+        stride_outer_i = self._reg("stride_outer_i", addr_t)
+        stride_row_next = stride_row + stride_outer_step
+
+        # uniform random address
+        rand_seed = self._reg("rand_seed", addr_t)
+        rand_align_mask = self._reg("rand_align_mask", addr_t)
+        addr_rnd = Xorshift()
+        addr_rnd.WIDTH = xorshift_width(self.ADDR_WIDTH)
+        self.addr_rnd = addr_rnd
+
+        # independent address streams
+        STREAM_CNT = self.ADDR_STREAM_CNT
+        stream_base = [self._reg(f"stream_base_{i:d}", addr_t) for i in range(STREAM_CNT)]
+        stream_step = [self._reg(f"stream_step_{i:d}", addr_t) for i in range(STREAM_CNT)]
+        stream_mask = [self._reg(f"stream_mask_{i:d}", addr_t) for i in range(STREAM_CNT)]
+        stream_offset = [self._reg(f"stream_offset_{i:d}", addr_t) for i in range(STREAM_CNT)]
+        stream_index_t = Bits(log2ceil(STREAM_CNT))
+        stream_rr = self._reg("stream_rr", stream_index_t, def_val=0)
+
+        stream_sel = self._sig("stream_sel", stream_index_t)
+        If(addr_mode._eq(self.MODE.STREAM_PATTERN),
+           stream_sel(self.en.data[stream_index_t.bit_length():]),
+        ).Else(
+           stream_sel(stream_rr),
+        )
+        stream_addr = self._sig("stream_addr", addr_t)
+        Switch(stream_sel).add_cases(
+            (i, stream_addr(stream_base[i] + (stream_offset[i] & stream_mask[i])))
+            for i in range(STREAM_CNT)
+        ).Default(
+            stream_addr(None),
+        )
+        is_stream_mode = addr_mode._eq(self.MODE.STREAM_ROUND_ROBIN) | addr_mode._eq(self.MODE.STREAM_PATTERN)
+
+        asio = self.addr_space_io
+        stream_reg_arrays = [
+            (asio.stream_base, stream_base),
+            (asio.stream_step, stream_step),
+            (asio.stream_mask, stream_mask),
+        ]
+        stream_writes = []
+        for port, reg_array in stream_reg_arrays:
+            _, write = drive_reg_array_from_bramport(port, reg_array)
+            stream_writes.append(write)
+
         req_out = self.req_out
-        sync = StreamNode([self.en], [req_out])
+        if self.HAS_RAW_ADDR:
+            is_raw_mode = addr_mode._eq(self.MODE.READ_AFTER_WRITE)
+            sync = StreamNode([self.en, self.raw_addr], [req_out],
+                              skipWhen={self.raw_addr: ~is_raw_mode})
+        else:
+            sync = StreamNode([self.en], [req_out])
         sync.sync()
 
+        addr_rnd.en(sync.ack() & addr_mode._eq(self.MODE.RANDOM))
+        addr_rnd.seed.vld(asio.rand_seed.dout.vld)
+        If(asio.rand_seed.dout.data._eq(0),
+           addr_rnd.seed.data(1),
+        ).Else(
+           addr_rnd.seed.data(asio.rand_seed.dout.data, fit=True),
+        )
+
         self.propagate_addr_space(locals(), READ)
         If(sync.ack(),
             Switch(addr_mode)\
             .Case(self.MODE.MODULO,
                addr(addr + addr_step),
             ).Case(self.MODE.CRC,
-               addr(addr_crc32.dataOut),
+               addr(addr_crc32.dataOut, fit=True),
             ).Case(self.MODE.EXACT,
                addr(self.en.data),
+            ).Case(self.MODE.STREAM_ROUND_ROBIN,
+               If(stream_rr._eq(STREAM_CNT - 1),
+                  stream_rr(0),
+               ).Else(
+                  stream_rr(stream_rr + 1),
+               ),
+            ).Case(self.MODE.STREAM_PATTERN,
+            ).Case(self.MODE.RANDOM,
+            ).Case(self.MODE.READ_AFTER_WRITE,
+            ).Case(self.MODE.STRIDE_2D,
+               If(stride_inner_i + 1 >= stride_inner_cnt,
+                  stride_inner_i(0),
+                  If(stride_outer_i + 1 >= stride_outer_cnt,
+                     stride_outer_i(0),
+                     stride_row(stride_base),
+                     addr(stride_base),
+                  ).Else(
+                     stride_outer_i(stride_outer_i + 1),
+                     stride_row(stride_row_next),
+                     addr(stride_row_next),
+                  )
+               ).Else(
+                  stride_inner_i(stride_inner_i + 1),
+                  addr(addr + stride_inner_step),
+               ),
             ).Default(
                addr(None)
             ),
+            If(is_stream_mode,
+               Switch(stream_sel).add_cases(
+                   (i, stream_offset[i](stream_offset[i] + stream_step[i]))
+                   for i in range(STREAM_CNT)
+               ),
+            ),
             Switch(trans_len_mode)\
             .Case(self.MODE.MODULO,
                trans_len((trans_len + trans_len_step)),
@@ -149,10 +301,40 @@ class TransactionGenerator(Unit):
                trans_len(None)
             ),
         ).Else(
-            *self.propagate_addr_space(locals(), WRITE)
+            *self.propagate_addr_space(locals(), WRITE),
+            *stream_writes,
+            If(asio.stream_base.en & asio.stream_base.we,
+               # restart the stream from its base
+               Switch(asio.stream_base.addr).add_cases(
+                   (i, stream_offset[i](0)) for i in range(STREAM_CNT)
+               ),
+            ),
+            If(asio.addr_mode.dout.vld,
+               stream_rr(0),
+            ),
+            If(asio.addr.dout.vld,
+               # restart the 2D stride loops
+               stride_base(asio.addr.dout.data),
+               stride_row(asio.addr.dout.data),
+               stride_inner_i(0),
+               stride_outer_i(0),
+            ),
         )
 
-        req_out.data.addr((addr & addr_mask) + addr_offset)
+        addr_out = If(is_stream_mode,
+           req_out.data.addr(stream_addr + addr_offset),
+        ).Elif(addr_mode._eq(self.MODE.EXACT),
+           req_out.data.addr((self.en.data & addr_mask) + addr_offset),
+        ).Elif(addr_mode._eq(self.MODE.RANDOM),
+           req_out.data.addr((addr_rnd.dataOut[self.ADDR_WIDTH:] & addr_mask & ~rand_align_mask) + addr_offset),
+        )
+        if self.HAS_RAW_ADDR:
+            addr_out.Elif(is_raw_mode,
+               req_out.data.addr((self.raw_addr.data & addr_mask) + addr_offset),
+            )
+        addr_out.Else(
+           req_out.data.addr((addr & addr_mask) + addr_offset),
+        )
         req_out.data.len(trans_len & trans_len_mask)
         propagateClkRstn(self)
 
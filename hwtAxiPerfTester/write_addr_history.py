@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from hwt.code import If, Switch, Or
+from hwt.hdl.types.bits import Bits
+from hwt.interfaces.std import Signal, RegCntrl, VldSynced, Handshaked
+from hwt.interfaces.utils import addClkRstn
+from hwt.math import log2ceil
+from hwt.serializer.mode import serializeParamsUniq
+from hwt.synthesizer.param import Param
+from hwt.synthesizer.unit import Unit
+
+
+@serializeParamsUniq
+class WriteAddrHistory(Unit):
+    """
+    This component stores the addresses of the last ITEMS write transactions.
+
+    * raw_addr is the address of the write transaction raw_lag transactions back (1 = the last one),
+      it is valid only if raw_lag != 0 and there were at least raw_lag write transactions.
+      It is used as a source of addresses for read-after-write traffic.
+    * conflict is 1 if the check_addr matches any of the stored addresses
+      on bits selected by conflict_mask (e.g. the same address or the same DRAM bank).
+
+    The history is cleared on each write to raw_lag.
+
+    .. hwt-autodoc::
+    """
+
+    def _config(self) -> None:
+        self.ADDR_WIDTH:int = Param(32)
+        self.ITEMS:int = Param(8)
+        self.COUNTER_WIDTH:int = Param(32)
+
+    def _declr(self) -> None:
+        assert self.ITEMS > 1 and self.ITEMS & (self.ITEMS - 1) == 0, ("Has to be power of 2", self.ITEMS)
+        addClkRstn(self)
+        # address of the accepted write transaction
+        self.push = VldSynced()
+        self.push.DATA_WIDTH = self.ADDR_WIDTH
+
+        self.raw_addr = Handshaked()._m()
+        self.raw_addr.DATA_WIDTH = self.ADDR_WIDTH
+
+        self.check_addr = Signal(Bits(self.ADDR_WIDTH))
+        self.conflict = Signal()._m()
+
+        self.raw_lag = RegCntrl()
+        self.conflict_mask = RegCntrl()
+        for r in [self.raw_lag, self.conflict_mask]:
+            r.DATA_WIDTH = self.COUNTER_WIDTH
+
+    def _impl(self) -> None:
+        addr_t = Bits(self.ADDR_WIDTH)
+        index_t = Bits(log2ceil(self.ITEMS))
+        cntr_t = Bits(self.COUNTER_WIDTH)
+        items = [self._reg(f"item_{i:d}", addr_t) for i in range(self.ITEMS)]
+        items_vld = [self._reg(f"item_vld_{i:d}", def_val=0) for i in range(self.ITEMS)]
+        # index of the item for the next write transaction
+        w_ptr = self._reg("w_ptr", index_t, def_val=0)
+        # number of stored items (saturated at ITEMS)
+        item_cnt = self._reg("item_cnt", cntr_t, def_val=0)
+        raw_lag = self._reg("raw_lag", cntr_t, def_val=0)
+        conflict_mask = self._reg("conflict_mask", addr_t, def_val=0)
+
+        push = self.push
+        If(self.raw_lag.dout.vld,
+           raw_lag(self.raw_lag.dout.data),
+           w_ptr(0),
+           item_cnt(0),
+           *(v(0) for v in items_vld),
+        ).Elif(push.vld,
+           w_ptr(w_ptr + 1),
+           If(item_cnt != self.ITEMS,
+              item_cnt(item_cnt + 1),
+           ),
+           Switch(w_ptr).add_cases(
+               (i, [item(push.data), v(1)])
+               for i, (item, v) in enumerate(zip(items, items_vld))
+           ),
+        )
+        self.raw_lag.din(raw_lag)
+
+        If(self.conflict_mask.dout.vld,
+           conflict_mask(self.conflict_mask.dout.data, fit=True),
+        )
+        self.conflict_mask.din(conflict_mask, fit=True)
+
+        raw_i = self._sig("raw_i", index_t)
+        raw_i(w_ptr - raw_lag[index_t.bit_length():])
+        raw_addr = self.raw_addr
+        Switch(raw_i).add_cases(
+            (i, raw_addr.data(item))
+            for i, item in enumerate(items)
+        ).Default(
+            raw_addr.data(None),
+        )
+        raw_addr.vld((raw_lag != 0) & (raw_lag <= item_cnt))
+
+        check_addr = self.check_addr
+        self.conflict(Or(*(
+            v & ((item ^ check_addr) & conflict_mask)._eq(0)
+            for item, v in zip(items, items_vld)
+        )))
+
+
+if __name__ == "__main__":
+    from hwt.synthesizer.utils import to_rtl_str
+    u = WriteAddrHistory()
+    print(to_rtl_str(u))
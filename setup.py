@@ -34,6 +34,10 @@ setup(name='hwtAxiPerfTester',
       install_requires=[
         'hwtLib>=2.9',
       ],
+      extras_require={
+        # hwtAxiPerfTester.runtime.stream_model, hwtAxiPerfTester.runtime.dram_model
+        'model': ['numpy'],
+      },
       license='MIT',
       packages=find_packages(),
       zip_safe=True,
@@ -3,7 +3,10 @@
 
 import sys
 from unittest import TestLoader, TextTestRunner, TestSuite
-from tests.basic_test import AxiPerfTesterTC
+from tests.basic_test import AxiPerfTesterTC, AxiPerfTesterOptionalStatsTC, \
+    AxiPerfTesterFirstBeatTC, AxiPerfTesterConflictTC, AxiPerfTesterCfgClkTC, \
+    TransactionGeneratorTC, DramModelTC, LatencyPercentilesTC, AxiPerfTesterMultiPortSimTC, \
+    AxiPerfTesterMultiPortTC
 
 
 def testSuiteFromTCs(*tcs):
@@ -15,6 +18,15 @@ def testSuiteFromTCs(*tcs):
 
 suite = testSuiteFromTCs(
     AxiPerfTesterTC,
+    AxiPerfTesterOptionalStatsTC,
+    AxiPerfTesterFirstBeatTC,
+    AxiPerfTesterConflictTC,
+    AxiPerfTesterCfgClkTC,
+    TransactionGeneratorTC,
+    DramModelTC,
+    LatencyPercentilesTC,
+    AxiPerfTesterMultiPortSimTC,
+    AxiPerfTesterMultiPortTC,
 )
 
 if __name__ == '__main__':
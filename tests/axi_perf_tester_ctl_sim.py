@@ -58,3 +58,10 @@ class AxiPerfTesterCtlSim(AxiPerfTesterCtl):
 
             addr += word_size
             data >>= axi.DATA_WIDTH
+
+    def write_mem(self, addr:int, data: bytes):
+        mem = self.tc.trace_mem
+        word_size = mem.cellSize
+        assert addr % word_size == 0 and len(data) % word_size == 0, (addr, len(data))
+        for i in range(0, len(data), word_size):
+            mem.data[(addr + i) // word_size] = int.from_bytes(data[i:i + word_size], "little")
@@ -0,0 +1,60 @@
+from collections import deque
+
+from hwtLib.amba.axi_comp.sim.ram import AxiSimRam
+
+
+class AxiSimRamReordering(AxiSimRam):
+    """
+    AxiSimRam which can complete transactions out of order.
+    If reorder_en is set the read data and write responses are returned in pairs in reversed order
+    (the second transaction of the pair completes first). A transaction without a pair is completed
+    after it waits for MAX_WAIT clock cycles.
+
+    :attention: the reordering is valid for AXI only if the transactions use different ids
+    """
+    MAX_WAIT = 8
+
+    def __init__(self, *args, **kwargs):
+        AxiSimRam.__init__(self, *args, **kwargs)
+        self.reorder_en = False
+        self.r_wait = 0
+        self.b_pending = deque()
+        self.b_wait = 0
+
+    def doRead(self):
+        if not self.reorder_en:
+            return AxiSimRam.doRead(self)
+
+        if len(self.rPending) >= 2:
+            first = self.rPending.popleft()
+            second = self.rPending.popleft()
+            self.rPending.appendleft(first)
+            self.rPending.appendleft(second)
+            AxiSimRam.doRead(self)
+            AxiSimRam.doRead(self)
+            self.r_wait = 0
+        elif self.r_wait >= self.MAX_WAIT:
+            AxiSimRam.doRead(self)
+            self.r_wait = 0
+        else:
+            self.r_wait += 1
+
+    def doWriteAck(self, _id):
+        if not self.reorder_en:
+            return AxiSimRam.doWriteAck(self, _id)
+        self.b_pending.append(_id)
+
+    def checkRequests(self):
+        yield from AxiSimRam.checkRequests(self)
+        b_pending = self.b_pending
+        if len(b_pending) >= 2:
+            first = b_pending.popleft()
+            second = b_pending.popleft()
+            AxiSimRam.doWriteAck(self, second)
+            AxiSimRam.doWriteAck(self, first)
+            self.b_wait = 0
+        elif b_pending and self.b_wait >= self.MAX_WAIT:
+            AxiSimRam.doWriteAck(self, b_pending.popleft())
+            self.b_wait = 0
+        elif b_pending:
+            self.b_wait += 1
@@ -2,32 +2,86 @@
 # -*- coding: utf-8 -*-
 
 from collections import deque
+import os
+import tempfile
 import threading
+from typing import Optional
 import unittest
 
 from hwt.simulator.simTestCase import SimTestCase
+from hwt.synthesizer.utils import to_rtl_str
 from hwtAxiPerfTester.axi_perf_tester import AxiPerfTester
+from hwtAxiPerfTester.runtime.addr_gen_model import random_addr_sequence
+from hwtAxiPerfTester.runtime.axi_perf_tester_ctl import AxiPerfTesterCtl
+from hwtAxiPerfTester.runtime.dram_mapping import DramAddrLayout, dram_mapping_jobs
+from hwtAxiPerfTester.runtime.histogram_keys import HISTOGRAM_KEY_SPACING
+from hwtAxiPerfTester.runtime.trace import load_trace_file, AxiPerfTesterTraceRecord
+from hwtAxiPerfTester.runtime.trace_compiler import compile_trace
 from hwtAxiPerfTester.runtime.data_containers import \
-    AxiPerfTesterTestJob, AxiPerfTesterChannelConfig, AxiPerfTesterStatConfig, \
-    AxiPerfTesterTestReport
+    AxiPerfTesterAddrGenConfig, AxiPerfTesterTestJob, AxiPerfTesterChannelConfig, AxiPerfTesterStatConfig, \
+    AxiPerfTesterTestReport, AxiPerfTesterTestChannelReport
 from hwtAxiPerfTester.rw_pattern_generator import RWPatternGenerator
 from hwtAxiPerfTester.time_duration_storage import TimeDurationStorage
 from hwtAxiPerfTester.transaction_generator import TransactionGenerator
 from hwtLib.amba.axiLite_comp.sim.utils import axi_randomize_per_channel
 from hwtLib.amba.axi_comp.sim.ram import AxiSimRam
+from hwtLib.amba.constants import BURST_FIXED, BURST_INCR, BURST_WRAP, BYTES_IN_TRANS, CACHE_DEFAULT
 from hwtSimApi.constants import CLK_PERIOD
 from hwtSimApi.triggers import Timer, StopSimumulation
+from pyMathBitPrecise.bit_utils import mask
 from tests.axi_perf_tester_ctl_sim import AxiPerfTesterCtlSim
+from tests.axi_sim_ram_reordering import AxiSimRamReordering
 
+try:
+    import numpy as np
+    from hwtAxiPerfTester.runtime.dram_model import DramModel, DramTiming, deviating_channels
+    from hwtAxiPerfTester.runtime.latency_percentiles import estimate_percentiles
+    from hwtAxiPerfTester.runtime.stream_model import model_job
+except ImportError:
+    np = None
 
-def run_AxiPerfTesterCtlSim(tc, job, data):
+
+class LogDeque(deque):
+    """
+    deque which also stores all appended items in a log list,
+    used as a data queue of the simulation agent to record everything what the agent received
+    """
+
+    def __init__(self, log: list):
+        super(LogDeque, self).__init__()
+        self.log = log
+
+    def append(self, x):
+        self.log.append(x)
+        super(LogDeque, self).append(x)
+
+
+def modulo_job(rw_pattern_items: int, port_cnt=1, credit=10) -> AxiPerfTesterTestJob:
+    job = AxiPerfTesterTestJob(port_cnt=port_cnt)
+    job.rw_mode = RWPatternGenerator.MODE.SYNC
+    for ch in job.channel_config:
+        ch: AxiPerfTesterChannelConfig
+        # (addr, delay, en)
+        ch.pattern = [(0, 0, 1) for _ in range(rw_pattern_items)]
+        ag = ch.addr_gen
+        ag.credit = credit
+        ag.addr_step = 64
+        ag.addr_mask = 0x1000 - 1
+        ag.addr_mode = TransactionGenerator.MODE.MODULO
+        ag.trans_len_mask = 1
+        ch.stat_config.histogram_keys = [1, 4, 8]
+
+    return job
+
+
+def run_AxiPerfTesterCtlSim(tc, job, data, exec_fn=AxiPerfTesterCtl.exec_test):
     db = AxiPerfTesterCtlSim(tc)
-    rep = db.exec_test(job)
+    rep = exec_fn(db, job)
     data.append(rep)
     tc.sim_done = True
 
 
-class AxiPerfTesterTC(SimTestCase):
+class AxiPerfTesterBaseTC(SimTestCase):
 
     @classmethod
     def setUpClass(cls):
@@ -38,8 +92,13 @@ class AxiPerfTesterTC(SimTestCase):
         u.RW_PATTERN_ITEMS = 4
         u.DATA_WIDTH = 32
         u.MAX_BLOCK_DATA_WIDTH = 8  # to simplify sim
+        cls._configure(u)
         cls.compileSim(u)
 
+    @classmethod
+    def _configure(cls, u: AxiPerfTester):
+        pass
+
     def setUp(self):
         SimTestCase.setUp(self)
         self.sim_done = False
@@ -47,7 +106,12 @@ class AxiPerfTesterTC(SimTestCase):
         self.r_data_available.acquire()
         self.b_data_available = threading.Lock()
         self.b_data_available.acquire()
-        self.mem = AxiSimRam(self.u.axi)
+        u: AxiPerfTester = self.u
+        self.axi_ports = [u.axi, ] if u.PORT_CNT == 1 else list(u.axi)
+        self.mems = [AxiSimRamReordering(axi) for axi in self.axi_ports]
+        self.mem = self.mems[0]
+        if u.HAS_TRACE_REPLAY:
+            self.trace_mem = AxiSimRam(u.trace_axi)
 
     def setUpQueues(self):
         u = self.u
@@ -77,6 +141,81 @@ class AxiPerfTesterTC(SimTestCase):
         u.cfg.r._ag.data = RSpyDeque(self)
         u.cfg.b._ag.data = BSpyDeque(self)
 
+    def _exec_job(self, job: AxiPerfTesterTestJob, sim_time: int, exec_fn=AxiPerfTesterCtl.exec_test) -> AxiPerfTesterTestReport:
+        reports = []
+        ctl_thread = threading.Thread(target=run_AxiPerfTesterCtlSim,
+                                      args=(self, job, reports, exec_fn))
+        ctl_thread.start()
+        # actually takes less time as the simulation is stopped after ctl_thread end
+        self.runSim(sim_time)
+        # handle the case where something went wrong and ctl thread is still running
+        self.sim_done = True
+        for lock in (self.r_data_available, self.b_data_available):
+            if lock.locked():
+                lock.release()
+        ctl_thread.join()
+
+        self.assertEqual(len(reports), 1)
+        return reports[0]
+
+    def _modulo_job(self, credit=10) -> AxiPerfTesterTestJob:
+        u: AxiPerfTester = self.u
+        return modulo_job(u.RW_PATTERN_ITEMS, port_cnt=u.PORT_CNT, credit=credit)
+
+    def _sim_init_common(self, mem_size_to_init, randomize=True):
+        """
+        :param randomize: if True the memory interface is randomly stalled
+        """
+        u: AxiPerfTester = self.u
+        tc = self
+        self.setUpQueues()
+        # axi_randomize_per_channel(self, u.cfg)
+        if randomize:
+            for axi in self.axi_ports:
+                axi_randomize_per_channel(self, axi)
+
+        def time_sync():
+            while True:
+                if u.cfg.r._ag.data and self.r_data_available.locked():
+                    tc.r_data_available.release()
+                yield Timer(CLK_PERIOD)
+                if self.sim_done:
+                    raise StopSimumulation()
+
+        for mem in self.mems:
+            for i in range(mem_size_to_init // (u.DATA_WIDTH // 8)):
+                mem.data[i] = i
+
+        self.procs.extend([time_sync()])
+
+    def _log_mem_addr(self, with_len=False, mem: Optional[AxiSimRam]=None):
+        """
+        :param with_len: if True log tuples (addr, len) instead of addresses
+        :param mem: the memory where to log the transactions, self.mem if None
+        :return: lists of addresses of read and write transactions in the order of arrival to memory
+        """
+
+        class AddrLogDeque(deque):
+
+            def __init__(self, log):
+                super(AddrLogDeque, self).__init__()
+                self.log = log
+
+            def append(self, x):
+                # (id, addr, size, mask), size = len + 1
+                self.log.append((x[1], x[2] - 1) if with_len else x[1])
+                super(AddrLogDeque, self).append(x)
+
+        if mem is None:
+            mem = self.mem
+        r_addr, w_addr = [], []
+        mem.rPending = AddrLogDeque(r_addr)
+        mem.wPending = AddrLogDeque(w_addr)
+        return r_addr, w_addr
+
+
+class AxiPerfTesterTC(AxiPerfTesterBaseTC):
+
     def test_dump_modulo(self):
         u: AxiPerfTester = self.u
         self._sim_init_common(0x1000)
@@ -112,8 +251,9 @@ class AxiPerfTesterTC(SimTestCase):
         self.runSim(15000 * CLK_PERIOD)
         # handle the case where something went wrong and ctl thread is still running
         self.sim_done = True
-        if self.r_data_available.locked():
-            self.r_data_available.release()
+        for lock in (self.r_data_available, self.b_data_available):
+            if lock.locked():
+                lock.release()
         ctl_thread.join()
 
         self.assertEqual(len(reports), 1)
@@ -136,27 +276,544 @@ class AxiPerfTesterTC(SimTestCase):
             self.assertEqual(ch.input_cnt, 10, ch_i)
             self.assertGreater(ch.last_time, 10, ch_i)
             self.assertLessEqual(ch.last_time, rep.time, ch_i)
+            self.assertEqual(sum(ch.occupancy_histogram_counters), rep.time, ch_i)
+            self.assertGreaterEqual(ch.occupancy_max, 1, ch_i)
+            self.assertLessEqual(ch.occupancy_max, 2 ** u.ID_WIDTH, ch_i)
+            # in-order mode, all transactions have distance 0
+            self.assertEqual(ch.reorder_cnt, 0, ch_i)
+            self.assertEqual(ch.reorder_histogram_counters, [0, 10, 0, 0], ch_i)
 
-    def _sim_init_common(self, mem_size_to_init):
+    def test_out_of_order_reorder_stats(self):
+        self._sim_init_common(0x1000)
+        # transactions complete in pairs in reversed order, distance -1 for the first and 1 for the second
+        self.mem.reorder_en = True
+        job = self._modulo_job()
+        for ch in job.channel_config:
+            ch.addr_gen.ordering_mode = TimeDurationStorage.MODE.OUT_OF_ORDER
+            ch.stat_config.reorder_histogram_keys = [-1, 0, 1]
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            # bins: < -1, -1, 0, >= 1
+            c = ch.reorder_histogram_counters
+            self.assertEqual(sum(c), 10, ch_i)
+            self.assertEqual(c[0], 0, ch_i)
+            self.assertGreater(c[1], 0, ch_i)
+            self.assertEqual(c[3], c[1], ch_i)
+            self.assertGreater(ch.reorder_cnt, 0, ch_i)
+            self.assertEqual(ch.reorder_cnt, c[1] + c[3], ch_i)
+
+    def test_auto_histogram_keys(self):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        for ch in job.channel_config:
+            ch.stat_config.histogram_keys = []
+
+        rep = self._exec_job(job, 30000 * CLK_PERIOD,
+                             lambda db, job: db.exec_auto_histogram_test(job, HISTOGRAM_KEY_SPACING.LINEAR, probe_credit=4))
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            self.assertEqual(sum(ch.histogram_counters), 10, ch_i)
+            keys = ch.histogram_keys
+            self.assertEqual(len(keys), self.u.HISTOGRAM_ITEMS - 1, ch_i)
+            self.assertSequenceEqual(keys, sorted(set(keys)), ch_i)
+            # keys of the probe run are [256, 65536, 16777216], the latency is much lower
+            self.assertLess(keys[-1], 256, ch_i)
+
+    def _test_max_outstanding(self, max_outstanding: int, max_outstanding_ref: Optional[int]=None,
+                              exec_fn=AxiPerfTesterCtl.exec_test):
+        """
+        :param max_outstanding: the max_outstanding written to the component
+        :param max_outstanding_ref: the limit which the component should actually use, max_outstanding if None
+        """
+        if max_outstanding_ref is None:
+            max_outstanding_ref = max_outstanding
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        job.channel_config[1].addr_gen.ordering_mode = TimeDurationStorage.MODE.OUT_OF_ORDER
+        for ch in job.channel_config:
+            ch.addr_gen.max_outstanding = max_outstanding
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD, exec_fn=exec_fn)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            self.assertLessEqual(ch.occupancy_max, max_outstanding_ref, ch_i)
+            # the limit was actually reached or there were multiple transactions in flight at least
+            self.assertGreaterEqual(ch.occupancy_max, min(max_outstanding_ref, 2), ch_i)
+            self.assertEqual(sum(ch.occupancy_histogram_counters[max_outstanding_ref + 1:]), 0, ch_i)
+
+    def test_max_outstanding_1(self):
+        self._test_max_outstanding(1)
+
+    def test_max_outstanding_3(self):
+        self._test_max_outstanding(3)
+
+    def test_max_outstanding_saturated(self):
         u: AxiPerfTester = self.u
+
+        def exec_fn(db: AxiPerfTesterCtl, job: AxiPerfTesterTestJob):
+            db._load_config()
+            # disable the check in driver to test the saturation in hardware
+            db.id_width = 31
+            return AxiPerfTesterCtl.exec_test(db, job)
+
+        # would be 1 if just the lower bits were used
+        self._test_max_outstanding(2 ** (u.ID_WIDTH + 1) + 1, 2 ** u.ID_WIDTH, exec_fn=exec_fn)
+
+    def test_w_data_cnt(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+
+        logs = []
+        for intf in (u.axi.aw, u.axi.w):
+            log = []
+            intf._ag.data = LogDeque(log)
+            logs.append(log)
+        aw_log, w_log = logs
+
+        job = self._modulo_job()
+        # 1 and 2 beat transactions
+        job.channel_config[1].addr_gen.trans_len_step = 1
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        self.assertEqual(rep.channel[1].input_cnt, 10)
+        # the data of a transaction is sent only once, even if the address channel is stalled
+        # (_id, addr, burst, cache, len, lock, prot, size, qos)
+        self.assertEqual(len(aw_log), 10)
+        self.assertEqual(len(w_log), sum(int(a[4]) + 1 for a in aw_log))
+        # (data, strb, last)
+        self.assertEqual(sum(int(last) for (_, _, last) in w_log), 10)
+
+    def test_rate_limit(self):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        for ch in job.channel_config:
+            ch.addr_gen.rate = AxiPerfTesterCtl.rate_to_hw(1 / 50)
+            ch.addr_gen.rate_burst = 1
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            # at most one transaction per 50 clk
+            self.assertGreaterEqual(ch.last_time, 9 * 50, ch_i)
+
+    def test_random_gap(self):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        for ch, gap_mode in zip(job.channel_config,
+                                [RWPatternGenerator.GAP_MODE.GEOMETRIC, RWPatternGenerator.GAP_MODE.UNIFORM]):
+            ch.addr_gen.gap_mode = gap_mode
+            ch.addr_gen.gap_param = AxiPerfTesterCtl.gap_param_for_mean(gap_mode, 8)
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.credit, 0, ch_i)
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+
+    def test_random_gap_histogram(self):
+        # the stalls of memory would change the gaps
+        self._sim_init_common(0x1000, randomize=False)
         tc = self
-        self.setUpQueues()
-        # axi_randomize_per_channel(self, u.cfg)
-        axi_randomize_per_channel(self, u.axi)
 
-        def time_sync():
-            while True:
-                if u.cfg.r._ag.data and self.r_data_available.locked():
-                    tc.r_data_available.release()
-                yield Timer(CLK_PERIOD)
-                if self.sim_done:
-                    raise StopSimumulation()
+        class TimeLogDeque(deque):
 
-        mem = self.mem
-        for i in range(mem_size_to_init // (u.DATA_WIDTH // 8)):
-            mem.data[i] = i
+            def __init__(self, log):
+                super(TimeLogDeque, self).__init__()
+                self.log = log
 
-        self.procs.extend([time_sync()])
+            def append(self, x):
+                self.log.append(tc.hdl_simulator.now // CLK_PERIOD)
+                super(TimeLogDeque, self).append(x)
+
+        r_time, w_time = [], []
+        self.mem.rPending = TimeLogDeque(r_time)
+        self.mem.wPending = TimeLogDeque(w_time)
+
+        N = 200
+        job = self._modulo_job(credit=N)
+        job.rw_mode = RWPatternGenerator.MODE.INDEPENDENT_TO_COMPLETION
+        r, w = job.channel_config
+        r.addr_gen.gap_mode = RWPatternGenerator.GAP_MODE.GEOMETRIC
+        # probability of release 0.1 in each clock cycle
+        r.addr_gen.gap_param = AxiPerfTesterCtl.gap_param_for_mean(r.addr_gen.gap_mode, 9)
+        w.addr_gen.gap_mode = RWPatternGenerator.GAP_MODE.UNIFORM
+        w.addr_gen.gap_param = AxiPerfTesterCtl.gap_param_for_mean(w.addr_gen.gap_mode, 8)
+
+        rep = self._exec_job(job, 30000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, N, ch_i)
+        self.assertEqual(len(r_time), N)
+        self.assertEqual(len(w_time), N)
+
+        # number of clock cycles without transaction between transactions
+        r_gaps, w_gaps = ([t1 - t0 - 1 for t0, t1 in zip(times, times[1:])]
+                          for times in (r_time, w_time))
+        # geometric distribution with p=0.1, P(gap=k) = 0.1 * 0.9 ** k, mean 9
+        r_hist = [r_gaps.count(k) for k in range(4)]
+        self.assertGreater(r_hist[0], 0.03 * N)
+        self.assertLess(r_hist[0], 0.2 * N)
+        for k in range(1, 4):
+            self.assertGreater(r_hist[k], 0.03 * N, (k, r_hist))
+        self.assertGreater(sum(r_gaps) / len(r_gaps), 6)
+        self.assertLess(sum(r_gaps) / len(r_gaps), 12)
+
+        # uniform distribution in [0, 17), mean 8
+        self.assertLessEqual(max(w_gaps), 17)
+        w_hist = [sum(1 for g in w_gaps if lo <= g < lo + 4) for lo in range(0, 16, 4)]
+        for c in w_hist:
+            self.assertGreater(c, 0.15 * N, w_hist)
+        self.assertGreater(sum(w_gaps) / len(w_gaps), 6)
+        self.assertLess(sum(w_gaps) / len(w_gaps), 10)
+
+    def test_independent_to_completion(self):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        job.rw_mode = RWPatternGenerator.MODE.INDEPENDENT_TO_COMPLETION
+        job.channel_config[1].addr_gen.credit = 5
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, (ch, trans_cnt) in enumerate(zip(rep.channel, [10, 5])):
+            self.assertEqual(ch.credit, 0, ch_i)
+            self.assertEqual(ch.dispatched_cntr, trans_cnt, ch_i)
+            self.assertEqual(ch.input_cnt, trans_cnt, ch_i)
+
+    def test_duration(self):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job(credit=10000)
+        job.rw_mode = RWPatternGenerator.MODE.DURATION
+        job.duration = 200
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertGreater(ch.credit, 0, ch_i)
+            self.assertGreater(ch.dispatched_cntr, 0, ch_i)
+            self.assertEqual(ch.credit + ch.dispatched_cntr, 10000, ch_i)
+            self.assertEqual(ch.input_cnt, ch.dispatched_cntr, ch_i)
+
+    def test_warmup(self):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        for ch in job.channel_config:
+            ch.stat_config.warmup_cnt = 3
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(ch.warmup_excluded, 3, ch_i)
+            self.assertEqual(ch.input_cnt, 7, ch_i)
+            self.assertEqual(sum(ch.histogram_counters), 7, ch_i)
+
+    def _test_multi_id_in_order(self, id_cnt: int, id_cnt_ref: int, exec_fn=AxiPerfTesterCtl.exec_test):
+        """
+        :param id_cnt: the id_cnt written to the component
+        :param id_cnt_ref: the number of ids which the component should actually use
+        """
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        # complete the transactions out of order so the ids are not released in the order of use
+        # (transactions with the same id have to complete in order)
+        self.mem.reorder_en = id_cnt_ref > 1
+        ar_ids, aw_ids = [], []
+        u.axi.ar._ag.data = LogDeque(ar_ids)
+        u.axi.aw._ag.data = LogDeque(aw_ids)
+        job = self._modulo_job()
+        for ch in job.channel_config:
+            ch.addr_gen.ordering_mode = TimeDurationStorage.MODE.IN_ORDER_MULTI_ID
+            ch.addr_gen.id_cnt = id_cnt
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD, exec_fn=exec_fn)
+        id_ref = [i % id_cnt_ref for i in range(10)]
+        # (_id, addr, burst, cache, _len, lock, prot, size, qos)
+        for ids in (ar_ids, aw_ids):
+            self.assertSequenceEqual([int(a[0]) for a in ids], id_ref)
+
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.credit, 0, ch_i)
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(sum(ch.histogram_counters), 10, ch_i)
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            self.assertGreater(ch.min_val, 0, ch_i)
+            self.assertLessEqual(ch.min_val, ch.max_val, ch_i)
+            self.assertLessEqual(ch.min_val * 10, ch.sum_val, ch_i)
+            self.assertLessEqual(ch.sum_val, ch.max_val * 10, ch_i)
+            self.assertLessEqual(ch.occupancy_max, 2 ** u.ID_WIDTH, ch_i)
+
+    def test_multi_id_in_order(self):
+        self._test_multi_id_in_order(3, 3)
+
+    def test_multi_id_in_order_saturated(self):
+        u: AxiPerfTester = self.u
+
+        def exec_fn(db: AxiPerfTesterCtl, job: AxiPerfTesterTestJob):
+            db._load_config()
+            # disable the check in driver to test the saturation in hardware
+            db.multi_id_cnt = mask(32)
+            return AxiPerfTesterCtl.exec_test(db, job)
+
+        self._test_multi_id_in_order(u.MULTI_ID_CNT + 3, u.MULTI_ID_CNT, exec_fn=exec_fn)
+
+    def test_multi_id_in_order_0(self):
+        # 0 is handled as 1
+        self._test_multi_id_in_order(0, 1)
+
+    def test_multi_stream(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        job = self._modulo_job()
+        stream_base = [i * 0x400 for i in range(u.ADDR_STREAM_CNT)]
+        for ch, addr_mode in zip(job.channel_config, [TransactionGenerator.MODE.STREAM_ROUND_ROBIN,
+                                                      TransactionGenerator.MODE.STREAM_PATTERN]):
+            ag = ch.addr_gen
+            ag.addr_mode = addr_mode
+            ag.stream_base = stream_base
+            ag.stream_step = [64 for _ in range(u.ADDR_STREAM_CNT)]
+            ag.stream_mask = [0x400 - 1 for _ in range(u.ADDR_STREAM_CNT)]
+        # write channel selects stream 0, 1, 0, 1 ... by the address in pattern
+        job.channel_config[1].pattern = [(i % 2, 0, 1) for i in range(u.RW_PATTERN_ITEMS)]
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+
+        S = u.ADDR_STREAM_CNT
+        self.assertSequenceEqual(r_addr, [stream_base[i % S] + (i // S) * 64 for i in range(10)])
+        self.assertSequenceEqual(w_addr, [stream_base[i % 2] + (i // 2) * 64 for i in range(10)])
+
+    def test_exact_addr(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        job = self._modulo_job(credit=2 * u.RW_PATTERN_ITEMS)
+        pattern_addr = [(i + 1) * 0x100 for i in range(u.RW_PATTERN_ITEMS)]
+        for ch in job.channel_config:
+            ch.pattern = [(a, 0, 1) for a in pattern_addr]
+            ch.addr_gen.addr_mode = TransactionGenerator.MODE.EXACT
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 2 * u.RW_PATTERN_ITEMS, ch_i)
+        # each transaction uses the address from its own pattern item
+        for addr in (r_addr, w_addr):
+            self.assertSequenceEqual(sorted(addr), sorted(pattern_addr * 2))
+
+    def test_disabled_pattern_items(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        job = self._modulo_job(credit=3 * u.RW_PATTERN_ITEMS)
+        # 1 of RW_PATTERN_ITEMS write items is disabled, this includes the items
+        # which are released after the credit is exhausted
+        job.channel_config[1].pattern[1] = (0, 0, 0)
+        w_cnt = 3 * (u.RW_PATTERN_ITEMS - 1)
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        r, w = rep.channel
+        self.assertEqual(r.dispatched_cntr, 3 * u.RW_PATTERN_ITEMS)
+        self.assertEqual(r.input_cnt, 3 * u.RW_PATTERN_ITEMS)
+        self.assertEqual(w.dispatched_cntr, w_cnt)
+        self.assertEqual(w.input_cnt, w_cnt)
+        self.assertEqual(len(r_addr), 3 * u.RW_PATTERN_ITEMS)
+        self.assertEqual(len(w_addr), w_cnt)
+
+    def test_stride_2d(self):
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        layout = DramAddrLayout(column_bits=(6, 2), bank_bits=(8, 2), row_bits=(10, 2))
+        # write channel: each transaction to a next bank, row changes after each round over banks
+        job = dram_mapping_jobs(self._modulo_job(), layout, 4)["row_miss"]
+        ag = job.channel_config[0].addr_gen
+        ag.addr = 0x100
+        ag.addr_mode = TransactionGenerator.MODE.STRIDE_2D
+        ag.stride_inner_step = 64
+        ag.stride_inner_cnt = 3
+        ag.stride_outer_step = 0x400
+        ag.stride_outer_cnt = 2
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+
+        self.assertSequenceEqual(r_addr, [0x100 + ((i // 3) % 2) * 0x400 + (i % 3) * 64 for i in range(10)])
+        self.assertSequenceEqual(w_addr, [((i // 4) % 4) * 0x400 + (i % 4) * 0x100 for i in range(10)])
+
+    def test_random_addr(self):
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        job = self._modulo_job()
+        for ch, seed in zip(job.channel_config, [0x1234, 0]):
+            ag = ch.addr_gen
+            ag.addr_mode = TransactionGenerator.MODE.RANDOM
+            ag.rand_seed = seed
+            ag.rand_align_mask = 64 - 1
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+
+        r_ref, w_ref = (random_addr_sequence(ch.addr_gen, 10) for ch in job.channel_config)
+        self.assertSequenceEqual(r_addr, r_ref)
+        self.assertSequenceEqual(w_addr, w_ref)
+        for a in r_addr + w_addr:
+            self.assertEqual(a % 64, 0, a)
+
+    def test_axi_attr(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+
+        logs = []
+        for intf in (u.axi.ar, u.axi.aw, u.axi.w):
+            log = []
+            intf._ag.data = LogDeque(log)
+            logs.append(log)
+        ar_log, aw_log, w_log = logs
+
+        job = self._modulo_job()
+        r, w = job.channel_config
+        r.addr_gen.burst = BURST_FIXED
+        r.addr_gen.cache = 0xf
+        r.addr_gen.qos = 3
+        # narrow transfers of 2 beats, 2B each
+        w.addr_gen.trans_len = 1
+        w.addr_gen.size = 1
+        w.addr_gen.qos = 5
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+
+        full_size = BYTES_IN_TRANS(u.DATA_WIDTH // 8)
+        # (_id, addr, burst, cache, _len, lock, prot, size, qos)
+        self.assertEqual(len(ar_log), 10)
+        for a in ar_log:
+            self.assertSequenceEqual([int(v) for v in a[2:4] + a[7:9]], [BURST_FIXED, 0xf, full_size, 3])
+        self.assertEqual(len(aw_log), 10)
+        for a in aw_log:
+            self.assertSequenceEqual([int(v) for v in a[2:4] + a[7:9]], [BURST_INCR, CACHE_DEFAULT, 1, 5])
+        # the lanes of narrow transfer move with each beat
+        self.assertSequenceEqual([int(strb) for (_, strb, _) in w_log], [0b0011, 0b1100] * 10)
+
+    def test_axi_attr_wrap(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        # the narrow WRAP transfers start at unaligned address
+        self.mem.allow_unaligned_addr = True
+
+        logs = []
+        for intf in (u.axi.aw, u.axi.w):
+            log = []
+            intf._ag.data = LogDeque(log)
+            logs.append(log)
+        aw_log, w_log = logs
+
+        job = self._modulo_job()
+        w = job.channel_config[1]
+        # narrow WRAP transfers of 2 beats, 1B each, starting at byte lane 1
+        w.addr_gen.burst = BURST_WRAP
+        w.addr_gen.trans_len = 1
+        w.addr_gen.size = 0
+        w.addr_gen.addr_offset = 0x1
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+
+        self.assertEqual(len(aw_log), 10)
+        for a in aw_log:
+            self.assertSequenceEqual([int(v) for v in (a[1] & 0x3, a[2], a[4], a[7])], [1, BURST_WRAP, 1, 0])
+        # the lanes wrap at the 2B boundary, not at the data width
+        self.assertSequenceEqual([int(strb) for (_, strb, _) in w_log], [0b0010, 0b0001] * 10)
+
+    def test_trigger_capture(self):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        # read channel triggers on the first transaction, write channel never
+        r_stat, w_stat = (ch.stat_config for ch in job.channel_config)
+        r_stat.trigger_threshold = 1
+        r_stat.trigger_post_cnt = 1
+        w_stat.trigger_threshold = mask(32)
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        r, w = rep.channel
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+
+        self.assertTrue(r.triggered)
+        self.assertEqual(r.trigger_index, 0)
+        self.assertLessEqual(r.trigger_time, r.last_time)
+        values, trigger_i = r.get_trigger_context()
+        self.assertEqual(trigger_i, 0)
+        self.assertEqual(len(values), 2)
+        self.assertGreater(values[0], 1)
+        # the rest of last values was not overwritten after the trigger
+        self.assertSequenceEqual(r.last_values[2:], [0, 0])
+
+        self.assertFalse(w.triggered)
+        self.assertSequenceEqual(w.get_trigger_context(), ([], -1))
+        for v in w.last_values:
+            self.assertNotEqual(v, 0)
+
+    def test_trace_compiled(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        # reads with a constant stride, writes with an irregular periodic pattern
+        records = []
+        for i in range(10):
+            records.append(AxiPerfTesterTraceRecord(0, 0x100 + i * 64, 0, i % 2))
+            records.append(AxiPerfTesterTraceRecord(1, [0x540, 0x80][i % 2], 1, 0))
+
+        job, reports = compile_trace(records, u.RW_PATTERN_ITEMS)
+        self.assertEqual(reports[0].addr_mode, TransactionGenerator.MODE.MODULO)
+        self.assertEqual(reports[1].addr_mode, TransactionGenerator.MODE.EXACT)
+        for r in reports:
+            self.assertTrue(r.is_exact(), r)
+        for ch in job.channel_config:
+            ch.stat_config.histogram_keys = [1, 4, 8]
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        r_ref = [r.addr for r in records if not r.rw]
+        w_ref = [r.addr for r in records if r.rw]
+        for ch_i, (ch, ref) in enumerate(zip(rep.channel, [r_ref, w_ref])):
+            self.assertEqual(ch.dispatched_cntr, len(ref), ch_i)
+            self.assertEqual(ch.input_cnt, len(ref), ch_i)
+        self.assertSequenceEqual(r_addr, r_ref)
+        self.assertSequenceEqual(w_addr, w_ref)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_stream_model(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        r_log, w_log = self._log_mem_addr(with_len=True)
+        job = self._modulo_job(credit=12)
+        r_ag = job.channel_config[0].addr_gen
+        r_ag.trans_len = 3
+        r_ag.trans_len_mask = 0x3
+        r_ag.trans_len_mode = TransactionGenerator.MODE.CRC
+        w_ch = job.channel_config[1]
+        w_ch.pattern[1] = (0, 0, 0)
+        w_ag = w_ch.addr_gen
+        w_ag.addr = 0x1234
+        w_ag.addr_mask = 0xfc0
+        w_ag.addr_mode = TransactionGenerator.MODE.CRC
+        w_ag.trans_len_step = 1
+
+        ref = model_job(job, u.RW_PATTERN_ITEMS, addr_width=u.ADDR_WIDTH, addr_stream_cnt=u.ADDR_STREAM_CNT)
+        r_ref, w_ref = ([(int(t["addr"]), int(t["len"])) for t in ref[ref["channel"] == ch_i]]
+                        for ch_i in range(2))
+        self.assertEqual(len(r_ref), 12)
+        self.assertEqual(len(w_ref), 9)
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, (ch, ref) in enumerate(zip(rep.channel, [r_ref, w_ref])):
+            self.assertEqual(ch.dispatched_cntr, len(ref), ch_i)
+        self.assertSequenceEqual(r_log, r_ref)
+        self.assertSequenceEqual(w_log, w_ref)
 
     def test_dump_exact(self):
         u: AxiPerfTester = self.u
@@ -194,8 +851,9 @@ class AxiPerfTesterTC(SimTestCase):
         self.runSim(17000 * CLK_PERIOD)
         # handle the case where something went wrong and ctl thread is still running
         self.sim_done = True
-        if self.r_data_available.locked():
-            self.r_data_available.release()
+        for lock in (self.r_data_available, self.b_data_available):
+            if lock.locked():
+                lock.release()
         ctl_thread.join()
 
         self.assertEqual(len(reports), 1)
@@ -218,11 +876,425 @@ class AxiPerfTesterTC(SimTestCase):
             self.assertEqual(ch.input_cnt, 10, ch_i)
             self.assertGreater(ch.last_time, 10, ch_i)
             self.assertLessEqual(ch.last_time, rep.time, ch_i)
+            self.assertEqual(sum(ch.occupancy_histogram_counters), rep.time, ch_i)
+            self.assertGreaterEqual(ch.occupancy_max, 1, ch_i)
+            self.assertLessEqual(ch.occupancy_max, 2 ** u.ID_WIDTH, ch_i)
+
+
+class AxiPerfTesterOptionalStatsTC(AxiPerfTesterBaseTC):
+    """
+    Optional statistics and the trace replay which are disabled by default
+    """
+
+    @classmethod
+    def _configure(cls, u: AxiPerfTester):
+        u.TOP_K_ITEMS = 2
+        u.HAS_BANDWIDTH_STATS = True
+        u.HAS_TRACE_REPLAY = True
+        u.TRACE_MAX_BURST = 4
+        u.TRACE_PREFETCH_ITEMS = 8
+
+    def test_bandwidth(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        for ch in job.channel_config:
+            # 1 and 2 beat transactions
+            ch.addr_gen.trans_len_step = 1
+        # read channel with windows of 8 clock cycles, write channel disabled
+        job.channel_config[0].stat_config.bandwidth_window = 8
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        r, w = rep.channel
+        self.assertEqual(r.input_cnt, 10)
+        self.assertEqual(len(r.bandwidth_histogram_keys), u.HISTOGRAM_ITEMS - 1)
+        window_cnt = sum(r.bandwidth_histogram_counters)
+        self.assertGreater(window_cnt, 0)
+        # there are windows without any transaction before the ctl stops the time
+        self.assertEqual(r.bandwidth_min, 0)
+        self.assertGreater(r.bandwidth_max, 0)
+        self.assertLessEqual(r.bandwidth_max, 8)
+        dist = r.get_bandwidth_distribution(u.DATA_WIDTH // 8)
+        self.assertEqual(len(dist), u.HISTOGRAM_ITEMS)
+        self.assertEqual(sum(cnt for _, _, cnt in dist), window_cnt)
+        self.assertEqual(dist[0][0], 0)
+        self.assertEqual(dist[-1][1], 9 * (u.DATA_WIDTH // 8) / 8)
+
+        self.assertEqual(sum(w.bandwidth_histogram_counters), 0)
+        self.assertSequenceEqual(w.get_bandwidth_distribution(u.DATA_WIDTH // 8), [])
+
+    def test_top_k(self):
+        u: AxiPerfTester = self.u
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        rep = self._exec_job(self._modulo_job(), 15000 * CLK_PERIOD)
+        for ch_i, (ch, addrs) in enumerate(zip(rep.channel, [r_addr, w_addr])):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            self.assertEqual(len(ch.top_k), u.TOP_K_ITEMS, ch_i)
+            self.assertEqual(ch.top_k[0]["latency"], ch.max_val, ch_i)
+            latencies = [t["latency"] for t in ch.top_k]
+            self.assertSequenceEqual(latencies, sorted(latencies, reverse=True), ch_i)
+            for t in ch.top_k:
+                self.assertIn(t["addr"], addrs, ch_i)
+                self.assertLess(t["id"], 2 ** u.ID_WIDTH, ch_i)
+                self.assertLessEqual(t["time"], ch.last_time, ch_i)
+
+    def test_trace_replay(self):
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        with tempfile.TemporaryDirectory() as d:
+            trace_file = os.path.join(d, "trace.txt")
+            with open(trace_file, "w") as f:
+                f.write("# rw addr len delay\n")
+                for i in range(21):
+                    f.write(f"{'rw'[i % 3 == 0]:s} 0x{(i * 7 * 64) % 0x1000:x} {i % 2:d} {i % 3:d}\n")
+            records = load_trace_file(trace_file)
+
+        self.assertEqual(len(records), 21)
+        rep = self._exec_job(self._modulo_job(), 15000 * CLK_PERIOD,
+                             lambda db, job: db.exec_trace_test(job, records, 0x100))
+
+        r_ref = [r.addr for r in records if not r.rw]
+        w_ref = [r.addr for r in records if r.rw]
+        for ch_i, (ch, ref) in enumerate(zip(rep.channel, [r_ref, w_ref])):
+            self.assertEqual(ch.dispatched_cntr, len(ref), ch_i)
+            self.assertEqual(ch.input_cnt, len(ref), ch_i)
+        self.assertSequenceEqual(r_addr, r_ref)
+        self.assertSequenceEqual(w_addr, w_ref)
+
+
+class AxiPerfTesterFirstBeatTC(AxiPerfTesterBaseTC):
+    """
+    The simulator can not handle the address decoder of the tester with all optional statistics enabled,
+    because of this the first beat statistics are tested on a separate instance with the default configuration
+    of other optional features.
+    """
+
+    @classmethod
+    def _configure(cls, u: AxiPerfTester):
+        u.HAS_FIRST_BEAT_STATS = True
+
+    def _test_first_beat(self, r_ordering_mode: TimeDurationStorage.MODE):
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+        job.channel_config[0].addr_gen.ordering_mode = r_ordering_mode
+        for ch in job.channel_config:
+            # 1 and 2 beat transactions
+            ch.addr_gen.trans_len_step = 1
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            self.assertEqual(ch.first_beat_input_cnt, 10, ch_i)
+            self.assertEqual(sum(ch.first_beat_histogram_counters), 10, ch_i)
+            self.assertGreaterEqual(ch.first_beat_min_val, 1, ch_i)
+            self.assertLessEqual(ch.first_beat_max_val, ch.max_val, ch_i)
+            self.assertLess(ch.first_beat_sum_val, ch.sum_val, ch_i)
+        return rep
+
+    def test_first_beat(self):
+        rep = self._test_first_beat(TimeDurationStorage.MODE.IN_ORDER)
+        r = rep.channel[0]
+        # the last values contain transactions 6..9, odd transactions have 2 beats
+        for i in range(6, 10):
+            lv_i = i % len(r.last_values)
+            if i % 2:
+                self.assertLess(r.first_beat_last_values[lv_i], r.last_values[lv_i], i)
+            else:
+                self.assertEqual(r.first_beat_last_values[lv_i], r.last_values[lv_i], i)
+
+    def test_first_beat_out_of_order(self):
+        self._test_first_beat(TimeDurationStorage.MODE.OUT_OF_ORDER)
+
+
+class AxiPerfTesterConflictTC(AxiPerfTesterBaseTC):
+    """
+    Read-after-write traffic and conflict statistics, tested on a separate instance for the same reason
+    as :class:`AxiPerfTesterFirstBeatTC`
+    """
+
+    @classmethod
+    def _configure(cls, u: AxiPerfTester):
+        u.RAW_HISTORY_ITEMS = 4
+
+    def _conflict_job(self) -> AxiPerfTesterTestJob:
+        job = self._modulo_job()
+        job.rw_mode = RWPatternGenerator.MODE.INDEPENDENT_TO_COMPLETION
+        # writes to 0x0, 0x40, ...
+        job.channel_config[1].addr_gen.addr_mask = 0x400 - 1
+        return job
+
+    def test_read_after_write(self):
+        self._sim_init_common(0x1000)
+        r_addr, w_addr = self._log_mem_addr()
+        job = self._conflict_job()
+        job.channel_config[0].addr_gen.addr_mode = TransactionGenerator.MODE.READ_AFTER_WRITE
+        job.raw_lag = 1
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        r, w = rep.channel
+        self.assertEqual(r.input_cnt, 10)
+        self.assertEqual(w.input_cnt, 10)
+        self.assertEqual(len(r_addr), 10)
+        # each read targets the address of some previous write
+        for a in r_addr:
+            self.assertIn(a, w_addr)
+        self.assertGreater(r.conflict_input_cnt, 0)
+        self.assertLessEqual(r.conflict_input_cnt, 10)
+        self.assertEqual(sum(r.conflict_histogram_counters), r.conflict_input_cnt)
+        self.assertGreaterEqual(r.conflict_min_val, r.min_val)
+        self.assertLessEqual(r.conflict_max_val, r.max_val)
+        hist, cnt, _ = r.get_non_conflict_stats()
+        self.assertEqual(cnt, 10 - r.conflict_input_cnt)
+        self.assertEqual(sum(hist), cnt)
+
+    def test_conflict_mask(self):
+        self._sim_init_common(0x1000)
+        job = self._conflict_job()
+        # reads from 0x800, 0x840, ...
+        job.channel_config[0].addr_gen.addr_offset = 0x800
+        job.channel_config[0].addr_gen.addr_mask = 0x400 - 1
+        # the same 1KB block
+        job.conflict_mask = mask(32) & ~(0x400 - 1)
+
+        rep = self._exec_job(job, 15000 * CLK_PERIOD)
+        r, _ = rep.channel
+        self.assertEqual(r.input_cnt, 10)
+        self.assertEqual(r.conflict_input_cnt, 0)
+        self.assertEqual(r.get_non_conflict_stats(), (r.histogram_counters, r.input_cnt, r.sum_val))
+
+
+class AxiPerfTesterCfgClkTC(AxiPerfTesterBaseTC):
+    CFG_CLK_PERIOD = 4 * CLK_PERIOD
+
+    @classmethod
+    def _configure(cls, u: AxiPerfTester):
+        u.HAS_CFG_CLK = True
+        u.CFG_FREQ = u.FREQ // 4
+
+    def test_slow_cfg_clk(self):
+        u: AxiPerfTester = self.u
+        u.cfg_clk._ag.period = self.CFG_CLK_PERIOD
+        self._sim_init_common(0x1000)
+        job = self._modulo_job()
+
+        rep = self._exec_job(job, 40000 * CLK_PERIOD)
+        self.assertGreater(rep.time, 10)
+        for ch_i, ch in enumerate(rep.channel):
+            self.assertEqual(ch.credit, 0, ch_i)
+            self.assertEqual(ch.dispatched_cntr, 10, ch_i)
+            self.assertEqual(ch.input_cnt, 10, ch_i)
+            self.assertGreater(ch.min_val, 0, ch_i)
+            self.assertLessEqual(ch.last_time, rep.time, ch_i)
+            # the time is counted in clock cycles of clk, not of cfg_clk
+            self.assertEqual(sum(ch.occupancy_histogram_counters), rep.time, ch_i)
+
+
+class TransactionGeneratorTC(unittest.TestCase):
+
+    def test_wide_addr(self):
+        # DDR/HBM address spaces wider than 32b
+        for addr_width in (34, 40):
+            u = TransactionGenerator()
+            u.ADDR_WIDTH = addr_width
+            to_rtl_str(u)
+
+    def test_random_addr_wide(self):
+        ag = AxiPerfTesterAddrGenConfig()
+        ag.addr_mask = mask(34)
+        ag.rand_seed = 0x12345
+        addr = random_addr_sequence(ag, 64, addr_width=34)
+        self.assertTrue(all(a <= mask(34) for a in addr))
+        self.assertTrue(any(a > mask(32) for a in addr))
+        if np is not None:
+            job = AxiPerfTesterTestJob()
+            for ch in job.channel_config:
+                ch.pattern = [(0, 0, 1) for _ in range(4)]
+                ch.addr_gen = ag
+                ag.addr_mode = TransactionGenerator.MODE.RANDOM
+                ag.credit = 64
+            ref = model_job(job, 4, addr_width=34)
+            self.assertSequenceEqual([int(a) for a in ref[ref["channel"] == 0]["addr"]], addr)
+
+
+class DramModelTC(unittest.TestCase):
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_dram_model(self):
+        rw_pattern_items = AxiPerfTester().RW_PATTERN_ITEMS
+        layout = DramAddrLayout(column_bits=(6, 2), bank_bits=(8, 2), row_bits=(10, 2))
+        model = DramModel(layout, DramTiming(tRCD=10, tRP=10, tCL=10, tCWL=10, controller_latency=0))
+        jobs = dram_mapping_jobs(modulo_job(rw_pattern_items, credit=64), layout, 64)
+        expected = {}
+        for name, job in jobs.items():
+            for ch in job.channel_config:
+                ch.stat_config.histogram_keys = [20, 30, 40]
+            # issue interval large enough to not have queueing in the model
+            expected[name] = model.expected_histograms(job, rw_pattern_items, issue_interval=64)
+            for hist in expected[name]:
+                self.assertEqual(hist.sum(), 64, name)
+
+        # only the first access activates the row
+        self.assertEqual(expected["row_hit"][0][0], 63)
+        # each access precharges and activates the row
+        self.assertEqual(expected["bank_conflict"][0][0], 0)
+
+        rep = AxiPerfTesterTestReport()
+        for ch, hist in zip(rep.channel, expected["row_hit"]):
+            ch.histogram_counters = [int(c) for c in hist]
+        self.assertSequenceEqual(deviating_channels(rep, expected["row_hit"]), [])
+        self.assertSequenceEqual([ch_i for ch_i, _ in deviating_channels(rep, expected["bank_conflict"])], [0, 1])
+
+
+class LatencyPercentilesTC(unittest.TestCase):
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_latency_percentiles(self):
+        rng = np.random.default_rng(0)
+        keys = [20, 40, 80]
+        channels = []
+        values = []
+        for i in range(8):
+            # long tail
+            v = (15 + rng.exponential(10 * (i + 1), 1000)).astype(np.int64)
+            values.append(v)
+            ch = AxiPerfTesterTestChannelReport()
+            ch.histogram_keys = keys
+            ch.histogram_counters = [int(c) for c in np.bincount(np.searchsorted(keys, v, side="right"), minlength=4)]
+            ch.min_val = int(v.min())
+            ch.max_val = int(v.max())
+            ch.input_cnt = v.size
+            ch.last_values = [int(x) for x in v[:64]]
+            channels.append(ch)
+        empty = AxiPerfTesterTestChannelReport()
+        empty.histogram_keys = keys
+        empty.histogram_counters = [0, 0, 0, 0]
+        empty.last_values = [0 for _ in range(64)]
+        channels.append(empty)
+
+        percentiles = (50, 90, 99, 99.9)
+        estimate, lower, upper = estimate_percentiles(channels, percentiles)
+        self.assertEqual(estimate.shape, (9, 4))
+        for i, v in enumerate(values):
+            ref = np.sort(v)[np.ceil(np.array(percentiles) / 100 * v.size).astype(np.int64) - 1]
+            for p_i, p in enumerate(percentiles):
+                self.assertLessEqual(lower[i, p_i], ref[p_i], (i, p))
+                self.assertGreaterEqual(upper[i, p_i], ref[p_i], (i, p))
+                self.assertLessEqual(lower[i, p_i], estimate[i, p_i], (i, p))
+                self.assertGreaterEqual(upper[i, p_i], estimate[i, p_i], (i, p))
+            # the max_val bounds the last bin
+            self.assertEqual(upper[i, -1], v.max())
+        self.assertTrue(np.isnan(estimate[-1]).all())
+
+
+class AxiPerfTesterMultiPortSimTC(AxiPerfTesterBaseTC):
+    """
+    The component with 2 ports and the default optional features
+    """
+
+    @classmethod
+    def _configure(cls, u: AxiPerfTester):
+        u.PORT_CNT = 2
+
+    def test_ports_independent(self):
+        self._sim_init_common(0x1000)
+        logs = [self._log_mem_addr(mem=mem) for mem in self.mems]
+        job = self._modulo_job()
+        job.rw_mode = RWPatternGenerator.MODE.INDEPENDENT_TO_COMPLETION
+        # each channel with a different number of transactions and address offset
+        credits = [10, 7, 5, 12]
+        for ch_i, (ch, credit) in enumerate(zip(job.channel_config, credits)):
+            ch.addr_gen.credit = credit
+            ch.addr_gen.addr_offset = ch_i * 0x400
+
+        rep = self._exec_job(job, 20000 * CLK_PERIOD)
+        self.assertEqual(len(rep.channel), 4)
+        for ch_i, (ch, credit) in enumerate(zip(rep.channel, credits)):
+            self.assertEqual(ch.credit, 0, ch_i)
+            self.assertEqual(ch.dispatched_cntr, credit, ch_i)
+            self.assertEqual(ch.input_cnt, credit, ch_i)
+            self.assertEqual(sum(ch.histogram_counters), credit, ch_i)
+            self.assertLessEqual(ch.last_time, rep.time, ch_i)
+
+        for port_i, (r_addr, w_addr) in enumerate(logs):
+            for rw, addrs in enumerate((r_addr, w_addr)):
+                ch_i = 2 * port_i + rw
+                # transactions of each channel went only to its port
+                self.assertSequenceEqual(addrs, [ch_i * 0x400 + i * 64 for i in range(credits[ch_i])], ch_i)
+
+
+class AxiPerfTesterMultiPortTC(unittest.TestCase):
+    """
+    The layout of the address space of the component with multiple ports and all optional features
+    as seen by the driver
+    """
+
+    class SerializedConfigCtl(AxiPerfTesterCtl):
+        """
+        The driver which reads the serialized_config from the parameters of the component
+        """
+
+        def __init__(self, u: AxiPerfTester):
+            AxiPerfTesterCtl.__init__(self, 0)
+            self.u = u
+
+        def read(self, addr: int, size: int):
+            assert addr == 4 * 4, addr
+            ADDR_SPACE, _ = self.u.construct_addr_space_type()
+            serialized_config_t = ADDR_SPACE.field_by_name["serialized_config"].dtype
+            data = 0
+            for f in reversed(serialized_config_t.fields):
+                data <<= f.dtype.bit_length()
+                if f.name != "serialized_config_reserved":
+                    data |= int(getattr(self.u, f.name))
+            return data.to_bytes(size, "little")
+
+    def test_addr_space_layout(self):
+        u = AxiPerfTester()
+        u.HISTOGRAM_ITEMS = 4
+        u.LAST_VALUES_ITEMS = 4
+        u.RW_PATTERN_ITEMS = 4
+        u.HAS_TRACE_REPLAY = True
+        u.TOP_K_ITEMS = 2
+        u.HAS_BANDWIDTH_STATS = True
+        u.HAS_FIRST_BEAT_STATS = True
+        u.RAW_HISTORY_ITEMS = 4
+        u.PORT_CNT = 3
+        ADDR_SPACE, _ = u.construct_addr_space_type()
+        field_offsets = {}
+        offset = 0
+        for f in ADDR_SPACE.fields:
+            field_offsets[f.name] = offset // 8
+            offset += f.dtype.bit_length()
+
+        ctl = self.SerializedConfigCtl(u)
+        ctl._load_config()
+        self.assertEqual(ctl.port_cnt, 3)
+        self.assertEqual(ctl.channel_cnt, 6)
+        self.assertEqual(ctl.channel_config_t_size, ADDR_SPACE.field_by_name["r"].dtype.bit_length() // 8)
+        for ch_i, name in enumerate(["r", "w", "r1", "w1", "r2", "w2"]):
+            self.assertEqual(ctl.channels_offset + ch_i * ctl.channel_config_t_size, field_offsets[name], name)
+        self.assertEqual(ctl.trace_offset, field_offsets["trace"])
+        self.assertEqual(ctl.conflict_offset, field_offsets["conflict"])
+        # conflict_stat_data_t has the same layout as first_beat_stat_data_t
+        self.assertEqual(offset // 8, ctl.conflict_stat_data_offset + ctl.first_beat_stat_data_size)
+
+        job = AxiPerfTesterTestJob(port_cnt=3)
+        self.assertEqual(len(job.channel_config), 6)
 
 
 if __name__ == "__main__":
     suite = unittest.TestSuite()
     # suite.addTest(DebugBusMonitorExampleAxiTC('test_write'))
     suite.addTest(unittest.makeSuite(AxiPerfTesterTC))
+    suite.addTest(unittest.makeSuite(AxiPerfTesterOptionalStatsTC))
+    suite.addTest(unittest.makeSuite(AxiPerfTesterFirstBeatTC))
+    suite.addTest(unittest.makeSuite(AxiPerfTesterConflictTC))
+    suite.addTest(unittest.makeSuite(AxiPerfTesterCfgClkTC))
+    suite.addTest(unittest.makeSuite(TransactionGeneratorTC))
+    suite.addTest(unittest.makeSuite(DramModelTC))
+    suite.addTest(unittest.makeSuite(LatencyPercentilesTC))
+    suite.addTest(unittest.makeSuite(AxiPerfTesterMultiPortSimTC))
+    suite.addTest(unittest.makeSuite(AxiPerfTesterMultiPortTC))
     runner = unittest.TextTestRunner(verbosity=3)
     runner.run(suite)